@@ -0,0 +1,54 @@
+import time
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from .state import get_user_state_store
+
+
+def set_user_state(user_id, is_active, is_staff=False, is_superuser=False):
+    """
+    Record a change of the user state for tokens issued before the change.
+    Entries live as long as a refresh token may, later tokens carry the new
+    state in their claims anyway.
+    """
+    state = {
+        "is_active": is_active,
+        "is_staff": is_staff,
+        "is_superuser": is_superuser,
+    }
+    lifetime = max(
+        settings.SIMPLE_JWT["ACCESS_TOKEN_LIFETIME"],
+        settings.SIMPLE_JWT["REFRESH_TOKEN_LIFETIME"],
+    )
+    store = get_user_state_store()
+    store.set(user_id, state, time.time(), lifetime.total_seconds())
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Resolves request.user from the signed claims of the access token without
+    querying the users table. The claims are overridden by the recorded user
+    state when the user was deactivated or had permissions changed after the
+    token was issued.
+    """
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+
+        state = get_user_state_store().get(user.id, time.time())
+        if state is None:
+            state = {
+                "is_active": validated_token.get("is_active", True),
+                "is_staff": user.is_staff,
+                "is_superuser": user.is_superuser,
+            }
+
+        if not state["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        user.is_staff = state["is_staff"]
+        user.is_superuser = state["is_superuser"]
+        return user
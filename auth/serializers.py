@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .tokens import UserStateRefreshToken, set_user_claims
+
+User = get_user_model()
+
+
+class LoginSerializer(TokenObtainPairSerializer):
+    token_class = UserStateRefreshToken
+
+
+class LoginRefreshSerializer(TokenRefreshSerializer):
+    """
+    Issues access tokens with the state of the user row, instead of the claims
+    the refresh token got at login.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        lookup = {api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]}
+        user = User.objects.filter(**lookup).first()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        data = super().validate(attrs)
+        access = AccessToken(data["access"])
+        set_user_claims(access, user)
+        data["access"] = str(access)
+        return data
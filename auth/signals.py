@@ -1,10 +1,17 @@
 import logging
 
+from django.conf import settings
 from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from .authentication import set_user_state
+
 user_logger = logging.getLogger("auth")
 
+# fields of the user that tokens carry as claims
+STATE_FIELDS = {"is_active", "is_staff", "is_superuser"}
+
 
 @receiver(user_logged_in)
 def user_logged_in_callback(sender, request, user, **kwargs):
@@ -22,3 +29,18 @@ def user_login_failed_callback(sender, request, credentials, **kwargs):
             credentials=credentials, ip=ip
         )
     )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved_callback(sender, instance, created, update_fields, **kwargs):
+    # a new user has no tokens yet, a login saves only last_login
+    if created or (update_fields is not None and not STATE_FIELDS & update_fields):
+        return
+    set_user_state(
+        instance.pk, instance.is_active, instance.is_staff, instance.is_superuser
+    )
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted_callback(sender, instance, **kwargs):
+    set_user_state(instance.pk, is_active=False)
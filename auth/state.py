@@ -0,0 +1,96 @@
+import os
+import sqlite3
+import threading
+
+from django.conf import settings
+
+# every so many writes a process removes the expired entries
+PURGE_INTERVAL = 100
+
+
+class UserStateStore:
+    """
+    The state of users changed after their tokens were issued, in a SQLite
+    database in WAL mode shared by the worker processes of a host. Unlike a
+    cache entry a state is kept until it expires, the last token issued
+    before the change has expired by then.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.local = threading.local()
+        self.writes = 0
+
+    def get_connection(self):
+        # sqlite3 connections must not be used by other threads, or by a
+        # forked worker process
+        pid = os.getpid()
+        connection = getattr(self.local, "connection", None)
+        if connection is None or self.local.pid != pid:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS user_state "
+                "(user_id INTEGER PRIMARY KEY, is_active INTEGER NOT NULL, "
+                "is_staff INTEGER NOT NULL, is_superuser INTEGER NOT NULL, "
+                "expires REAL NOT NULL)"
+            )
+            self.local.connection = connection
+            self.local.pid = pid
+        return connection
+
+    def set(self, user_id, state, now, duration):
+        connection = self.get_connection()
+        self.writes += 1
+        if self.writes % PURGE_INTERVAL == 0:
+            connection.execute("DELETE FROM user_state WHERE expires <= ?", (now,))
+        connection.execute(
+            "INSERT OR REPLACE INTO user_state VALUES (?, ?, ?, ?, ?)",
+            (
+                user_id,
+                state["is_active"],
+                state["is_staff"],
+                state["is_superuser"],
+                now + duration,
+            ),
+        )
+
+    def get(self, user_id, now):
+        """
+        Return the state of the user, None when it did not change in the
+        lifetime of a token.
+        """
+        row = (
+            self.get_connection()
+            .execute(
+                "SELECT is_active, is_staff, is_superuser FROM user_state "
+                "WHERE user_id = ? AND expires > ?",
+                (user_id, now),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        is_active, is_staff, is_superuser = map(bool, row)
+        return {
+            "is_active": is_active,
+            "is_staff": is_staff,
+            "is_superuser": is_superuser,
+        }
+
+    def clear(self):
+        self.get_connection().execute("DELETE FROM user_state")
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_user_state_store():
+    path = settings.USER_STATE_DB
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(path, UserStateStore(path))
+    return store
@@ -0,0 +1,107 @@
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from event.views import UserEventsView
+
+from ..state import get_user_state_store
+from ..tokens import UserStateRefreshToken
+from ..views import LoginView
+
+
+class TestLoginView:
+    view = LoginView
+    url = reverse("token_obtain")
+
+    def test_login_embeds_user_state_claims(
+        self, api_client, test_db_user, test_user_data
+    ):
+        credentials = {
+            "username": test_user_data["username"],
+            "password": test_user_data["password"],
+        }
+        response = api_client.post(self.url, data=credentials)
+        assert response.status_code == 200
+        token = AccessToken(response.data["access"])
+        assert token["user_id"] == test_db_user.id
+        assert token["username"] == test_db_user.username
+        assert token["is_active"] is True
+        assert token["is_staff"] is False
+
+
+class TestStatelessJWTAuthentication:
+    url = reverse(UserEventsView.name)
+
+    def test_request_is_authenticated_without_user_lookup(self, user_api_client):
+        with CaptureQueriesContext(connection) as captured:
+            response = user_api_client.get(self.url)
+        assert response.status_code == 200
+        assert captured.captured_queries
+        for query in captured.captured_queries:
+            assert "user_user" not in query["sql"]
+
+    def test_deactivated_user_is_rejected(self, test_db_user, user_api_client):
+        test_db_user.is_active = False
+        test_db_user.save()
+        response = user_api_client.get(self.url)
+        assert response.status_code == 401
+
+    def test_deleted_user_is_rejected(self, test_db_user, user_api_client):
+        test_db_user.delete()
+        response = user_api_client.get(self.url)
+        assert response.status_code == 401
+
+    @pytest.mark.parametrize("is_staff", [True, False])
+    def test_staff_status_change_is_applied(
+        self, api_client, test_db_user, user_api_client, is_staff
+    ):
+        test_db_user.is_staff = is_staff
+        test_db_user.save()
+        response = user_api_client.get(self.url)
+        assert response.status_code == 200
+        assert response.wsgi_request.user.is_staff is is_staff
+
+    def test_login_records_no_user_state(
+        self, api_client, test_db_user, test_user_data
+    ):
+        response = api_client.post(reverse("token_obtain"), data=test_user_data)
+        assert response.status_code == 200
+        assert get_user_state_store().get(test_db_user.id, time.time()) is None
+
+    def test_user_state_outlives_the_refresh_tokens(self, settings, test_db_user):
+        test_db_user.is_active = False
+        test_db_user.save()
+        store = get_user_state_store()
+        lifetime = settings.SIMPLE_JWT["REFRESH_TOKEN_LIFETIME"].total_seconds()
+        # a refresh token issued just before the change is still valid
+        assert store.get(test_db_user.id, time.time() + lifetime - 60) == {
+            "is_active": False,
+            "is_staff": False,
+            "is_superuser": False,
+        }
+        assert store.get(test_db_user.id, time.time() + lifetime + 60) is None
+
+
+class TestLoginRefreshView:
+    url = reverse("token_refresh")
+
+    def test_access_token_has_the_current_user_state(self, api_client, test_db_user):
+        refresh = UserStateRefreshToken.for_user(test_db_user)
+        test_db_user.is_staff = True
+        test_db_user.save()
+
+        response = api_client.post(self.url, data={"refresh": str(refresh)})
+        assert response.status_code == 200
+        assert AccessToken(response.data["access"])["is_staff"] is True
+
+    def test_deactivated_user_is_rejected(self, api_client, test_db_user):
+        refresh = UserStateRefreshToken.for_user(test_db_user)
+        test_db_user.is_active = False
+        test_db_user.save()
+
+        response = api_client.post(self.url, data={"refresh": str(refresh)})
+        assert response.status_code == 401
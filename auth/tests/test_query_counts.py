@@ -0,0 +1,60 @@
+import pytest
+from django.urls import reverse
+
+from auth.tokens import UserStateRefreshToken
+
+from .. import urls
+
+ROUTES = {
+    "token_obtain": ("POST",),
+    "token_refresh": ("POST",),
+    "token_verify": ("POST",),
+}
+
+
+def test_every_route_has_a_query_bound():
+    names = {pattern.name for pattern in urls.urlpatterns}
+    assert names == set(ROUTES)
+
+
+class TestTokenQueries:
+    def test_login(
+        self,
+        count_queries,
+        create_users,
+        api_client,
+        test_user_data,
+        row_counts,
+        assert_bounded,
+    ):
+        url = reverse("token_obtain")
+        credentials = {
+            "username": test_user_data["username"],
+            "password": test_user_data["password"],
+        }
+        counts = []
+        for rows in row_counts:
+            create_users(rows)
+            counts.append(count_queries(api_client.post, url, credentials))
+        # user, last_login
+        assert_bounded(counts, 2)
+
+    @pytest.mark.parametrize("name", ["token_refresh", "token_verify"])
+    def test_token(
+        self,
+        count_queries,
+        create_users,
+        user_api_client,
+        test_db_user,
+        name,
+        row_counts,
+        assert_bounded,
+    ):
+        url = reverse(name)
+        refresh = UserStateRefreshToken.for_user(test_db_user)
+        data = {"refresh": str(refresh), "token": str(refresh.access_token)}
+        counts = []
+        for rows in row_counts:
+            create_users(rows)
+            counts.append(count_queries(user_api_client.post, url, data))
+        assert_bounded(counts, 1)
@@ -0,0 +1,65 @@
+import multiprocessing
+
+import pytest
+from django.urls import reverse
+
+from ..throttling import ThrottleStore, get_throttle_store
+
+
+def hit_store(path, key, hits):
+    store = ThrottleStore(path)
+    return sum(store.hit(key, 0, 10, 3600)[0] for _ in range(hits))
+
+
+class TestThrottleStore:
+    @pytest.fixture
+    def store(self, tmp_path):
+        return ThrottleStore(tmp_path / "throttle.sqlite3")
+
+    def test_requests_are_limited_per_key(self, store):
+        assert store.hit("a", 0, 2, 10) == (True, 1, 0)
+        assert store.hit("a", 1, 2, 10) == (True, 2, 0)
+        assert store.hit("a", 2, 2, 10) == (False, 2, 0)
+        assert store.hit("b", 2, 2, 10) == (True, 1, 2)
+
+    def test_window_slides(self, store):
+        store.hit("a", 0, 2, 10)
+        store.hit("a", 5, 2, 10)
+        assert store.hit("a", 9, 2, 10)[0] is False
+        # the first request left the window
+        assert store.hit("a", 10, 2, 10) == (True, 2, 5)
+        assert store.hit("a", 11, 2, 10)[0] is False
+
+    def test_clear(self, store):
+        store.hit("a", 0, 1, 10)
+        store.clear()
+        assert store.hit("a", 1, 1, 10)[0] is True
+
+    def test_processes_share_the_counters(self, tmp_path):
+        path = tmp_path / "throttle.sqlite3"
+        context = multiprocessing.get_context("fork")
+        with context.Pool(4) as pool:
+            allowed = pool.starmap(hit_store, [(path, "login", 5)] * 4)
+        assert sum(allowed) == 10
+
+
+class TestLoginThrottle:
+    url = reverse("token_obtain")
+
+    def test_login_attempts_are_limited(self, api_client, test_db_user):
+        credentials = {"username": test_db_user.username, "password": "wrong"}
+        # LIMIT_ATTEMPTS_RATE, 10/hour
+        for _ in range(10):
+            response = api_client.post(self.url, data=credentials)
+            assert response.status_code == 401
+        response = api_client.post(self.url, data=credentials)
+        assert response.status_code == 429
+        assert 0 < int(response.headers["Retry-After"]) <= 3600
+
+    def test_attempts_are_counted_in_the_store(self, db, settings, api_client):
+        api_client.post(self.url, data={"username": "x", "password": "y"})
+        store = get_throttle_store()
+        assert store.path == settings.THROTTLE_DB
+        connection = store.get_connection()
+        [(count,)] = connection.execute("SELECT COUNT(*) FROM throttle_hit")
+        assert count == 1
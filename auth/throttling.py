@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import threading
+
+from django.conf import settings
+from rest_framework.throttling import ScopedRateThrottle
+
+# every so many hits a process removes the expired hits of all keys
+PURGE_INTERVAL = 1000
+
+
+class ThrottleStore:
+    """
+    Sliding window request counters in a SQLite database in WAL mode, shared
+    by the worker processes of a host. A hit is a single local transaction,
+    no network round trip.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.local = threading.local()
+        self.hits = 0
+
+    def get_connection(self):
+        # sqlite3 connections must not be used by other threads, or by a
+        # forked worker process
+        pid = os.getpid()
+        connection = getattr(self.local, "connection", None)
+        if connection is None or self.local.pid != pid:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # losing the last hits on a power failure is acceptable
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS throttle_hit "
+                "(key TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS throttle_hit_key "
+                "ON throttle_hit (key, expires)"
+            )
+            self.local.connection = connection
+            self.local.pid = pid
+        return connection
+
+    def hit(self, key, now, limit, duration):
+        """
+        Count a request of the key at the time now, unless the key made limit
+        requests in the last duration seconds. Return (allowed, number of
+        requests in the window, time of the oldest request in the window).
+        """
+        connection = self.get_connection()
+        self.hits += 1
+        # BEGIN IMMEDIATE takes the write lock up front, so that concurrent
+        # hits of the key are counted one after the other
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if self.hits % PURGE_INTERVAL == 0:
+                connection.execute(
+                    "DELETE FROM throttle_hit WHERE expires <= ?", (now,)
+                )
+            else:
+                connection.execute(
+                    "DELETE FROM throttle_hit WHERE key = ? AND expires <= ?",
+                    (key, now),
+                )
+            count, first_expires = connection.execute(
+                "SELECT COUNT(*), MIN(expires) FROM throttle_hit WHERE key = ?",
+                (key,),
+            ).fetchone()
+            allowed = count < limit
+            if allowed:
+                connection.execute(
+                    "INSERT INTO throttle_hit (key, expires) VALUES (?, ?)",
+                    (key, now + duration),
+                )
+                count += 1
+                if first_expires is None:
+                    first_expires = now + duration
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return allowed, count, first_expires - duration
+
+    def clear(self):
+        self.get_connection().execute("DELETE FROM throttle_hit")
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_throttle_store():
+    path = settings.THROTTLE_DB
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(path, ThrottleStore(path))
+    return store
+
+
+class SharedScopedRateThrottle(ScopedRateThrottle):
+    """
+    ScopedRateThrottle that counts the requests in a ThrottleStore, so that
+    the rate holds for all worker processes together and survives restarts,
+    instead of the history kept in the per-process cache.
+    """
+
+    def allow_request(self, request, view):
+        # ScopedRateThrottle.allow_request() and SimpleRateThrottle.allow_request()
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        allowed, self.count, self.first = get_throttle_store().hit(
+            self.key, self.now, self.num_requests, self.duration
+        )
+        return allowed
+
+    def wait(self):
+        # SimpleRateThrottle.wait() with the window of the store
+        remaining_duration = self.duration - (self.now - self.first)
+        available_requests = self.num_requests - self.count + 1
+        if available_requests <= 0:
+            return None
+        return remaining_duration / float(available_requests)
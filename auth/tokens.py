@@ -0,0 +1,21 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+def set_user_claims(token, user):
+    token["username"] = user.get_username()
+    token["is_active"] = user.is_active
+    token["is_staff"] = user.is_staff
+    token["is_superuser"] = user.is_superuser
+
+
+class UserStateRefreshToken(RefreshToken):
+    """
+    Refresh token carrying the user state needed by StatelessJWTAuthentication.
+    The claims are copied to every access token derived from it.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        set_user_claims(token, user)
+        return token
@@ -1,12 +1,23 @@
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenVerifyView
+from rest_framework_simplejwt.views import (
+    TokenObtainPairView,
+    TokenRefreshView,
+    TokenVerifyView,
+)
+
+from .serializers import LoginRefreshSerializer, LoginSerializer
 
 
 class LoginView(TokenObtainPairView):
+    serializer_class = LoginSerializer
     throttle_scope = "limit_attempts"
 
 
+class LoginRefreshView(TokenRefreshView):
+    serializer_class = LoginRefreshSerializer
+
+
 class TokenVerificationView(TokenVerifyView):
     permission_classes = (IsAuthenticated,)
     authentication_classes = (JWTAuthentication,)
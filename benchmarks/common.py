@@ -0,0 +1,224 @@
+"""
+Helpers shared by the load benchmarks: a throwaway SQLite database with
+seeded data, API servers run as subprocesses and a minimal asyncio HTTP
+client, so that the benchmarks need nothing beyond the project requirements.
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PASSWORD = "benchmark-password"
+
+
+def setup_django(db_path, db_url=None):
+    """
+    Point the project settings at the benchmark database, the SQLite database
+    db_path unless a db_url is given. The servers started by run_server()
+    inherit the environment.
+    """
+    os.environ["DB_URL"] = db_url or f"sqlite:///{db_path}"
+    os.environ["THROTTLE_DB"] = str(Path(db_path).with_name("throttle.sqlite3"))
+    os.environ["USER_STATE_DB"] = str(Path(db_path).with_name("user_state.sqlite3"))
+    # the pages cached in a previous run belong to another database
+    os.environ["CACHE_URL"] = f"mmapcache://{Path(db_path).with_name('cache.mmap')}"
+    os.environ["DEBUG"] = "False"
+    os.environ["LOG_DEFAULT"] = os.devnull
+    os.environ["LOG_AUTH"] = os.devnull
+    os.environ["LOG_SLOW_QUERIES"] = os.devnull
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    sys.path.insert(0, str(BASE_DIR))
+
+    import django
+
+    django.setup()
+
+
+def seed_database(users=100, events=1000, registrations=10, seed=0):
+    """
+    Create users, past/today/future events and registrations with a fixed
+    random seed. Return the usernames and the event ids.
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    from event.models import Event, EventRegistration
+
+    call_command("migrate", verbosity=0)
+    rng = random.Random(seed)
+    User = get_user_model()
+    password = make_password(PASSWORD)
+    db_users = User.objects.bulk_create(
+        User(username=f"user_{i}", email=f"user_{i}@example.com", password=password)
+        for i in range(users)
+    )
+
+    now = timezone.now()
+    db_events = []
+    for i in range(events):
+        start = now + timedelta(hours=rng.randint(-24 * 60, 24 * 60))
+        db_events.append(
+            Event(
+                name=f"Event {i}",
+                description=f"Benchmark event {i}",
+                start=start,
+                end=start + timedelta(hours=rng.randint(1, 8)),
+                number_of_seats=rng.choice([0, 10, 50, 500]),
+                is_published=rng.random() < 0.9,
+                arranged_by=rng.choice(db_users),
+            )
+        )
+    db_events = Event.objects.bulk_create(db_events)
+
+    pairs = {
+        (event.pk, user.pk)
+        for user in db_users
+        for event in rng.sample(db_events, min(registrations, len(db_events)))
+    }
+    EventRegistration.objects.bulk_create(
+        EventRegistration(event_id=event_id, user_id=user_id)
+        for event_id, user_id in pairs
+    )
+    Event.events.recount_registrations()
+    return [user.username for user in db_users], [event.pk for event in db_events]
+
+
+def get_access_token(username):
+    from django.contrib.auth import get_user_model
+
+    from auth.tokens import UserStateRefreshToken
+
+    user = get_user_model().objects.get(username=username)
+    return str(UserStateRefreshToken.for_user(user).access_token)
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+SERVERS = {
+    "wsgi": [sys.executable, "-m", "gunicorn", "config.wsgi:application"],
+    "asgi": [sys.executable, "-m", "uvicorn", "config.asgi:application"],
+}
+
+
+@contextmanager
+def run_server(server, workers=1, env=None, timeout=30):
+    """
+    Run the API with gunicorn ("wsgi") or uvicorn ("asgi") on a free port and
+    yield the port.
+    """
+    port = get_free_port()
+    command = SERVERS[server] + [f"--workers={workers}"]
+    if server == "wsgi":
+        command += [f"--bind=127.0.0.1:{port}"]
+    else:
+        command += ["--host=127.0.0.1", f"--port={port}", "--no-access-log"]
+
+    process = subprocess.Popen(
+        command,
+        cwd=BASE_DIR,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"{server} server exited with {process.returncode}")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{server} server did not start")
+                time.sleep(0.1)
+        yield port
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def http_request(port, method, path, token=None, data=None, delay=0):
+    """
+    Send a request over a new connection and return (status, headers, body,
+    seconds). With a delay the request head is sent in two parts, like a
+    slow client on a poor network would.
+    """
+    body = json.dumps(data).encode() if data is not None else b""
+    lines = [
+        f"{method} {path} HTTP/1.1",
+        "Host: 127.0.0.1",
+        "Connection: close",
+        f"Content-Length: {len(body)}",
+    ]
+    if data is not None:
+        lines.append("Content-Type: application/json")
+    if token:
+        lines.append(f"Authorization: Bearer {token}")
+    head = ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        if delay:
+            writer.write(head[:-2])
+            await writer.drain()
+            await asyncio.sleep(delay)
+            head = head[-2:]
+        writer.write(head + body)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    seconds = time.perf_counter() - start
+
+    response_head, _, response_body = response.partition(b"\r\n\r\n")
+    status_line, *header_lines = response_head.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return int(status_line.split()[1]), headers, response_body, seconds
+
+
+def percentile(values, percent):
+    # nearest-rank percentile of sorted values
+    if not values:
+        return None
+    rank = max(math.ceil(percent / 100 * len(values)) - 1, 0)
+    return values[rank]
+
+
+def summarize(latencies, errors, seconds):
+    """
+    Summarize request latencies in seconds measured over a run of the given
+    duration, latencies are reported in milliseconds.
+    """
+    latencies = sorted(latencies)
+    summary = {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": round(len(latencies) / seconds, 1) if seconds else None,
+    }
+    for percent in (50, 95, 99):
+        value = percentile(latencies, percent)
+        summary[f"p{percent}_ms"] = (
+            round(value * 1000, 2) if value is not None else None
+        )
+    return summary
@@ -0,0 +1,276 @@
+"""
+Load benchmark of the API: seeds users, events and registrations into a
+temporary SQLite database, starts a local server and drives the endpoints
+(login, event list with every t filter, event details, register/unregister
+and /me/*) with concurrent clients.
+
+    python -m benchmarks.load --users 200 --events 5000 --clients 50 --duration 30
+
+Per operation and in total it reports the p50/p95/p99 latency, the
+throughput and the status codes as JSON, together with the SQL queries a
+request of every operation runs (measured in process, with and without the
+event list cache). With --baseline the results are compared to an earlier
+run, and the exit status is 1 when an operation got slower or runs more
+queries than the allowed margin.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from .common import (
+    PASSWORD,
+    get_access_token,
+    http_request,
+    run_server,
+    seed_database,
+    setup_django,
+    summarize,
+)
+
+API = "/api/v1"
+
+# operation: weight in the request mix
+OPERATIONS = {
+    "login": 1,
+    "event_list": 4,
+    "event_list_today": 2,
+    "event_list_past": 2,
+    "event_list_future": 4,
+    "event_list_all": 1,
+    "event_detail": 6,
+    "register": 2,
+    "unregister": 2,
+    "me_events": 3,
+    "me_registrations": 3,
+}
+
+
+class Scenario:
+    """
+    Builds the requests of the operations for a client, every client is
+    one of the seeded users.
+    """
+
+    def __init__(self, usernames, tokens, event_ids, future_event_ids, seed=0):
+        self.usernames = usernames
+        self.tokens = tokens
+        self.event_ids = event_ids
+        self.future_event_ids = future_event_ids
+        self.rng = random.Random(seed)
+
+    def next_operation(self):
+        names = list(OPERATIONS)
+        return self.rng.choices(names, weights=[OPERATIONS[n] for n in names])[0]
+
+    def get_request(self, operation, client, event_id=None):
+        """
+        Return (method, path, data) of the operation for the client, on a
+        random event unless one is given.
+        """
+        if operation == "login":
+            data = {"username": self.usernames[client], "password": PASSWORD}
+            return "POST", f"{API}/auth/login/", data
+        if operation.startswith("event_list"):
+            t = operation.rpartition("_")[2]
+            query = f"?t={t}" if t != "list" else ""
+            return "GET", f"{API}/event/events/{query}", None
+        if operation == "event_detail":
+            event_id = event_id or self.rng.choice(self.event_ids)
+            return "GET", f"{API}/event/events/{event_id}/", None
+        if operation in ("register", "unregister"):
+            event_id = event_id or self.rng.choice(self.future_event_ids)
+            method = "POST" if operation == "register" else "DELETE"
+            return method, f"{API}/event/me/registrations/{event_id}/", {}
+        if operation == "me_events":
+            return "GET", f"{API}/event/me/events/", None
+        if operation == "me_registrations":
+            return "GET", f"{API}/event/me/registrations/", None
+        raise ValueError(operation)
+
+
+async def drive(port, scenario, clients, duration):
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    errors = Counter()
+
+    async def client(index):
+        token = scenario.tokens[index]
+        while time.monotonic() < deadline:
+            operation = scenario.next_operation()
+            method, path, data = scenario.get_request(operation, index)
+            try:
+                status, _, _, seconds = await http_request(
+                    port, method, path, token=token, data=data
+                )
+            except OSError:
+                errors[operation] += 1
+                continue
+            statuses[operation][status] += 1
+            if status >= 500:
+                errors[operation] += 1
+            else:
+                latencies[operation].append(seconds)
+
+    start = time.monotonic()
+    deadline = start + duration
+    await asyncio.gather(*(client(index) for index in range(clients)))
+    seconds = time.monotonic() - start
+
+    results = {
+        "total": summarize(
+            [latency for values in latencies.values() for latency in values],
+            sum(errors.values()),
+            seconds,
+        ),
+        "operations": {},
+    }
+    for operation in OPERATIONS:
+        summary = summarize(latencies[operation], errors[operation], seconds)
+        summary["statuses"] = dict(sorted(statuses[operation].items()))
+        results["operations"][operation] = summary
+    return results
+
+
+def count_queries(scenario):
+    """
+    Run one request of every operation in process and count its SQL queries,
+    GET requests with an empty cache and then once more with the cache filled.
+    Register and unregister use the same event, so that both succeed.
+    """
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    client = Client()
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {scenario.tokens[0]}"}
+    event_id = scenario.future_event_ids[0]
+    queries = {}
+    for operation in OPERATIONS:
+        cache.clear()
+        method, path, data = scenario.get_request(operation, 0, event_id=event_id)
+        request = getattr(client, method.lower())
+        counts = {}
+        for key in ("queries", "queries_cached")[: 2 if method == "GET" else 1]:
+            with CaptureQueriesContext(connection) as context:
+                request(path, data, content_type="application/json", **headers)
+            counts[key] = len(context)
+        queries[operation] = counts
+    return queries
+
+
+def compare(results, baseline, margin):
+    """
+    Return the regressions of the results against a baseline run.
+    """
+    regressions = []
+    for operation, current in results["operations"].items():
+        previous = baseline["operations"].get(operation)
+        if previous is None:
+            continue
+        for key in ("p95_ms", "queries"):
+            if current.get(key) is None or previous.get(key) is None:
+                continue
+            # query counts are exact, latencies get the margin
+            allowed = previous[key] * (1 + margin) if key == "p95_ms" else previous[key]
+            if current[key] > allowed:
+                regressions.append(
+                    f"{operation}: {key} {current[key]} > {previous[key]} (baseline)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument(
+        "--registrations", type=int, default=10, help="registrations per user"
+    )
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10, help="seconds")
+    parser.add_argument("--server", choices=("wsgi", "asgi"), default="wsgi")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--async-views", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write the JSON results here")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare to")
+    parser.add_argument(
+        "--margin",
+        type=float,
+        default=0.2,
+        help="allowed p95 latency increase over the baseline (default: 0.2)",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / "benchmark.sqlite3")
+        from django.utils import timezone
+
+        from event.models import Event
+
+        usernames, event_ids = seed_database(
+            users=args.users,
+            events=args.events,
+            registrations=args.registrations,
+            seed=args.seed,
+        )
+        future_event_ids = list(
+            Event.events.future_events().values_list("pk", flat=True)
+        )
+        tokens = [get_access_token(username) for username in usernames]
+        clients = min(args.clients, len(usernames))
+        scenario = Scenario(
+            usernames, tokens, event_ids, future_event_ids, seed=args.seed
+        )
+
+        env = {
+            "ASYNC_VIEWS": str(args.async_views),
+            # every client logs in from the same address
+            "LIMIT_ATTEMPTS_RATE": "1000000/hour",
+        }
+        with run_server(args.server, workers=args.workers, env=env) as port:
+            results = asyncio.run(drive(port, scenario, clients, args.duration))
+
+        for operation, counts in count_queries(scenario).items():
+            results["operations"][operation].update(counts)
+
+    results = {
+        "config": {
+            "users": args.users,
+            "events": args.events,
+            "registrations": args.registrations,
+            "clients": clients,
+            "duration": args.duration,
+            "server": args.server,
+            "workers": args.workers,
+            "async_views": args.async_views,
+            "seed": args.seed,
+            "date": timezone.now().isoformat(),
+        },
+        **results,
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    print(output)
+
+    if args.baseline:
+        regressions = compare(
+            results, json.loads(args.baseline.read_text()), args.margin
+        )
+        for regression in regressions:
+            print(regression, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Compare the run modes of the API on the read-only event views (event list,
+event details, /me/events/ and /me/registrations/) under many concurrent
+slow clients:
+
+    wsgi              gunicorn, sync workers
+    asgi-sync-views   uvicorn, sync views run in the thread of the ASGI handler
+    asgi-async-views  uvicorn, ASYNC_VIEWS=True
+
+    python -m benchmarks.serving_modes --clients 200 --duration 20
+
+The results are printed as JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from .common import (
+    get_access_token,
+    http_request,
+    run_server,
+    seed_database,
+    setup_django,
+    summarize,
+)
+
+MODES = {
+    "wsgi": ("wsgi", {"ASYNC_VIEWS": "False"}),
+    "asgi-sync-views": ("asgi", {"ASYNC_VIEWS": "False"}),
+    "asgi-async-views": ("asgi", {"ASYNC_VIEWS": "True"}),
+}
+
+
+def get_paths(event_ids):
+    return [
+        "/api/v1/event/events/",
+        "/api/v1/event/events/?t=future",
+        "/api/v1/event/me/events/",
+        "/api/v1/event/me/registrations/",
+    ] + [f"/api/v1/event/events/{event_id}/" for event_id in event_ids[:20]]
+
+
+async def drive(port, tokens, paths, clients, duration, delay):
+    latencies = []
+    errors = 0
+
+    async def client(index):
+        nonlocal errors
+        token = tokens[index % len(tokens)]
+        rng = random.Random(index)
+        request = index
+        while time.monotonic() < deadline:
+            path = paths[request % len(paths)]
+            request += 1
+            # clients are slow to a varying extent
+            client_delay = rng.expovariate(1 / delay) if delay else 0
+            try:
+                status, _, _, seconds = await http_request(
+                    port, "GET", path, token=token, delay=client_delay
+                )
+            except OSError:
+                errors += 1
+                continue
+            if status == 200:
+                latencies.append(seconds)
+            else:
+                errors += 1
+
+    start = time.monotonic()
+    deadline = start + duration
+    await asyncio.gather(*(client(index) for index in range(clients)))
+    return summarize(latencies, errors, time.monotonic() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per mode")
+    parser.add_argument(
+        "--client-delay",
+        type=float,
+        default=0.1,
+        help="mean seconds a client takes to send its request",
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--events", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / "benchmark.sqlite3")
+        usernames, event_ids = seed_database(users=args.users, events=args.events)
+        tokens = [get_access_token(username) for username in usernames]
+        paths = get_paths(event_ids)
+
+        results = {
+            "clients": args.clients,
+            "client_delay": args.client_delay,
+            "workers": args.workers,
+            "duration": args.duration,
+            "modes": {},
+        }
+        for mode in args.modes:
+            server, env = MODES[mode]
+            with run_server(server, workers=args.workers, env=env) as port:
+                results["modes"][mode] = asyncio.run(
+                    drive(
+                        port,
+                        tokens,
+                        paths,
+                        args.clients,
+                        args.duration,
+                        args.client_delay,
+                    )
+                )
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Concurrency benchmark of the SQLite DB_URL: parallel registrations and
+cancellations against gunicorn workers sharing one SQLite file, with
+Django's SQLite defaults and with the DB_SQLITE_TUNING profile:
+
+    default  rollback journal, deferred transactions
+    tuned    DB_SQLITE_TUNING=True: WAL, synchronous=NORMAL, mmap, page cache,
+             busy timeout and BEGIN IMMEDIATE
+
+    python -m benchmarks.sqlite_concurrency --clients 50 --duration 20 --workers 4
+
+Every client is a seeded user that registers for a random future event and
+cancels the registration again, while a share of the clients reads the event
+details. Both modes run on a copy of the same seeded database. Per mode the
+throughput, the p50/p95/p99 latency, the status codes and the number of
+server errors, "database is locked" under load, are printed as JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import shutil
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from .common import (
+    get_access_token,
+    http_request,
+    run_server,
+    seed_database,
+    setup_django,
+    summarize,
+)
+
+API = "/api/v1"
+
+MODES = {
+    "default": {"DB_SQLITE_TUNING": "False"},
+    "tuned": {"DB_SQLITE_TUNING": "True"},
+}
+
+
+async def drive(port, tokens, event_ids, clients, duration, read_share, seed):
+    latencies = []
+    statuses = Counter()
+    errors = 0
+
+    async def client(index):
+        nonlocal errors
+        rng = random.Random(seed + index)
+        token = tokens[index]
+        while time.monotonic() < deadline:
+            event_id = rng.choice(event_ids)
+            if rng.random() < read_share:
+                requests = [("GET", f"{API}/event/events/{event_id}/", None)]
+            else:
+                path = f"{API}/event/me/registrations/{event_id}/"
+                requests = [("POST", path, {}), ("DELETE", path, {})]
+            for method, path, data in requests:
+                try:
+                    status, _, _, seconds = await http_request(
+                        port, method, path, token=token, data=data
+                    )
+                except OSError:
+                    errors += 1
+                    continue
+                statuses[f"{method} {status}"] += 1
+                if status >= 500:
+                    errors += 1
+                else:
+                    latencies.append(seconds)
+
+    start = time.monotonic()
+    deadline = start + duration
+    await asyncio.gather(*(client(index) for index in range(clients)))
+    summary = summarize(latencies, errors, time.monotonic() - start)
+    summary["statuses"] = dict(sorted(statuses.items()))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per mode")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--read-share",
+        type=float,
+        default=0.2,
+        help="share of the client iterations that read event details",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        seeded = directory / "benchmark.sqlite3"
+        setup_django(seeded)
+        from django.db import connection
+
+        from event.models import Event
+
+        usernames, _ = seed_database(
+            users=args.users, events=args.events, registrations=0, seed=args.seed
+        )
+        # events without a seat limit, so that no registration is turned down
+        event_ids = list(
+            Event.events.future_events()
+            .filter(number_of_seats=0, is_published=True)
+            .values_list("pk", flat=True)
+        )
+        tokens = [get_access_token(username) for username in usernames]
+        connection.close()
+        clients = min(args.clients, len(usernames))
+
+        results = {
+            "config": {
+                "users": args.users,
+                "events": len(event_ids),
+                "clients": clients,
+                "duration": args.duration,
+                "workers": args.workers,
+                "read_share": args.read_share,
+            },
+            "modes": {},
+        }
+        for mode in args.modes:
+            # WAL mode is a property of the database file, every mode gets a copy
+            path = directory / f"{mode}.sqlite3"
+            shutil.copy(seeded, path)
+            env = {**MODES[mode], "DB_URL": f"sqlite:///{path}"}
+            with run_server("wsgi", workers=args.workers, env=env) as port:
+                results["modes"][mode] = asyncio.run(
+                    drive(
+                        port,
+                        tokens,
+                        event_ids,
+                        clients,
+                        args.duration,
+                        args.read_share,
+                        args.seed,
+                    )
+                )
+
+        default = results["modes"].get("default")
+        tuned = results["modes"].get("tuned")
+        if default and tuned and default["throughput"]:
+            results["throughput_gain"] = round(
+                tuned["throughput"] / default["throughput"], 2
+            )
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
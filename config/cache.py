@@ -0,0 +1,425 @@
+"""
+Cache backend in a memory-mapped file shared by the worker processes of a
+host, with LRU eviction, timeouts and size limits, and no dependencies.
+
+    CACHES = {
+        "default": {
+            "BACKEND": "config.cache.MmapCache",
+            "LOCATION": "/var/tmp/events-api.cache",
+            "OPTIONS": {"MAX_ENTRIES": 1000, "MAX_ENTRY_SIZE": 262144},
+        }
+    }
+
+The file holds a header, a hash index (open addressing with linear probing)
+and MAX_ENTRIES slots of MAX_ENTRY_SIZE bytes, each with the key and the
+pickled value of an entry. The slots are linked into a least recently used
+list, when all slots are taken the least recently used entry is evicted.
+Values that do not fit in a slot are not cached, with a warning. The default
+MAX_ENTRY_SIZE fits the largest event list page, a slot takes memory only
+for the bytes written to it. Operations lock the file
+with flock(), the configuration of the first process that created the file
+wins until the file is recreated because MAX_ENTRIES or MAX_ENTRY_SIZE
+changed.
+"""
+
+import fcntl
+import hashlib
+import logging
+import math
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+MAGIC = b"EVMCACHE"
+# magic, max entries, index buckets, slot size, LRU head, LRU tail, free list
+# head, slots allocated so far, entries; slot numbers are stored plus one,
+# so that a zeroed file is empty
+HEADER = struct.Struct("<8sIIIIIIII")
+HEADER_SIZE = 64
+# key hash, slot number plus one (0: empty bucket)
+BUCKET = struct.Struct("<QI")
+# key hash, expiry time, previous and next slot in the LRU list, key and
+# value length
+SLOT = struct.Struct("<QdIIHI")
+
+# offsets of the header fields and of the slot links
+HEAD, TAIL, FREE, ALLOCATED, COUNT = 20, 24, 28, 32, 36
+PREVIOUS, NEXT = 16, 20
+
+logger = logging.getLogger(__name__)
+
+
+def hash_key(key):
+    # the built-in hash() differs between processes
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+class MmapCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.path = Path(location)
+        self.slot_size = SLOT.size + int(options.get("MAX_ENTRY_SIZE", 262144))
+        # at most three quarters of the buckets are taken, so probes stay short
+        self.buckets = 1 << math.ceil(math.log2(self._max_entries * 4 / 3 + 1))
+        self.mask = self.buckets - 1
+        self.index_offset = HEADER_SIZE
+        self.slots_offset = self.index_offset + self.buckets * BUCKET.size
+        self.size = self.slots_offset + self._max_entries * self.slot_size
+
+        self.lock = threading.Lock()
+        self.pid = None
+        self.fd = None
+        self.map = None
+
+    # file
+
+    def open(self):
+        # a forked worker shares the open file, and with it the flock(), of
+        # its parent, so every process opens the file itself
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        header = HEADER.pack(
+            MAGIC, self._max_entries, self.buckets, self.slot_size, 0, 0, 0, 0, 0
+        )
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if not self.is_current(fd):
+                    continue
+                current = os.pread(fd, HEADER.size, 0)
+                if current[:20] != header[:20]:
+                    if os.fstat(fd).st_size:
+                        # A file of another configuration is replaced, the
+                        # processes that map it keep it until they restart.
+                        self.replace(header)
+                        continue
+                    os.ftruncate(fd, self.size)
+                    os.pwrite(fd, header, 0)
+                self.map = mmap.mmap(fd, self.size)
+                self.fd, fd = fd, None
+                self.pid = os.getpid()
+                return
+            finally:
+                if fd is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                    os.close(fd)
+                else:
+                    fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def is_current(self, fd):
+        # the file may have been replaced while waiting for the lock
+        try:
+            return os.fstat(fd).st_ino == os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return False
+
+    def replace(self, header):
+        temporary = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        fd = os.open(temporary, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.ftruncate(fd, self.size)
+            os.pwrite(fd, header, 0)
+        finally:
+            os.close(fd)
+        os.replace(temporary, self.path)
+
+    @contextmanager
+    def locked(self):
+        # flock() excludes other processes, the lock other threads
+        with self.lock:
+            if self.pid != os.getpid():
+                self.open()
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def get_field(self, field):
+        return struct.unpack_from("<I", self.map, field)[0]
+
+    def set_field(self, field, value):
+        struct.pack_into("<I", self.map, field, value)
+
+    # index
+
+    def get_bucket(self, index):
+        return BUCKET.unpack_from(self.map, self.index_offset + index * BUCKET.size)
+
+    def set_bucket(self, index, key_hash, slot):
+        offset = self.index_offset + index * BUCKET.size
+        BUCKET.pack_into(self.map, offset, key_hash, slot)
+
+    def find(self, key, key_hash):
+        """
+        Return (bucket, slot) of the key, or (empty bucket, None).
+        """
+        index = key_hash & self.mask
+        while True:
+            bucket_hash, slot = self.get_bucket(index)
+            if not slot:
+                return index, None
+            if bucket_hash == key_hash and self.get_key(slot - 1) == key:
+                return index, slot - 1
+            index = (index + 1) & self.mask
+
+    def remove_bucket(self, index):
+        # backward shift deletion, buckets after the removed one move up
+        # unless that would put them before their home bucket
+        empty = index
+        while True:
+            index = (index + 1) & self.mask
+            key_hash, slot = self.get_bucket(index)
+            if not slot:
+                break
+            home = key_hash & self.mask
+            if empty <= index:
+                stays = empty < home <= index
+            else:
+                stays = home > empty or home <= index
+            if not stays:
+                self.set_bucket(empty, key_hash, slot)
+                empty = index
+        self.set_bucket(empty, 0, 0)
+
+    # slots
+
+    def get_slot_offset(self, slot):
+        return self.slots_offset + slot * self.slot_size
+
+    def get_slot(self, slot):
+        return SLOT.unpack_from(self.map, self.get_slot_offset(slot))
+
+    def get_key(self, slot):
+        offset = self.get_slot_offset(slot)
+        key_length = SLOT.unpack_from(self.map, offset)[4]
+        start = offset + SLOT.size
+        return self.map[start : start + key_length]
+
+    def get_value(self, slot):
+        offset = self.get_slot_offset(slot)
+        _, _, _, _, key_length, value_length = SLOT.unpack_from(self.map, offset)
+        start = offset + SLOT.size + key_length
+        return self.map[start : start + value_length]
+
+    def get_expiry(self, slot):
+        return self.get_slot(slot)[1]
+
+    def set_expiry(self, slot, expiry):
+        struct.pack_into("<d", self.map, self.get_slot_offset(slot) + 8, expiry)
+
+    def get_link(self, slot, link):
+        return struct.unpack_from("<I", self.map, self.get_slot_offset(slot) + link)[0]
+
+    def set_link(self, slot, link, value):
+        struct.pack_into("<I", self.map, self.get_slot_offset(slot) + link, value)
+
+    def unlink(self, slot):
+        previous = self.get_link(slot, PREVIOUS)
+        following = self.get_link(slot, NEXT)
+        if previous:
+            self.set_link(previous - 1, NEXT, following)
+        else:
+            self.set_field(HEAD, following)
+        if following:
+            self.set_link(following - 1, PREVIOUS, previous)
+        else:
+            self.set_field(TAIL, previous)
+
+    def push_front(self, slot):
+        head = self.get_field(HEAD)
+        self.set_link(slot, PREVIOUS, 0)
+        self.set_link(slot, NEXT, head)
+        if head:
+            self.set_link(head - 1, PREVIOUS, slot + 1)
+        else:
+            self.set_field(TAIL, slot + 1)
+        self.set_field(HEAD, slot + 1)
+
+    def touch_slot(self, slot):
+        if self.get_field(HEAD) != slot + 1:
+            self.unlink(slot)
+            self.push_front(slot)
+
+    def write_slot(self, slot, key_hash, expiry, key, value):
+        offset = self.get_slot_offset(slot)
+        previous = self.get_link(slot, PREVIOUS)
+        following = self.get_link(slot, NEXT)
+        SLOT.pack_into(
+            self.map,
+            offset,
+            key_hash,
+            expiry,
+            previous,
+            following,
+            len(key),
+            len(value),
+        )
+        start = offset + SLOT.size
+        self.map[start : start + len(key) + len(value)] = key + value
+
+    def delete_slot(self, bucket, slot):
+        self.remove_bucket(bucket)
+        self.unlink(slot)
+        self.set_link(slot, NEXT, self.get_field(FREE))
+        self.set_field(FREE, slot + 1)
+        self.set_field(COUNT, self.get_field(COUNT) - 1)
+
+    def allocate(self):
+        free = self.get_field(FREE)
+        if not free:
+            allocated = self.get_field(ALLOCATED)
+            if allocated < self._max_entries:
+                self.set_field(ALLOCATED, allocated + 1)
+                self.set_field(COUNT, self.get_field(COUNT) + 1)
+                return allocated
+            # evict the least recently used entry
+            tail = self.get_field(TAIL) - 1
+            bucket, _ = self.find(self.get_key(tail), self.get_slot(tail)[0])
+            self.delete_slot(bucket, tail)
+            free = self.get_field(FREE)
+        self.set_field(FREE, self.get_link(free - 1, NEXT))
+        self.set_field(COUNT, self.get_field(COUNT) + 1)
+        return free - 1
+
+    # entries, the file is locked
+
+    def lookup(self, key, key_hash):
+        """
+        Return (bucket, slot) of the key, or (empty bucket, None) when it is
+        missing or expired. Expired entries are deleted.
+        """
+        bucket, slot = self.find(key, key_hash)
+        if slot is not None and self.get_expiry(slot) <= time.time():
+            self.delete_slot(bucket, slot)
+            bucket, slot = self.find(key, key_hash)
+        return bucket, slot
+
+    def store(self, key, key_hash, value, expiry):
+        bucket, slot = self.lookup(key, key_hash)
+        if slot is None:
+            slot = self.allocate()
+            # an eviction may have shifted the buckets
+            bucket, _ = self.find(key, key_hash)
+            self.set_bucket(bucket, key_hash, slot + 1)
+            self.push_front(slot)
+        else:
+            self.touch_slot(slot)
+        self.write_slot(slot, key_hash, expiry, key, value)
+
+    def remove(self, key, key_hash):
+        bucket, slot = self.lookup(key, key_hash)
+        if slot is None:
+            return False
+        self.delete_slot(bucket, slot)
+        return True
+
+    # cache API
+
+    def get_expiry_time(self, timeout):
+        expiry = self.get_backend_timeout(timeout)
+        return math.inf if expiry is None else expiry
+
+    def encode(self, key, version):
+        key = self.make_and_validate_key(key, version=version).encode()
+        return key, hash_key(key)
+
+    def pickle(self, key, value):
+        """
+        Return the pickled value, or None if the entry does not fit in a slot.
+        """
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if SLOT.size + len(key) + len(data) > self.slot_size:
+            logger.warning(
+                "%s is not cached, its %d bytes exceed MAX_ENTRY_SIZE %d",
+                key.decode(),
+                len(key) + len(data),
+                self.slot_size - SLOT.size,
+            )
+            return None
+        return data
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key, key_hash = self.encode(key, version)
+        data = self.pickle(key, value)
+        with self.locked():
+            if self.lookup(key, key_hash)[1] is not None:
+                return False
+            if data is None:
+                return False
+            self.store(key, key_hash, data, self.get_expiry_time(timeout))
+            return True
+
+    def get(self, key, default=None, version=None):
+        key, key_hash = self.encode(key, version)
+        with self.locked():
+            _, slot = self.lookup(key, key_hash)
+            if slot is None:
+                return default
+            self.touch_slot(slot)
+            data = self.get_value(slot)
+        return pickle.loads(data)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key, key_hash = self.encode(key, version)
+        data = self.pickle(key, value)
+        with self.locked():
+            if data is None:
+                # the previous value must not outlive the new one
+                self.remove(key, key_hash)
+            else:
+                self.store(key, key_hash, data, self.get_expiry_time(timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key, key_hash = self.encode(key, version)
+        with self.locked():
+            _, slot = self.lookup(key, key_hash)
+            if slot is None:
+                return False
+            self.set_expiry(slot, self.get_expiry_time(timeout))
+            return True
+
+    def delete(self, key, version=None):
+        key, key_hash = self.encode(key, version)
+        with self.locked():
+            return self.remove(key, key_hash)
+
+    def has_key(self, key, version=None):
+        key, key_hash = self.encode(key, version)
+        with self.locked():
+            return self.lookup(key, key_hash)[1] is not None
+
+    def incr(self, key, delta=1, version=None):
+        # get and set under one lock, so that concurrent increments add up
+        key, key_hash = self.encode(key, version)
+        with self.locked():
+            _, slot = self.lookup(key, key_hash)
+            if slot is None:
+                raise ValueError("Key '%s' not found" % key.decode())
+            value = pickle.loads(self.get_value(slot)) + delta
+            data = self.pickle(key, value)
+            if data is None:
+                self.remove(key, key_hash)
+            else:
+                self.store(key, key_hash, data, self.get_expiry(slot))
+        return value
+
+    def clear(self):
+        with self.locked():
+            self.map[self.index_offset : self.slots_offset] = bytes(
+                self.slots_offset - self.index_offset
+            )
+            for field in (HEAD, TAIL, FREE, ALLOCATED, COUNT):
+                self.set_field(field, 0)
+
+    def close(self, **kwargs):
+        # the file stays open and mapped for the lifetime of the process
+        pass
@@ -0,0 +1,129 @@
+"""
+Read replicas: the GET requests of read-only views (ReplicaReadMixin) read
+from a replica in DATABASE_REPLICAS, all other queries use the primary
+database ("default").
+
+A replica lags behind the primary, so after a user changed data their reads
+stay on the primary for DB_REPLICA_LAG seconds (ReplicaMiddleware), and the
+event list for as long after any change of an event or registration. The
+pins are kept in the cache, which the worker processes of a host share.
+"""
+
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+
+# The replica that the request handled in the current context reads from,
+# the context is copied into the threads that run the async ORM queries.
+replica = ContextVar("replica", default=None)
+
+PIN_KEY_PREFIX = "replicas:primary:"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def pin_to_primary(key):
+    """
+    Keep the reads of the key (e.g. "user:1") on the primary until the
+    replicas caught up with a change.
+    """
+    if settings.DATABASE_REPLICAS and settings.DB_REPLICA_LAG > 0:
+        cache.set(f"{PIN_KEY_PREFIX}{key}", True, settings.DB_REPLICA_LAG)
+
+
+def is_pinned_to_primary(key):
+    return cache.get(f"{PIN_KEY_PREFIX}{key}") is not None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return replica.get()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas receive the schema from the primary
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaReadMixin:
+    """
+    Reads the GET requests of a DRF view from a replica, unless the user
+    changed data within DB_REPLICA_LAG seconds.
+    """
+
+    replica_pin_keys = ()
+
+    def use_replica(self, request):
+        return request.method == "GET"
+
+    def get_replica_pin_keys(self, request):
+        return [f"user:{request.user.id}", *self.replica_pin_keys]
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # after authentication, which reads the user from the primary
+        if not settings.DATABASE_REPLICAS or not self.use_replica(request):
+            return
+        keys = self.get_replica_pin_keys(request)
+        if any(is_pinned_to_primary(key) for key in keys):
+            return
+        # one replica for all queries of the request, replicas lag differently;
+        # the async views run initial() in a thread, whose context is copied
+        # back, a token of it could not be reset in the event loop
+        self.replica_previous = replica.get()
+        replica.set(random.choice(settings.DATABASE_REPLICAS))
+        self.replica_set = True
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if getattr(self, "replica_set", False):
+            replica.set(self.replica_previous)
+            self.replica_set = False
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaMiddleware:
+    """
+    Pins the reads of a user to the primary after a successful request that
+    changed data. Without DATABASE_REPLICAS Django drops the middleware at
+    startup.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self.process_response(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        # the pins are written to the cache, which may block
+        await sync_to_async(self.process_response)(request, response)
+        return response
+
+    def process_response(self, request, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return
+        # DRF sets the user it authenticated on the Django request
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(f"user:{user.id}")
@@ -1,6 +1,7 @@
 import os
 from datetime import timedelta
 from pathlib import Path
+from urllib.parse import urlparse
 
 import dj_database_url
 import environ
@@ -12,16 +13,61 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Environment file location
 ENV_FILE = BASE_DIR / ".env"
 
+
+class Env(environ.Env):
+    # mmapcache:///path/to/file?max_entries=1000&max_entry_size=262144
+    CACHE_SCHEMES = {
+        **environ.Env.CACHE_SCHEMES,
+        "mmapcache": "config.cache.MmapCache",
+    }
+
+    @classmethod
+    def cache_url_config(cls, url, backend=None):
+        config = super().cache_url_config(url, backend)
+        url = urlparse(url) if isinstance(url, str) else url
+        if url.scheme == "mmapcache":
+            # a file path, like the location of filecache
+            config["LOCATION"] = url.netloc + url.path
+        return config
+
+
 # Default Parameters
-env = environ.Env(
+env = Env(
     DEBUG=(bool, False),
     SECRET_KEY=(str, "django-secret-key"),
     JWT_SECRET_KEY=(str, "jwt-secret-key"),
     ALLOWED_HOSTS=(str, "*"),
     ENABLE_HTTPS=(bool, False),
     DB_URL=(str, f"sqlite:////{os.path.join(BASE_DIR, 'events.sqlite3')}"),
+    DB_CONN_MAX_AGE=(int, 0),
+    DB_CONN_HEALTH_CHECKS=(bool, False),
+    DB_POOLER=(bool, False),
+    DB_SQLITE_TUNING=(bool, False),
+    DB_SQLITE_BUSY_TIMEOUT=(float, 5.0),
+    DB_SQLITE_MMAP_MB=(int, 256),
+    DB_SQLITE_CACHE_MB=(int, 64),
+    DB_REPLICA_URLS=(list, []),
+    DB_REPLICA_LAG=(float, 5.0),
     LOG_DEFAULT=(str, "/dev/stdout"),
     LOG_AUTH=(str, "/dev/stdout"),
+    LOG_SLOW_QUERIES=(str, "/dev/stdout"),
+    ASYNC_VIEWS=(bool, False),
+    CACHE_URL=(str, f"mmapcache://{os.path.join(BASE_DIR, 'cache.mmap')}"),
+    EVENT_LIST_CACHE_TIMEOUT=(int, 60),
+    LIMIT_ATTEMPTS_RATE=(str, "10/hour"),
+    THROTTLE_DB=(str, os.path.join(BASE_DIR, "throttle.sqlite3")),
+    USER_STATE_DB=(str, os.path.join(BASE_DIR, "user_state.sqlite3")),
+    SEAT_STREAM_POLL_INTERVAL=(float, 1.0),
+    SEAT_STREAM_KEEPALIVE=(int, 15),
+    SEAT_STREAM_MAX_AGE=(int, 300),
+    PERFORMANCE_MIDDLEWARE=(bool, False),
+    METRICS_ENABLED=(bool, False),
+    METRICS_TOKEN=(str, ""),
+    METRICS_DIR=(str, ""),
+    METRICS_FLUSH_INTERVAL=(float, 5.0),
+    SLOW_QUERY_THRESHOLD=(float, 0),
+    SLOW_QUERY_SAMPLE_RATE=(float, 1.0),
+    SLOW_QUERY_EXPLAIN_THRESHOLD=(float, 0),
 )
 
 # Take environment variables from .env file
@@ -45,6 +91,7 @@ INSTALLED_APPS = [
     "auth.apps.AuthConfig",
     "user.apps.UserConfig",
     "event.apps.EventConfig",
+    "monitoring.apps.MonitoringConfig",
     # Django Built-ins
     "django.contrib.admin",
     "django.contrib.auth",
@@ -60,6 +107,7 @@ if DEBUG:
     INSTALLED_APPS += ["debug_toolbar", "drf_spectacular", "drf_spectacular_sidecar"]
 
 MIDDLEWARE = [
+    "monitoring.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -67,6 +115,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "config.replicas.ReplicaMiddleware",
 ]
 
 if DEBUG:
@@ -103,6 +152,10 @@ LOGGING = {
             "format": "{asctime}: {levelname}: {message}",
             "style": "{",
         },
+        "message": {
+            "format": "{message}",
+            "style": "{",
+        },
     },
     "handlers": {
         "console": {
@@ -126,6 +179,14 @@ LOGGING = {
             "when": "midnight",
             "backupCount": 15,
         },
+        "slowquerylog": {
+            "level": "DEBUG",
+            "class": "logging.handlers.TimedRotatingFileHandler",
+            "formatter": "message",
+            "filename": env("LOG_SLOW_QUERIES"),
+            "when": "midnight",
+            "backupCount": 15,
+        },
     },
     "loggers": {
         "": {
@@ -140,6 +201,12 @@ LOGGING = {
             "propagate": False,
             "description": "Captures log records from user app",
         },
+        "monitoring.slow_queries": {
+            "handlers": ["slowquerylog"],
+            "level": "INFO",
+            "propagate": False,
+            "description": "Slow queries as JSON lines, read by manage.py slow_queries",
+        },
     },
 }
 
@@ -165,8 +232,58 @@ AUTH_USER_MODEL = "user.User"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 DB_URL = env("DB_URL")
-DEFAULT_DB = dj_database_url.config(default=DB_URL)
+# Seconds a connection is kept for the following requests of its thread
+# (0: closed after every request, -1: unlimited). With health checks a kept
+# connection is tested before the first query of a request, so that a
+# connection closed by the database server is replaced instead of failing it.
+DB_CONN_MAX_AGE = env("DB_CONN_MAX_AGE")
+DB_CONN_HEALTH_CHECKS = env("DB_CONN_HEALTH_CHECKS")
+# DB_URL points to a connection pooler in transaction mode (e.g. PgBouncer),
+# under which a cursor can not outlive its transaction
+DB_POOLER = env("DB_POOLER")
+
+# Read replicas of the primary database, comma separated, which the GET
+# requests of the read-only views read from (see config/replicas.py). After a
+# change the reads of the user stay on the primary for DB_REPLICA_LAG seconds.
+DB_REPLICA_URLS = env("DB_REPLICA_URLS")
+DB_REPLICA_LAG = env("DB_REPLICA_LAG")
+
+# SQLite profile for the workers of a host sharing a SQLite DB_URL (see
+# config/sqlite/base.py): WAL journal, so that reads do not block the writer,
+# synchronous=NORMAL, memory mapped reads, a larger page cache and a busy
+# timeout (seconds) within which a writer waits for the lock.
+DB_SQLITE_TUNING = env("DB_SQLITE_TUNING")
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(env("DB_SQLITE_BUSY_TIMEOUT") * 1000),
+    "mmap_size": env("DB_SQLITE_MMAP_MB") * 1024 * 1024,
+    # negative: in KiB instead of pages
+    "cache_size": -env("DB_SQLITE_CACHE_MB") * 1024,
+}
+
+DB_OPTIONS = {
+    "conn_max_age": None if DB_CONN_MAX_AGE < 0 else DB_CONN_MAX_AGE,
+    "conn_health_checks": DB_CONN_HEALTH_CHECKS,
+}
+DEFAULT_DB = dj_database_url.config(default=DB_URL, **DB_OPTIONS)
 DATABASES = {"default": DEFAULT_DB}
+DATABASE_REPLICAS = []
+for number, url in enumerate(DB_REPLICA_URLS, 1):
+    alias = f"replica_{number}"
+    DATABASES[alias] = dj_database_url.parse(url, **DB_OPTIONS)
+    # tests read the replicas from the test database
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+if DB_POOLER:
+    for database in DATABASES.values():
+        database["DISABLE_SERVER_SIDE_CURSORS"] = True
+if DB_SQLITE_TUNING:
+    for database in DATABASES.values():
+        if database["ENGINE"] == "django.db.backends.sqlite3":
+            database["ENGINE"] = "config.sqlite"
+            database["PRAGMAS"] = SQLITE_PRAGMAS
+DATABASE_ROUTERS = ["config.replicas.ReplicaRouter"]
 
 
 # Password validation
@@ -222,13 +339,60 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.ScopedRateThrottle",
+        "auth.throttling.SharedScopedRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
-        "limit_attempts": "10/hour",
+        "limit_attempts": env("LIMIT_ATTEMPTS_RATE"),
     },
 }
 
+# SQLite database in which the worker processes count the throttled requests
+THROTTLE_DB = env("THROTTLE_DB")
+
+# SQLite database in which the worker processes record users deactivated or
+# with changed permissions, for the tokens issued before the change
+USER_STATE_DB = env("USER_STATE_DB")
+
+# Serve the read-only event views as coroutines, for the ASGI application
+ASYNC_VIEWS = env("ASYNC_VIEWS")
+
+# Cache shared by the worker processes of the host, a file mapped into memory
+# by default (see config/cache.py), or any cache URL of django-environ
+CACHES = {"default": env.cache_url("CACHE_URL")}
+
+# Cached event list pages are dropped on any Event or EventRegistration change,
+# the timeout bounds how long the time based filters (t=today/past/future) lag
+EVENT_LIST_CACHE_TIMEOUT = env("EVENT_LIST_CACHE_TIMEOUT")
+
+# Seat availability stream: how often the change log is polled, the interval
+# of keepalive comments and the lifetime of a stream before clients reconnect
+SEAT_STREAM_POLL_INTERVAL = env("SEAT_STREAM_POLL_INTERVAL")
+SEAT_STREAM_KEEPALIVE = env("SEAT_STREAM_KEEPALIVE")
+SEAT_STREAM_MAX_AGE = env("SEAT_STREAM_MAX_AGE")
+
+# Report the view, wall time, database time, query count and response size of
+# every request in a Server-Timing header and a log line
+PERFORMANCE_MIDDLEWARE = env("PERFORMANCE_MIDDLEWARE")
+
+# Serve /metrics and record request metrics. Scrapers authenticate with the
+# bearer token METRICS_TOKEN, without one /metrics is not served. Worker
+# processes that share METRICS_DIR write their metrics there every
+# METRICS_FLUSH_INTERVAL seconds, to be added up by the one that serves the
+# scrape
+METRICS_ENABLED = env("METRICS_ENABLED")
+METRICS_TOKEN = env("METRICS_TOKEN")
+METRICS_DIR = env("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = env("METRICS_FLUSH_INTERVAL")
+
+# Log queries slower than SLOW_QUERY_THRESHOLD milliseconds (0: off) to
+# LOG_SLOW_QUERIES, a SLOW_QUERY_SAMPLE_RATE share of them. Queries slower than
+# SLOW_QUERY_EXPLAIN_THRESHOLD milliseconds (0: off) are logged with their
+# query plan, once per query and process
+LOG_SLOW_QUERIES = env("LOG_SLOW_QUERIES")
+SLOW_QUERY_THRESHOLD = env("SLOW_QUERY_THRESHOLD")
+SLOW_QUERY_SAMPLE_RATE = env("SLOW_QUERY_SAMPLE_RATE")
+SLOW_QUERY_EXPLAIN_THRESHOLD = env("SLOW_QUERY_EXPLAIN_THRESHOLD")
+
 if DEBUG:
     REST_FRAMEWORK["DEFAULT_SCHEMA_CLASS"] = "drf_spectacular.openapi.AutoSchema"
 
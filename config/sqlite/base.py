@@ -0,0 +1,24 @@
+"""
+SQLite backend of the DB_SQLITE_TUNING profile: the PRAGMAS of the database
+settings are set on every new connection, and transactions take the write
+lock when they begin.
+
+With Django's deferred BEGIN a transaction that reads before it writes (e.g.
+the collecting queries of a delete) has to upgrade its lock, which in WAL
+mode fails at once with "database is locked" when another worker committed
+in the meantime, the busy timeout does not apply. BEGIN IMMEDIATE waits for
+the lock up to the busy timeout instead (Django 5.1 "transaction_mode").
+"""
+
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict.get("PRAGMAS", {}).items():
+            connection.execute(f"PRAGMA {name} = {value}")
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE")
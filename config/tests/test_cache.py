@@ -0,0 +1,160 @@
+import multiprocessing
+import random
+import time
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache, caches
+from rest_framework.throttling import AnonRateThrottle
+
+from ..cache import MmapCache
+from ..settings import Env
+
+
+class MinuteThrottle(AnonRateThrottle):
+    rate = "2/min"
+
+
+def get_cache(path, **options):
+    return MmapCache(str(path), {"OPTIONS": options})
+
+
+def increment(path, key, times):
+    shared = get_cache(path)
+    for _ in range(times):
+        shared.incr(key)
+
+
+class TestMmapCache:
+    @pytest.fixture
+    def mmap_cache(self, tmp_path):
+        return get_cache(tmp_path / "cache.mmap", MAX_ENTRIES=4, MAX_ENTRY_SIZE=256)
+
+    def test_set_get_delete(self, mmap_cache):
+        assert mmap_cache.get("a") is None
+        assert mmap_cache.get("a", 0) == 0
+        mmap_cache.set("a", {"b": [1, 2]})
+        assert mmap_cache.get("a") == {"b": [1, 2]}
+        mmap_cache.set("a", "c")
+        assert mmap_cache.get("a") == "c"
+        assert mmap_cache.has_key("a")
+        assert mmap_cache.delete("a") is True
+        assert mmap_cache.delete("a") is False
+        assert not mmap_cache.has_key("a")
+
+    def test_add_and_incr(self, mmap_cache):
+        assert mmap_cache.add("a", 1) is True
+        assert mmap_cache.add("a", 2) is False
+        assert mmap_cache.incr("a") == 2
+        assert mmap_cache.decr("a", 5) == -3
+        assert mmap_cache.get("a") == -3
+        with pytest.raises(ValueError):
+            mmap_cache.incr("b")
+
+    def test_timeouts(self, mmap_cache, monkeypatch):
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now)
+        mmap_cache.set("a", 1, timeout=10)
+        mmap_cache.set("b", 1, timeout=None)
+        mmap_cache.set("c", 1, timeout=10)
+        assert mmap_cache.touch("c", timeout=30) is True
+        monkeypatch.setattr(time, "time", lambda: now + 20)
+        assert mmap_cache.get("a") is None
+        assert mmap_cache.add("a", 2) is True
+        assert mmap_cache.get("b") == 1
+        assert mmap_cache.get("c") == 1
+        assert mmap_cache.touch("d") is False
+
+    def test_least_recently_used_entry_is_evicted(self, mmap_cache):
+        for key in "abcd":
+            mmap_cache.set(key, key)
+        mmap_cache.get("a")
+        mmap_cache.set("e", "e")
+        assert mmap_cache.get("b") is None
+        assert [mmap_cache.get(key) for key in "acde"] == list("acde")
+
+    def test_entries_larger_than_a_slot_are_not_cached(self, mmap_cache, caplog):
+        mmap_cache.set("a", "small")
+        mmap_cache.set("a", "x" * 256)
+        assert mmap_cache.get("a") is None
+        assert mmap_cache.add("b", "x" * 256) is False
+        assert "exceed MAX_ENTRY_SIZE 256" in caplog.text
+
+        mmap_cache.set("c", 2**1500)
+        assert mmap_cache.incr("c", 2**3000) == 2**1500 + 2**3000
+        assert mmap_cache.get("c") is None
+
+    def test_clear(self, mmap_cache):
+        for key in "abcd":
+            mmap_cache.set(key, key)
+        mmap_cache.clear()
+        assert mmap_cache.get("a") is None
+        for key in "efgh":
+            mmap_cache.set(key, key)
+        assert [mmap_cache.get(key) for key in "efgh"] == list("efgh")
+
+    def test_random_operations_match_a_dict(self, tmp_path):
+        # many keys in few buckets exercise collisions and deletions
+        mmap_cache = get_cache(tmp_path / "cache.mmap", MAX_ENTRIES=100)
+        rng = random.Random(0)
+        expected = {}
+        for _ in range(5000):
+            key = f"key-{rng.randrange(80)}"
+            if rng.random() < 0.3:
+                mmap_cache.delete(key)
+                expected.pop(key, None)
+            else:
+                value = rng.random()
+                mmap_cache.set(key, value)
+                expected[key] = value
+        assert {key: mmap_cache.get(key) for key in expected} == expected
+
+    def test_instances_share_the_file(self, tmp_path):
+        path = tmp_path / "cache.mmap"
+        get_cache(path).set("a", 1)
+        assert get_cache(path).get("a") == 1
+
+    def test_file_of_another_configuration_is_replaced(self, tmp_path):
+        path = tmp_path / "cache.mmap"
+        get_cache(path, MAX_ENTRIES=10).set("a", 1)
+        other = get_cache(path, MAX_ENTRIES=20)
+        assert other.get("a") is None
+        other.set("a", 2)
+        assert get_cache(path, MAX_ENTRIES=20).get("a") == 2
+
+    def test_processes_share_the_entries(self, tmp_path):
+        path = tmp_path / "cache.mmap"
+        shared = get_cache(path)
+        shared.set("count", 0)
+        context = multiprocessing.get_context("fork")
+        with context.Pool(4) as pool:
+            pool.starmap(increment, [(path, "count", 100)] * 4)
+        assert shared.get("count") == 400
+
+
+class TestCacheSettings:
+    def test_cache_url(self):
+        config = Env.cache_url_config(
+            "mmapcache:///var/tmp/api.cache?max_entries=5000&max_entry_size=65536"
+            "&timeout=30"
+        )
+        assert config == {
+            "BACKEND": "config.cache.MmapCache",
+            "LOCATION": "/var/tmp/api.cache",
+            "TIMEOUT": 30,
+            "OPTIONS": {"MAX_ENTRIES": 5000, "MAX_ENTRY_SIZE": 65536},
+        }
+
+    def test_default_cache(self, settings):
+        assert isinstance(caches["default"], MmapCache)
+        cache.set("a", 1)
+        assert get_cache(settings.CACHES["default"]["LOCATION"]).get("a") == 1
+
+    def test_throttle_history_is_cached(self, rf):
+        throttle = MinuteThrottle()
+        request = rf.get("/")
+        request.user = AnonymousUser()
+        assert throttle.allow_request(request, None)
+        assert throttle.allow_request(request, None)
+        assert not throttle.allow_request(request, None)
+        assert len(cache.get(throttle.get_cache_key(request, None))) == 2
@@ -0,0 +1,147 @@
+import json
+import sqlite3
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connections
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+
+from auth.tokens import UserStateRefreshToken
+from event.models import Event
+from event.views import AsyncUserEventsView
+
+from ..replicas import ReplicaRouter, is_pinned_to_primary
+
+EVENT_LIST_URL = reverse("event_list_create_view")
+USER_EVENTS_URL = reverse("user_events_view")
+USER_REGISTRATIONS_URL = reverse("user_registrations_view")
+
+
+@pytest.fixture
+def replicate(transactional_db, settings, tmp_path):
+    """
+    Add a replica in a second SQLite file, replicate() copies the test
+    database into it. The copy waits for open transactions, so the tests
+    commit their writes.
+    """
+    path = tmp_path / "replica.sqlite3"
+    databases = {
+        "default": connections.settings["default"],
+        "replica": {"ENGINE": "django.db.backends.sqlite3", "NAME": str(path)},
+    }
+    connections.settings["replica"] = connections.configure_settings(databases)[
+        "replica"
+    ]
+    settings.DATABASE_REPLICAS = ["replica"]
+
+    def replicate():
+        primary = connections["default"]
+        primary.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
+
+    yield replicate
+    connections["replica"].close()
+    del connections["replica"]
+    del connections.settings["replica"]
+
+
+def get_names(response):
+    assert response.status_code == 200
+    return {event["name"] for event in response.json()["results"]}
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReplicaRouting:
+    def test_reads_come_from_the_replica(
+        self, replicate, create_event, user_api_client
+    ):
+        replicated = create_event(is_published=True, name="Replicated")
+        replicate()
+        created = create_event(is_published=True, name="Not replicated")
+        # the replicas catch up with the change
+        cache.clear()
+
+        assert get_names(user_api_client.get(EVENT_LIST_URL)) == {"Replicated"}
+        assert get_names(user_api_client.get(USER_EVENTS_URL)) == {"Replicated"}
+        url = reverse("event_retrieve_update_destroy_view", kwargs={"pk": created.pk})
+        assert user_api_client.get(url).status_code == 404
+        url = reverse(
+            "event_retrieve_update_destroy_view", kwargs={"pk": replicated.pk}
+        )
+        assert user_api_client.get(url).status_code == 200
+
+    def test_event_list_stays_on_the_primary_after_a_change(
+        self, replicate, create_event, user_api_client
+    ):
+        replicate()
+        create_event(is_published=True, name="Not replicated")
+        assert is_pinned_to_primary("event:list")
+        assert get_names(user_api_client.get(EVENT_LIST_URL)) == {"Not replicated"}
+
+    def test_user_reads_own_writes(
+        self, replicate, create_event, user_api_client, another_test_db_user
+    ):
+        event = create_event(is_published=True, name="Event")
+        replicate()
+        cache.clear()
+        url = reverse("user_event_registration_view", kwargs={"event_id": event.pk})
+        assert user_api_client.post(url).status_code == 201
+
+        # the registration was written to the primary only
+        response = user_api_client.get(USER_REGISTRATIONS_URL)
+        assert get_names(response) == {"Event"}
+        cache.clear()
+        assert get_names(user_api_client.get(USER_REGISTRATIONS_URL)) == set()
+
+    def test_async_views_read_from_the_replica(
+        self, replicate, create_event, test_db_user
+    ):
+        create_event(is_published=True, name="Replicated")
+        replicate()
+        create_event(is_published=True, name="Not replicated")
+        cache.clear()
+
+        token = UserStateRefreshToken.for_user(test_db_user).access_token
+        request = AsyncRequestFactory().get(
+            USER_EVENTS_URL, headers={"authorization": f"Bearer {token}"}
+        )
+        # the URLconf picks the sync or async views at import
+        response = async_to_sync(AsyncUserEventsView.as_view())(request)
+        assert response.status_code == 200
+        names = {event["name"] for event in json.loads(response.content)["results"]}
+        assert names == {"Replicated"}
+
+    def test_user_list_comes_from_the_replica(
+        self, replicate, admin_api_client, django_user_model
+    ):
+        replicate()
+        user = django_user_model.objects.create_user("new_user", "new@example.com")
+
+        response = admin_api_client.get(reverse("user_list_create_view"))
+        assert response.status_code == 200
+        assert "new_user" not in {item["username"] for item in response.json()}
+        url = reverse("user_retrieve_update_delete_view", kwargs={"pk": user.pk})
+        assert admin_api_client.get(url).status_code == 200
+
+    def test_reads_come_from_the_primary_without_replicas(
+        self, create_event, user_api_client
+    ):
+        create_event(is_published=True, name="Event")
+        assert get_names(user_api_client.get(USER_EVENTS_URL)) == {"Event"}
+        assert not is_pinned_to_primary("event:list")
+
+
+class TestReplicaRouter:
+    def test_writes_and_migrations_use_the_primary(self, settings):
+        settings.DATABASE_REPLICAS = ["replica_1"]
+        router = ReplicaRouter()
+        assert router.db_for_write(Event) == "default"
+        assert router.db_for_read(Event) is None
+        assert router.allow_migrate("default", "event") is True
+        assert router.allow_migrate("replica_1", "event") is False
@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+
+def get_database_settings(**env):
+    # the settings are read from the environment once, at import
+    code = (
+        "import json; from config import settings; "
+        "print(json.dumps(settings.DATABASES['default']))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, **env},
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+class TestDatabaseSettings:
+    def test_connection_per_request_by_default(self):
+        database = get_database_settings()
+        assert database["CONN_MAX_AGE"] == 0
+        assert database["CONN_HEALTH_CHECKS"] is False
+        assert "DISABLE_SERVER_SIDE_CURSORS" not in database
+
+    def test_persistent_connections(self):
+        database = get_database_settings(
+            DB_CONN_MAX_AGE="600", DB_CONN_HEALTH_CHECKS="True"
+        )
+        assert database["CONN_MAX_AGE"] == 600
+        assert database["CONN_HEALTH_CHECKS"] is True
+        assert get_database_settings(DB_CONN_MAX_AGE="-1")["CONN_MAX_AGE"] is None
+
+    def test_pooler(self):
+        database = get_database_settings(DB_POOLER="True")
+        assert database["DISABLE_SERVER_SIDE_CURSORS"] is True
+
+    def test_replicas(self, tmp_path):
+        code = (
+            "import json; from config import settings; "
+            "print(json.dumps([settings.DATABASES, settings.DATABASE_REPLICAS]))"
+        )
+        urls = ",".join(
+            f"sqlite:///{tmp_path}/replica_{number}.sqlite3" for number in (1, 2)
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, "DB_REPLICA_URLS": urls, "DB_POOLER": "True"},
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        databases, replicas = json.loads(output)
+        assert replicas == ["replica_1", "replica_2"]
+        assert databases["replica_2"]["NAME"] == f"{tmp_path}/replica_2.sqlite3"
+        assert databases["replica_1"]["TEST"] == {"MIRROR": "default"}
+        assert databases["replica_1"]["DISABLE_SERVER_SIDE_CURSORS"] is True
+
+    def test_sqlite_tuning(self):
+        database = get_database_settings(DB_SQLITE_TUNING="True")
+        assert database["ENGINE"] == "config.sqlite"
+        assert database["PRAGMAS"]["journal_mode"] == "WAL"
+        assert database["PRAGMAS"]["busy_timeout"] == 5000
+        assert "PRAGMAS" not in get_database_settings()
+
+    def test_sqlite_tuning_keeps_other_databases(self):
+        database = get_database_settings(
+            DB_SQLITE_TUNING="True", DB_URL="postgres://user@localhost/events"
+        )
+        assert database["ENGINE"] == "django.db.backends.postgresql"
+        assert "PRAGMAS" not in database
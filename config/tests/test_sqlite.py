@@ -0,0 +1,68 @@
+import sqlite3
+
+import pytest
+from django.db import OperationalError, connections, transaction
+
+
+@pytest.fixture
+def tuned_db(db, settings, tmp_path):
+    """
+    Add the "tuned" database, a SQLite file with the DB_SQLITE_TUNING
+    profile. Yield its path.
+    """
+    path = tmp_path / "tuned.sqlite3"
+    databases = {
+        "default": connections.settings["default"],
+        "tuned": {
+            "ENGINE": "config.sqlite",
+            "NAME": str(path),
+            "PRAGMAS": {**settings.SQLITE_PRAGMAS, "busy_timeout": 100},
+        },
+    }
+    connections.settings["tuned"] = connections.configure_settings(databases)["tuned"]
+    with connections["tuned"].cursor() as cursor:
+        cursor.execute("CREATE TABLE item (name TEXT)")
+
+    yield path
+    connections["tuned"].close()
+    del connections["tuned"]
+    del connections.settings["tuned"]
+
+
+def get_pragma(name):
+    with connections["tuned"].cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+class TestSQLiteTuning:
+    def test_pragmas_are_set_on_new_connections(self, tuned_db):
+        assert get_pragma("journal_mode") == "wal"
+        # NORMAL
+        assert get_pragma("synchronous") == 1
+        assert get_pragma("busy_timeout") == 100
+        assert get_pragma("cache_size") == -64 * 1024
+        assert get_pragma("mmap_size") == 256 * 1024 * 1024
+        # the pragmas of Django's SQLite backend are kept
+        assert get_pragma("foreign_keys") == 1
+
+    def test_transactions_take_the_write_lock(self, tuned_db):
+        other = sqlite3.connect(tuned_db, timeout=0)
+        try:
+            with transaction.atomic(using="tuned"):
+                # before the transaction wrote anything
+                with pytest.raises(sqlite3.OperationalError, match="locked"):
+                    other.execute("INSERT INTO item VALUES ('other')")
+        finally:
+            other.close()
+
+    def test_transactions_wait_for_the_busy_timeout(self, tuned_db):
+        other = sqlite3.connect(tuned_db, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        try:
+            with pytest.raises(OperationalError, match="locked"):
+                with transaction.atomic(using="tuned"):
+                    pass
+        finally:
+            other.rollback()
+            other.close()
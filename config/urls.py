@@ -12,6 +12,8 @@ urlpatterns = [
     path("api/v1/user/", include("user.urls")),
     # Events
     path("api/v1/event/", include("event.urls")),
+    # Monitoring
+    path("", include("monitoring.urls")),
 ]
 
 if settings.DEBUG:
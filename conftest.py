@@ -1,11 +1,67 @@
+from datetime import timedelta
+
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APIClient
-from rest_framework_simplejwt.tokens import RefreshToken
+
+from auth.tokens import UserStateRefreshToken
+from event.models import Event
 
 User = get_user_model()
 
 
+@pytest.fixture
+def row_counts():
+    # Every request is measured against few and against many rows, an N+1
+    # shows up as a count that grows with the rows.
+    return (2, 25)
+
+
+@pytest.fixture
+def assert_bounded():
+    def assert_bounded(counts, bound):
+        """
+        Assert that query counts measured against row_counts do not grow with
+        the rows and stay within the bound.
+        """
+        assert counts[0] == counts[-1], f"queries grow with the rows: {counts}"
+        assert counts[-1] <= bound, f"{counts[-1]} queries, the bound is {bound}"
+
+    return assert_bounded
+
+
+@pytest.fixture(autouse=True)
+def cache_file(settings, tmp_path_factory):
+    # a cache file per test, when the cache is an MmapCache
+    settings.CACHES = {
+        "default": {
+            **settings.CACHES["default"],
+            "LOCATION": str(tmp_path_factory.mktemp("cache") / "cache.mmap"),
+        }
+    }
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(cache_file):
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def throttle_db(settings, tmp_path):
+    settings.THROTTLE_DB = str(tmp_path / "throttle.sqlite3")
+
+
+@pytest.fixture(autouse=True)
+def user_state_db(settings, tmp_path):
+    settings.USER_STATE_DB = str(tmp_path / "user_state.sqlite3")
+
+
 @pytest.fixture(scope="function")
 def api_client() -> APIClient:
     yield APIClient()
@@ -35,7 +91,7 @@ def test_db_user(django_user_model, test_user_data) -> User:
 @pytest.fixture
 def user_api_client(api_client, test_db_user):
     client = api_client
-    refresh = RefreshToken.for_user(test_db_user)
+    refresh = UserStateRefreshToken.for_user(test_db_user)
     client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
     return client
 
@@ -89,6 +145,64 @@ def db_admin_user(db, django_user_model, admin_user_data):
 @pytest.fixture
 def admin_api_client(api_client, db_admin_user):
     client = api_client
-    refresh = RefreshToken.for_user(db_admin_user)
+    refresh = UserStateRefreshToken.for_user(db_admin_user)
     client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
     return client
+
+
+@pytest.fixture
+def count_queries(db):
+    """
+    Return the number of SQL queries run by a call of func.
+    """
+
+    def count(func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            func(*args, **kwargs)
+        return len(context)
+
+    return count
+
+
+@pytest.fixture
+def create_users(db, django_user_model):
+    """
+    Bulk create users with unique usernames and emails.
+    """
+    created = 0
+
+    def create(count):
+        nonlocal created
+        users = django_user_model.objects.bulk_create(
+            django_user_model(username=f"user_{i}", email=f"user_{i}@test.com")
+            for i in range(created, created + count)
+        )
+        created += count
+        return users
+
+    return create
+
+
+@pytest.fixture
+def create_event(test_db_user):
+    """
+    Create future events of the test user, named "Event <n>" unless a name
+    is given.
+    """
+    created = 0
+
+    def create(registrants=(), **fields):
+        nonlocal created
+        created += 1
+        start = timezone.now() + timedelta(days=1, minutes=created)
+        fields.setdefault("name", f"Event {created}")
+        event = Event.objects.create(
+            start=start,
+            end=start + timedelta(hours=2),
+            arranged_by=test_db_user,
+            **fields,
+        )
+        event.registrations.add(*registrants)
+        return event
+
+    return create
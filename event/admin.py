@@ -1,22 +1,58 @@
 from django.contrib import admin
+from django.db import transaction
 
-from .models import Event, EventRegistration
+from .models import Event, EventChange, EventRegistration
 
 
 class EventAdmin(admin.ModelAdmin):
-    list_display = ("id", "name", "arranged_by", "start", "end")
+    list_display = (
+        "id",
+        "name",
+        "arranged_by",
+        "start",
+        "end",
+        "number_of_seats",
+        "registrations_count",
+    )
     list_filter = ("arranged_by",)
     search_fields = (
         "name",
         "arranged_by__username",
     )
 
+    def delete_queryset(self, request, queryset):
+        # the post_delete receiver logs only single deletes
+        event_ids = list(queryset.values_list("pk", flat=True))
+        super().delete_queryset(request, queryset)
+        EventChange.objects.log_events(event_ids, EventChange.DELETE)
+
 
 class EventRegistrationAdmin(admin.ModelAdmin):
     list_display = ("user", "event")
     list_filter = ("event__name",)
     search_fields = ("user__username", "event__name")
 
+    # Registrations are added through the API, which takes a seat with a
+    # conditional UPDATE and refuses them when the event is fully booked.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            Event.events.release_seats(obj.event_id)
+
+    def delete_queryset(self, request, queryset):
+        # the post_delete receiver logs only single deletes
+        registrations = list(queryset.values_list("event_id", "user_id"))
+        super().delete_queryset(request, queryset)
+        event_ids = {event_id for event_id, _ in registrations}
+        Event.events.filter(pk__in=event_ids).recount_registrations()
+        EventChange.objects.log_registrations(registrations, EventChange.DELETE)
+
 
 admin.site.register(Event, EventAdmin)
 admin.site.register(EventRegistration, EventRegistrationAdmin)
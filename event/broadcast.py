@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Max
+
+from .models import Event, EventChange
+
+logger = logging.getLogger(__name__)
+
+
+def get_seats(event):
+    """
+    Seat availability message of an (id, number_of_seats, registrations_count)
+    row, available_seats is None for events without a seat limit.
+    """
+    event_id, number_of_seats, registrations_count = event
+    available_seats = None
+    if number_of_seats > 0:
+        available_seats = max(number_of_seats - registrations_count, 0)
+    return {
+        "id": event_id,
+        "number_of_seats": number_of_seats,
+        "registrations_count": registrations_count,
+        "available_seats": available_seats,
+    }
+
+
+async def get_event_seats(event_ids):
+    events = Event.events.published_events().filter(pk__in=event_ids)
+    rows = events.values_list("id", "number_of_seats", "registrations_count")
+    return [get_seats(row) async for row in rows]
+
+
+class SeatBroadcaster:
+    """
+    Fans out seat availability to the async subscribers of this process.
+
+    A single polling loop reads the event records that registrations (and
+    event edits) append to the EventChange log, so watchers cost one query
+    per interval whatever their number, and writes made by other processes
+    are seen as well. The loop runs only while there are subscribers.
+    Messages carry absolute counts, so a message dropped for a slow
+    subscriber or a change committed out of sequence order is made up for
+    by the next change of the event.
+    """
+
+    queue_size = 100
+
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self.task = None
+        self.seq = None
+
+    @property
+    def interval(self):
+        return settings.SEAT_STREAM_POLL_INTERVAL
+
+    async def subscribe(self, event_ids):
+        if self.task is None or self.task.done():
+            # earlier changes are covered by the snapshot subscribers read
+            changes = EventChange.objects.filter(kind=EventChange.EVENT)
+            seq = (await changes.aaggregate(seq=Max("pk")))["seq"] or 0
+            if self.task is None or self.task.done():
+                self.seq = seq
+                self.task = asyncio.get_running_loop().create_task(self.run())
+
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        for event_id in event_ids:
+            self.subscribers[event_id].add(queue)
+        return queue
+
+    def unsubscribe(self, queue, event_ids):
+        for event_id in event_ids:
+            queues = self.subscribers.get(event_id, set())
+            queues.discard(queue)
+            if not queues:
+                self.subscribers.pop(event_id, None)
+        if not self.subscribers and self.task is not None:
+            self.task.cancel()
+            self.task = None
+            self.seq = None
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll()
+            except Exception:
+                # e.g. "database is locked", the next poll reads the same changes
+                logger.exception("Polling the seat changes failed")
+
+    async def poll(self):
+        changes = EventChange.objects.filter(kind=EventChange.EVENT, pk__gt=self.seq)
+        last_seq = self.seq
+        changed = {}
+        async for seq, event_id in changes.values_list("pk", "event_id"):
+            last_seq = max(last_seq, seq)
+            if event_id in self.subscribers:
+                changed[event_id] = seq
+        if not changed:
+            self.seq = last_seq
+            return
+
+        seats = {seat["id"]: seat for seat in await get_event_seats(list(changed))}
+        for event_id, seq in changed.items():
+            # deleted or unpublished events
+            message = seats.get(event_id, {"id": event_id, "removed": True})
+            for queue in self.subscribers.get(event_id, ()):
+                self.publish(queue, (seq, message))
+        self.seq = last_seq
+
+    def publish(self, queue, item):
+        if queue.full():
+            # never block the loop on a slow subscriber
+            queue.get_nowait()
+        queue.put_nowait(item)
+
+
+seat_broadcaster = SeatBroadcaster()
@@ -0,0 +1,102 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from config.replicas import pin_to_primary
+from monitoring.metrics import cache_requests
+
+EVENT_LIST_VERSION_KEY = "event:list:version"
+EVENT_LIST_PAGE_KEY = "event:list:{version}:{digest}"
+EVENT_LIST_HITS_KEY = "event:list:hits"
+EVENT_LIST_MISSES_KEY = "event:list:misses"
+# reads of the event list stay on the primary while the replicas catch up
+EVENT_LIST_PIN_KEY = "event:list"
+
+
+def _new_version():
+    # A lost version key must not bring back pages cached under an old version
+    return time.time_ns()
+
+
+def get_event_list_version():
+    version = cache.get(EVENT_LIST_VERSION_KEY)
+    if version is None:
+        cache.add(EVENT_LIST_VERSION_KEY, _new_version(), timeout=None)
+        version = cache.get(EVENT_LIST_VERSION_KEY)
+    return version
+
+
+def bump_event_list_version():
+    """
+    Make every cached event list page stale, and once more when the current
+    transaction commits: until then requests read the rows from before the
+    change, the pages and validators they cache in between must not be served.
+    """
+    _bump_event_list_version()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(_bump_event_list_version)
+
+
+def _bump_event_list_version():
+    try:
+        cache.incr(EVENT_LIST_VERSION_KEY)
+    except ValueError:
+        cache.add(EVENT_LIST_VERSION_KEY, _new_version(), timeout=None)
+    # a page read from a lagging replica would be cached under the new version
+    pin_to_primary(EVENT_LIST_PIN_KEY)
+
+
+def get_event_list_cache_key(request):
+    query = sorted(
+        (param, value)
+        for param, values in request.query_params.lists()
+        for value in values
+    )
+    url = f"{request.get_host()}{request.path}?{urlencode(query)}"
+    digest = hashlib.md5(url.encode()).hexdigest()
+    return EVENT_LIST_PAGE_KEY.format(version=get_event_list_version(), digest=digest)
+
+
+def get_cached_event_list(key):
+    data = cache.get(key)
+    counter = EVENT_LIST_MISSES_KEY if data is None else EVENT_LIST_HITS_KEY
+    _increment(counter)
+    _record("event_list", data)
+    return data
+
+
+def set_cached_event_list(key, data):
+    cache.set(key, data, settings.EVENT_LIST_CACHE_TIMEOUT)
+
+
+def get_cached_event_list_validators(key):
+    validators = cache.get(f"{key}:validators")
+    _record("event_list_validators", validators)
+    return validators
+
+
+def set_cached_event_list_validators(key, validators):
+    cache.set(f"{key}:validators", validators, settings.EVENT_LIST_CACHE_TIMEOUT)
+
+
+def get_event_list_cache_stats():
+    return {
+        "hits": cache.get(EVENT_LIST_HITS_KEY, 0),
+        "misses": cache.get(EVENT_LIST_MISSES_KEY, 0),
+    }
+
+
+def _increment(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def _record(name, value):
+    cache_requests.inc(cache=name, result="miss" if value is None else "hit")
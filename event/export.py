@@ -0,0 +1,71 @@
+import csv
+import json
+
+from django.db import models
+from rest_framework import serializers
+
+from .models import Event
+from .serializers import EventPreviewSerializer
+
+# EventPreviewSerializer layout, without the opt-in registrations
+EVENT_FIELDS = tuple(
+    name for name in EventPreviewSerializer.Meta.fields if name != "registrations"
+)
+EVENT_DATETIME_FIELDS = tuple(
+    name
+    for name in EVENT_FIELDS
+    if isinstance(Event._meta.get_field(name), models.DateTimeField)
+)
+
+
+class Echo:
+    """
+    File-like object that hands back what is written to it, so csv.writer
+    output can be yielded row by row.
+    """
+
+    def write(self, value):
+        return value
+
+
+# a spreadsheet evaluates cells starting with these as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def escape_csv_value(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def stream_csv(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([escape_csv_value(value) for value in row])
+
+
+def stream_ndjson(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row))) + "\n"
+
+
+STREAMS = {
+    "csv": (stream_csv, "text/csv"),
+    "ndjson": (stream_ndjson, "application/x-ndjson"),
+}
+
+
+def format_event_rows(rows):
+    """
+    Format EVENT_FIELDS value rows like EventPreviewSerializer does, using a
+    single DRF field instead of a serializer per row.
+    """
+    datetime_field = serializers.DateTimeField()
+    positions = [EVENT_FIELDS.index(name) for name in EVENT_DATETIME_FIELDS]
+    for row in rows:
+        row = list(row)
+        for position in positions:
+            if row[position] is not None:
+                row[position] = datetime_field.to_representation(row[position])
+        yield row
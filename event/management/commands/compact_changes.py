@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from event.models import EventChange
+
+
+class Command(BaseCommand):
+    help = (
+        "Compact the event change feed: drop changes superseded by a later change "
+        "of the same event or registration, and changes older than the retention"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=30,
+            help="Keep changes recorded in the last N days (default: 30)",
+        )
+
+    def handle(self, *args, **options):
+        changes = EventChange.objects.exclude(kind=EventChange.HORIZON)
+        superseded_registrations = changes.filter(
+            Exists(
+                EventChange.objects.filter(
+                    kind=EventChange.REGISTRATION,
+                    event_id=OuterRef("event_id"),
+                    user_id=OuterRef("user_id"),
+                    pk__gt=OuterRef("pk"),
+                )
+            ),
+            kind=EventChange.REGISTRATION,
+        )
+        superseded_events = changes.filter(
+            Exists(
+                EventChange.objects.filter(
+                    kind=EventChange.EVENT,
+                    event_id=OuterRef("event_id"),
+                    pk__gt=OuterRef("pk"),
+                )
+            ),
+            kind=EventChange.EVENT,
+        )
+
+        with transaction.atomic():
+            compacted = superseded_registrations.delete()[0]
+            compacted += superseded_events.delete()[0]
+
+            cutoff = timezone.now() - timedelta(days=options["retention_days"])
+            expired = changes.filter(created_on__lt=cutoff)
+            horizon = expired.aggregate(seq=Max("pk"))["seq"]
+            removed = 0
+            if horizon is not None:
+                removed, _ = expired.delete()
+                # clients that synced before the horizon have to start over
+                EventChange.objects.filter(kind=EventChange.HORIZON).delete()
+                EventChange.objects.create(pk=horizon, kind=EventChange.HORIZON)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Compacted {compacted} and removed {removed} expired change(s)."
+            )
+        )
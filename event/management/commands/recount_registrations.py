@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+
+from event.cache import bump_event_list_version
+from event.models import Event, EventChange
+
+
+class Command(BaseCommand):
+    help = "Repair Event.registrations_count drift by recounting EventRegistration rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "event_ids",
+            nargs="*",
+            type=int,
+            help="Only recount these events (default: all events)",
+        )
+
+    def handle(self, *args, **options):
+        events = Event.events.all()
+        if options["event_ids"]:
+            events = events.filter(pk__in=options["event_ids"])
+
+        drifted = list(
+            events.annotate(total=Count("eventregistration"))
+            .exclude(registrations_count=F("total"))
+            .values_list("pk", flat=True)
+        )
+        if drifted:
+            Event.events.filter(pk__in=drifted).recount_registrations()
+            EventChange.objects.log_events(drifted, EventChange.UPSERT)
+            bump_event_list_version()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Recounted registrations of {len(drifted)} event(s).")
+        )
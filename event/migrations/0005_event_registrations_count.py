@@ -0,0 +1,35 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:44
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_registrations(apps, schema_editor):
+    Event = apps.get_model("event", "Event")
+    EventRegistration = apps.get_model("event", "EventRegistration")
+    counts = (
+        EventRegistration.objects.filter(event=OuterRef("pk"))
+        .order_by()
+        .values("event")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    Event.objects.update(registrations_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("event", "0004_event_number_of_seats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="registrations_count",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="Number of registrations"
+            ),
+        ),
+        migrations.RunPython(count_registrations, migrations.RunPython.noop),
+    ]
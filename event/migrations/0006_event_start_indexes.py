@@ -0,0 +1,32 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("event", "0005_event_registrations_count"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["is_published", "start"], name="event_published_start_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                condition=models.Q(("is_published", True)),
+                fields=["start"],
+                name="event_start_published_only_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["arranged_by", "start"], name="event_arranged_by_start_idx"
+            ),
+        ),
+    ]
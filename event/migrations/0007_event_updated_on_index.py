@@ -0,0 +1,18 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("event", "0006_event_start_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["updated_on", "id"], name="event_updated_on_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.6 on 2026-10-18 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("event", "0007_event_updated_on_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("event", "Event"),
+                            ("registration", "Registration"),
+                            ("horizon", "Horizon"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        blank=True,
+                        choices=[("upsert", "Upsert"), ("delete", "Delete")],
+                        max_length=16,
+                    ),
+                ),
+                ("event_id", models.BigIntegerField(null=True)),
+                ("user_id", models.BigIntegerField(null=True)),
+                ("created_on", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                "verbose_name": "Event Change",
+                "verbose_name_plural": "Event Changes",
+            },
+        ),
+    ]
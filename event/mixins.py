@@ -0,0 +1,229 @@
+import hashlib
+from abc import ABC, abstractmethod
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+class AbstractViewMixin(ABC):
+    """
+    A view is instantiated per request, a view class that misses an abstract
+    method of its mixins fails when the URLconf is loaded instead.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        if cls.__abstractmethods__:
+            names = ", ".join(sorted(cls.__abstractmethods__))
+            raise TypeError(f"{cls.__name__} does not implement {names}")
+        return super().as_view(**initkwargs)
+
+
+class ConditionalGetMixin(AbstractViewMixin):
+    """
+    Answers GET with 304 Not Modified, before anything is serialized, when the
+    If-None-Match / If-Modified-Since headers of the request still match.
+    """
+
+    @abstractmethod
+    def get_validators(self):
+        """
+        Return (version, last_modified) of the requested resource, or None to
+        serve the request unconditionally.
+        """
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+
+        etag, timestamp = self.get_conditional_headers(validators)
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return self.set_conditional_headers(response, etag, timestamp)
+
+    def get_conditional_headers(self, validators):
+        version, last_modified = validators
+        # query parameters (filters, page, include) change the representation
+        query = sorted(self.request.query_params.lists())
+        etag = quote_etag(hashlib.md5(f"{version}:{query}".encode()).hexdigest())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return etag, timestamp
+
+    def set_conditional_headers(self, response, etag, timestamp):
+        if response.status_code in (200, 304):
+            response.headers["ETag"] = etag
+            if timestamp is not None:
+                response.headers["Last-Modified"] = http_date(timestamp)
+        return response
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    def get_validators(self):
+        aggregate = self.get_validators_queryset().aggregate(
+            last_modified=Max("updated_on"), total=Count("pk")
+        )
+        return self.get_list_validators(aggregate)
+
+    def get_validators_queryset(self):
+        # Registration changes touch Event.updated_on, deletions lower the count
+        return self.filter_queryset(self.get_queryset()).order_by()
+
+    def get_list_validators(self, aggregate):
+        last_modified = aggregate["last_modified"]
+        version = f"{last_modified and last_modified.isoformat()}:{aggregate['total']}"
+        return version, last_modified
+
+
+class ConditionalRetrieveMixin(ConditionalGetMixin):
+    def get_validators(self):
+        queryset = self.get_validators_queryset()
+        last_modified = queryset.values_list("updated_on", flat=True).first()
+        if last_modified is None:
+            return None
+        return last_modified.isoformat(), last_modified
+
+    def get_validators_queryset(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        return self.get_queryset().filter(**lookup)
+
+
+class AsyncReadMixin(AbstractViewMixin):
+    """
+    Serves the GET requests of a DRF view as a coroutine using the async ORM,
+    so that under ASGI slow clients do not hold a thread each. Other methods
+    are passed on to the sync view. Authentication, permissions and
+    throttling must not query the database, which holds for
+    StatelessJWTAuthentication.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        sync_view = super().as_view(**initkwargs)
+        sync_handler = sync_to_async(sync_view)
+
+        async def view(request, *args, **kwargs):
+            if request.method != "GET":
+                return await sync_handler(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            return await self.adispatch(request, *args, **kwargs)
+
+        view.cls = cls
+        view.initkwargs = initkwargs
+        view.csrf_exempt = True
+        return view
+
+    async def adispatch(self, request, *args, **kwargs):
+        # APIView.dispatch() with an awaited handler
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # authentication, throttling and the replica pins read stores that
+            # block (files, SQLite, the database cache)
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await self.aget(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        response = self.finalize_response(request, response, *args, **kwargs)
+        if not isinstance(response, Response):
+            return response
+        # a DRF response would be rendered in the sync thread by the handler
+        response.render()
+        return HttpResponse(
+            response.content, status=response.status_code, headers=response.headers
+        )
+
+    @abstractmethod
+    async def aget(self, request, *args, **kwargs):
+        """
+        Return the response to the GET request.
+        """
+
+
+class AsyncConditionalGetMixin(AsyncReadMixin):
+    async def aget(self, request, *args, **kwargs):
+        validators = await self.aget_validators()
+        if validators is None:
+            return await self.aserve(request, *args, **kwargs)
+
+        etag, timestamp = self.get_conditional_headers(validators)
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = await self.aserve(request, *args, **kwargs)
+        return self.set_conditional_headers(response, etag, timestamp)
+
+    @abstractmethod
+    async def aget_validators(self):
+        """
+        ConditionalGetMixin.get_validators() with the async ORM.
+        """
+
+    @abstractmethod
+    async def aserve(self, request, *args, **kwargs):
+        """
+        Return the response to a GET request that is not answered with 304.
+        """
+
+
+class AsyncListMixin(AsyncConditionalGetMixin):
+    """
+    Async GET of a ConditionalListMixin list view paginated by
+    EventCursorPagination.
+    """
+
+    async def aget_validators(self):
+        aggregate = await self.get_validators_queryset().aaggregate(
+            last_modified=Max("updated_on"), total=Count("pk")
+        )
+        return self.get_list_validators(aggregate)
+
+    async def aserve(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = self.paginator.get_page_queryset(queryset, request, view=self)
+        page = self.paginator.get_page([event async for event in queryset])
+
+        serializer = self.get_serializer(page, many=True)
+        await serializer.aprefetch(page)
+        return self.get_paginated_response(serializer.data)
+
+
+class AsyncRetrieveMixin(AsyncConditionalGetMixin):
+    """
+    Async GET of a ConditionalRetrieveMixin detail view.
+    """
+
+    async def aget_validators(self):
+        queryset = self.get_validators_queryset()
+        last_modified = await queryset.values_list("updated_on", flat=True).afirst()
+        if last_modified is None:
+            return None
+        return last_modified.isoformat(), last_modified
+
+    async def aserve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        await serializer.aprefetch(instance)
+        return Response(serializer.data)
+
+    async def aget_object(self):
+        # GenericAPIView.get_object() with the async ORM
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            instance = await queryset.aget(**lookup)
+        except (queryset.model.DoesNotExist, TypeError, ValueError):
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
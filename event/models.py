@@ -1,12 +1,17 @@
-from datetime import date, datetime
+from datetime import datetime, time, timedelta
 
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 User = get_user_model()
 
+# key of the PostgreSQL advisory lock that writers of the change log hold
+CHANGE_LOG_LOCK = 4_202_513
+
 
 class EventQuerySet(models.QuerySet):
     def published_events(self):
@@ -16,8 +21,13 @@ class EventQuerySet(models.QuerySet):
         return self.filter(is_published=False)
 
     def today_events(self):
-        ct = timezone.now()
-        return self.filter(start__date=ct.date(), is_published=True)
+        # Half-open range on the raw column, so the start indexes can be used
+        today = timezone.localdate()
+        day_start = timezone.make_aware(datetime.combine(today, time.min))
+        day_end = timezone.make_aware(
+            datetime.combine(today + timedelta(days=1), time.min)
+        )
+        return self.filter(start__gte=day_start, start__lt=day_end, is_published=True)
 
     def past_events(self):
         ct = timezone.now()
@@ -27,6 +37,42 @@ class EventQuerySet(models.QuerySet):
         ct = timezone.now()
         return self.filter(start__gt=ct, is_published=True)
 
+    def reserve_seats(self, event_id, seats=1):
+        """
+        Take seats of an event with a single conditional UPDATE.
+        Returns False, and changes nothing, if the event has not enough free seats.
+        """
+        has_room = Q(number_of_seats__lte=0) | Q(
+            registrations_count__lte=F("number_of_seats") - seats
+        )
+        updated = self.filter(has_room, pk=event_id).update(
+            registrations_count=F("registrations_count") + seats,
+            updated_on=timezone.now(),
+        )
+        return bool(updated)
+
+    def release_seats(self, event_id, seats=1):
+        return self.filter(pk=event_id).update(
+            registrations_count=Greatest(F("registrations_count") - seats, 0),
+            updated_on=timezone.now(),
+        )
+
+    def recount_registrations(self):
+        """
+        Recompute the registration counters from EventRegistration rows.
+        """
+        counts = (
+            EventRegistration.objects.filter(event=OuterRef("pk"))
+            .order_by()
+            .values("event")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        return self.update(
+            registrations_count=Coalesce(Subquery(counts), 0),
+            updated_on=timezone.now(),
+        )
+
 
 class EventManager(models.Manager):
     def get_queryset(self):
@@ -47,6 +93,15 @@ class EventManager(models.Manager):
     def future_events(self):
         return self.get_queryset().future_events()
 
+    def reserve_seats(self, event_id, seats=1):
+        return self.get_queryset().reserve_seats(event_id, seats)
+
+    def release_seats(self, event_id, seats=1):
+        return self.get_queryset().release_seats(event_id, seats)
+
+    def recount_registrations(self):
+        return self.get_queryset().recount_registrations()
+
 
 class Event(models.Model):
     name = models.CharField(_("Event Name"), max_length=32, unique=True)
@@ -59,6 +114,9 @@ class Event(models.Model):
         _("Registration Deadline"), blank=True, null=True
     )
     number_of_seats = models.IntegerField(_("Number of seats"), default=0)
+    registrations_count = models.IntegerField(
+        _("Number of registrations"), default=0, editable=False
+    )
     arranged_by = models.ForeignKey(
         User,
         null=True,
@@ -83,13 +141,27 @@ class Event(models.Model):
         verbose_name = "Event"
         verbose_name_plural = "Events"
         ordering = ("-start", "-end")
+        indexes = [
+            models.Index(
+                fields=["is_published", "start"], name="event_published_start_idx"
+            ),
+            models.Index(
+                fields=["start"],
+                condition=Q(is_published=True),
+                name="event_start_published_only_idx",
+            ),
+            models.Index(
+                fields=["arranged_by", "start"], name="event_arranged_by_start_idx"
+            ),
+            models.Index(fields=["updated_on", "id"], name="event_updated_on_idx"),
+        ]
 
     def __str__(self):
         return f"{self.start.strftime('%Y-%m-%d')}, {self.start.strftime('%H:%M')}, {self.name}"
 
     @property
     def total_registrations(self):
-        return self.registrations.count()
+        return self.registrations_count
 
 
 class EventRegistration(models.Model):
@@ -103,3 +175,86 @@ class EventRegistration(models.Model):
 
     def __str__(self):
         return f"{str(self.user)} attends {str(self.event)}"
+
+
+class EventChangeManager(models.Manager):
+    def log_events(self, event_ids, action, batch_size=None):
+        changes = [
+            self.model(kind=EventChange.EVENT, action=action, event_id=event_id)
+            for event_id in event_ids
+        ]
+        return self.log(changes, batch_size=batch_size)
+
+    def log_registrations(self, registrations, action):
+        """
+        Log (event_id, user_id) registration changes, together with an upsert
+        of each event, as its registrations_count changed.
+        """
+        changes = [
+            self.model(
+                kind=EventChange.REGISTRATION,
+                action=action,
+                event_id=event_id,
+                user_id=user_id,
+            )
+            for event_id, user_id in registrations
+        ]
+        event_ids = dict.fromkeys(event_id for event_id, _ in registrations)
+        changes += [
+            self.model(kind=EventChange.EVENT, action=EventChange.UPSERT, event_id=pk)
+            for pk in event_ids
+        ]
+        return self.log(changes)
+
+    def log(self, changes, batch_size=None):
+        """
+        Insert change records. Sequence numbers are taken on insert, so the
+        writers of the log take turns until their transactions commit: a
+        client that read a higher number must not miss a lower one committed
+        later. SQLite has a single writer until commit anyway.
+        """
+        if not changes:
+            return []
+        with transaction.atomic(using=self.db, savepoint=False):
+            connection = connections[self.db]
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT pg_advisory_xact_lock(%s)", [CHANGE_LOG_LOCK]
+                    )
+            return self.bulk_create(changes, batch_size=batch_size)
+
+
+class EventChange(models.Model):
+    """
+    Change log of events and registrations, the primary key is the sequence
+    number clients sync from. Records of kind "horizon" mark the highest
+    sequence number removed by retention, they carry no change.
+    """
+
+    EVENT = "event"
+    REGISTRATION = "registration"
+    HORIZON = "horizon"
+    KIND_CHOICES = (
+        (EVENT, _("Event")),
+        (REGISTRATION, _("Registration")),
+        (HORIZON, _("Horizon")),
+    )
+    UPSERT = "upsert"
+    DELETE = "delete"
+    ACTION_CHOICES = ((UPSERT, _("Upsert")), (DELETE, _("Delete")))
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    action = models.CharField(max_length=16, choices=ACTION_CHOICES, blank=True)
+    event_id = models.BigIntegerField(null=True)
+    user_id = models.BigIntegerField(null=True)
+    created_on = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    objects = EventChangeManager()
+
+    class Meta:
+        verbose_name = "Event Change"
+        verbose_name_plural = "Event Changes"
+
+    def __str__(self):
+        return f"{self.pk}: {self.action} {self.kind} {self.event_id}"
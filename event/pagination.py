@@ -0,0 +1,142 @@
+import binascii
+import json
+import operator
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework import filters
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class EventCursorPagination(BasePagination):
+    """
+    Keyset pagination: the opaque cursor carries the ordering values of the
+    last row served, so every page is a range scan starting right after it
+    and costs the same however deep the client scrolls. ``id`` is always
+    appended to the ordering as a tie-breaker, which means only non-nullable
+    fields may be used for ordering.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-start", "-end", "-id")
+    invalid_cursor_message = _("Invalid cursor")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        return self.get_page(list(queryset))
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Return the ordered and sliced queryset for the requested page without
+        evaluating it. Pass the fetched rows to `get_page()`.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.fields = [
+            queryset.model._meta.get_field(term.lstrip("-")) for term in self.ordering
+        ]
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(position))
+        return queryset.order_by(*self.ordering)[: self.page_size + 1]
+
+    def get_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        self.next_position = None
+        if self.has_next:
+            self.next_position = [
+                field.value_to_string(rows[-1]) for field in self.fields
+            ]
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, request, queryset, view):
+        ordering = self.ordering
+        for backend in getattr(view, "filter_backends", []):
+            if issubclass(backend, filters.OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view) or ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+
+        ordering = list(ordering)
+        if not any(term.lstrip("-") == "id" for term in ordering):
+            ordering.append("-id" if ordering[0].startswith("-") else "id")
+        return ordering
+
+    def get_keyset_filter(self, position):
+        # (a, b, id) after (x, y, z) is: a past x, or a == x and b past y, or
+        # a == x and b == y and id past z. The leading bound on the first
+        # field alone keeps the predicate usable as an index range.
+        clauses = []
+        for index, term in enumerate(self.ordering):
+            lookup = "lt" if term.startswith("-") else "gt"
+            equal = {
+                field.name: value
+                for field, value in zip(self.fields[:index], position[:index])
+            }
+            past = {f"{term.lstrip('-')}__{lookup}": position[index]}
+            clauses.append(Q(**equal, **past))
+
+        first = self.ordering[0]
+        lookup = "lte" if first.startswith("-") else "gte"
+        bound = Q(**{f"{first.lstrip('-')}__{lookup}": position[0]})
+        return bound & reduce(operator.or_, clauses)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            if cursor["o"] != self.ordering or len(cursor["p"]) != len(self.fields):
+                raise ValueError
+            return [
+                field.to_python(value) for field, value in zip(self.fields, cursor["p"])
+            ]
+        except (KeyError, TypeError, ValueError, ValidationError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        cursor = json.dumps({"o": self.ordering, "p": position})
+        encoded = urlsafe_b64encode(cursor.encode("ascii")).decode("ascii")
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
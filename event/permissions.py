@@ -6,4 +6,4 @@ class IsOwner(permissions.BasePermission):
         return request.user.is_authenticated and request.user.is_active
 
     def has_object_permission(self, request, view, obj):
-        return bool(obj.arranged_by == request.user)
+        return bool(obj.arranged_by_id == request.user.id)
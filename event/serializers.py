@@ -1,7 +1,10 @@
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
+from django.db import models
 from rest_framework import serializers
 
-from .models import Event
+from .models import Event, EventRegistration
 
 User = get_user_model()
 
@@ -32,6 +35,13 @@ class EventSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ("id", "arranged_by", "created_on", "updated_on")
 
+    def validate_arranged_by(self, user):
+        # Stateless authentication provides a TokenUser, the event only needs
+        # a reference to the user row
+        if not isinstance(user, User):
+            user = User(pk=user.pk)
+        return user
+
     def validate(self, data):
         if "start" in data and "end" in data and data["start"] > data["end"]:
             raise serializers.ValidationError(
@@ -40,7 +50,178 @@ class EventSerializer(serializers.ModelSerializer):
         return data
 
 
+class EventBulkListSerializer(serializers.ListSerializer):
+    batch_size = 100
+
+    def to_internal_value(self, data):
+        name_errors = self.get_name_errors(data)
+        try:
+            validated_data = super().to_internal_value(data)
+        except serializers.ValidationError as exc:
+            if not isinstance(exc.detail, list) or not name_errors:
+                raise
+            errors = [
+                {**name_error, **item_error}
+                for name_error, item_error in zip(name_errors, exc.detail)
+            ]
+            raise serializers.ValidationError(errors)
+
+        if any(name_errors):
+            raise serializers.ValidationError(name_errors)
+        return validated_data
+
+    def get_name_errors(self, data):
+        # The per-item UniqueValidator is replaced by one query for the batch
+        if not isinstance(data, list) or len(data) > (self.max_length or len(data)):
+            return []
+        names = [
+            item["name"].strip() if isinstance(item.get("name"), str) else None
+            for item in data
+            if isinstance(item, dict)
+        ]
+        if len(names) != len(data):
+            return []
+
+        existing = set(
+            Event.objects.filter(name__in=set(names) - {None}).values_list(
+                "name", flat=True
+            )
+        )
+        errors, seen = [], set()
+        for name in names:
+            if name in existing:
+                errors.append({"name": ["Event with this name already exists."]})
+            elif name is not None and name in seen:
+                errors.append({"name": ["Event name is repeated in the batch."]})
+            else:
+                errors.append({})
+            seen.add(name)
+        return errors
+
+    def create(self, validated_data):
+        events = [Event(**item) for item in validated_data]
+        return Event.objects.bulk_create(events, batch_size=self.batch_size)
+
+
+class EventBulkSerializer(EventSerializer):
+    class Meta(EventSerializer.Meta):
+        extra_kwargs = {"name": {"validators": []}}
+        list_serializer_class = EventBulkListSerializer
+
+
+class EventRegistrationBulkSerializer(serializers.Serializer):
+    users = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000
+    )
+
+    def validate_users(self, users):
+        # drop repeated ids, keep the order of the request
+        return list(dict.fromkeys(users))
+
+
+class EventExportQuerySerializer(serializers.Serializer):
+    updated_since = serializers.DateTimeField(required=False)
+
+
+class EventSeatStreamQuerySerializer(serializers.Serializer):
+    events = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=100
+    )
+
+
+class EventChangesQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=500)
+
+
+class EventPreviewListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        events = data.all() if isinstance(data, models.manager.BaseManager) else data
+        events = list(events)
+
+        # Registered user ids of the whole page come from a single query on
+        # the through table, no User rows are loaded.
+        if self.needs_registrations(events):
+            self.set_registrations(events, self.get_registrations(events))
+
+        return super().to_representation(events)
+
+    async def aprefetch(self, events):
+        """
+        Load the registered user ids of the page with the async ORM, so that
+        the serialization runs no query.
+        """
+        if self.needs_registrations(events):
+            rows = [row async for row in self.get_registrations(events)]
+            self.set_registrations(events, rows)
+
+    def needs_registrations(self, events):
+        return "registrations" in self.child.fields and any(
+            not hasattr(event, "registration_ids") for event in events
+        )
+
+    def get_registrations(self, events):
+        return (
+            EventRegistration.objects.filter(event__in=events)
+            .order_by("user_id")
+            .values_list("event_id", "user_id")
+        )
+
+    def set_registrations(self, events, rows):
+        registrations = defaultdict(list)
+        for event_id, user_id in rows:
+            registrations[event_id].append(user_id)
+        for event in events:
+            event.registration_ids = registrations[event.pk]
+
+
 class EventPreviewSerializer(serializers.ModelSerializer):
+    registrations = serializers.SerializerMethodField()
+
     class Meta:
         model = Event
-        fields = "__all__"
+        fields = (
+            "id",
+            "name",
+            "description",
+            "start",
+            "end",
+            "registration_deadline",
+            "number_of_seats",
+            "registrations_count",
+            "is_published",
+            "created_on",
+            "updated_on",
+            "arranged_by",
+            "registrations",
+        )
+        list_serializer_class = EventPreviewListSerializer
+
+    def get_fields(self):
+        # The list of registered user ids can be large, clients opt in to it
+        # with ?include=registrations
+        fields = super().get_fields()
+        request = self.context.get("request")
+        include = request.query_params.get("include", "") if request else ""
+        if "registrations" not in include.split(","):
+            fields.pop("registrations")
+        return fields
+
+    def get_registrations(self, event):
+        if hasattr(event, "registration_ids"):
+            return event.registration_ids
+        return list(self.get_registrations_queryset(event))
+
+    async def aprefetch(self, event):
+        """
+        Load the registered user ids with the async ORM, so that the
+        serialization runs no query.
+        """
+        if "registrations" in self.fields:
+            queryset = self.get_registrations_queryset(event)
+            event.registration_ids = [user_id async for user_id in queryset]
+
+    def get_registrations_queryset(self, event):
+        return event.eventregistration_set.order_by("user_id").values_list(
+            "user_id", flat=True
+        )
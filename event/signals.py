@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_event_list_version
+from .models import Event, EventChange, EventRegistration
+
+
+@receiver(m2m_changed, sender=EventRegistration)
+def registrations_changed_callback(sender, instance, action, reverse, pk_set, **kwargs):
+    # Keeps Event.registrations_count in step with event.registrations.add(),
+    # .remove() and .clear() (and the reverse user.registrations.* calls).
+    # clear() runs in a transaction, the events are updated before the change
+    # log is locked, as by the other writers.
+    if action == "pre_clear" and reverse:
+        Event.objects.filter(eventregistration__user=instance).update(
+            registrations_count=F("registrations_count") - 1,
+            updated_on=timezone.now(),
+        )
+    elif action == "pre_clear":
+        Event.objects.filter(pk=instance.pk).update(
+            registrations_count=0, updated_on=timezone.now()
+        )
+    elif action in ("post_add", "post_remove") and pk_set:
+        event_ids = pk_set if reverse else {instance.pk}
+        Event.events.filter(pk__in=event_ids).recount_registrations()
+
+    if action in ("post_add", "post_remove") and pk_set:
+        if reverse:
+            registrations = [(event_id, instance.pk) for event_id in pk_set]
+        else:
+            registrations = [(instance.pk, user_id) for user_id in pk_set]
+        log_action = EventChange.UPSERT if action == "post_add" else EventChange.DELETE
+        EventChange.objects.log_registrations(registrations, log_action)
+    elif action == "pre_clear":
+        lookup = "user" if reverse else "event"
+        registrations = EventRegistration.objects.filter(**{lookup: instance})
+        EventChange.objects.log_registrations(
+            registrations.values_list("event_id", "user_id"), EventChange.DELETE
+        )
+
+    if action.startswith("post_"):
+        bump_event_list_version()
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=EventRegistration)
+@receiver(post_delete, sender=EventRegistration)
+def event_list_changed_callback(sender, **kwargs):
+    bump_event_list_version()
+
+
+@receiver(post_save, sender=Event)
+def event_saved_callback(sender, instance, **kwargs):
+    EventChange.objects.log_events([instance.pk], EventChange.UPSERT)
+
+
+@receiver(post_delete, sender=Event)
+def event_deleted_callback(sender, instance, origin=None, **kwargs):
+    # Events deleted along with their organizer are logged by
+    # user_deleted_callback, queryset deletes by whoever issues them.
+    if origin is instance:
+        EventChange.objects.log_events([instance.pk], EventChange.DELETE)
+
+
+@receiver(post_save, sender=EventRegistration)
+def registration_saved_callback(sender, instance, created, **kwargs):
+    if created:
+        registrations = [(instance.event_id, instance.user_id)]
+        EventChange.objects.log_registrations(registrations, EventChange.UPSERT)
+
+
+@receiver(post_delete, sender=EventRegistration)
+def registration_deleted_callback(sender, instance, origin=None, **kwargs):
+    # Only deletes of a single registration are logged here, one change record
+    # per row would make cascades and queryset deletes an N+1. The deletion of
+    # an event implies the deletion of its registrations, the other deletes
+    # log their registrations in bulk.
+    if origin is instance:
+        registrations = [(instance.event_id, instance.user_id)]
+        EventChange.objects.log_registrations(registrations, EventChange.DELETE)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted_callback(sender, instance, **kwargs):
+    # The registrations of the user are deleted by the cascade, which
+    # bypasses the m2m_changed receiver, and the events arranged by the user
+    # lose their organizer.
+    # The events are updated before the change log is locked, the other
+    # writers lock the rows of their events first as well.
+    Event.objects.filter(eventregistration__user=instance).update(
+        registrations_count=F("registrations_count") - 1,
+        updated_on=timezone.now(),
+    )
+    registrations = EventRegistration.objects.filter(user=instance)
+    EventChange.objects.log_registrations(
+        registrations.values_list("event_id", "user_id"), EventChange.DELETE
+    )
+    EventChange.objects.log_events(
+        Event.objects.filter(arranged_by=instance)
+        .values_list("pk", flat=True)
+        .order_by(),
+        EventChange.UPSERT,
+    )
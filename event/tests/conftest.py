@@ -90,3 +90,20 @@ def db_events_with_registrations(another_test_db_user, test_db_user, events_data
         event.registrations.add(another_test_db_user)
         events.append(event)
     return events
+
+
+@pytest.fixture
+def db_many_events(test_db_user):
+    # Several events share the same start and end, so paging has to rely on
+    # the id tie-breaker to avoid skipping or repeating rows.
+    start = timezone.now() + timedelta(days=2)
+    events = [
+        Event(
+            name=f"Event {i}",
+            start=start + timedelta(hours=i // 5),
+            end=start + timedelta(hours=i // 5 + 1),
+            arranged_by=test_db_user,
+        )
+        for i in range(45)
+    ]
+    return Event.objects.bulk_create(events)
@@ -1,12 +1,40 @@
+import asyncio
+import csv
+import json
+from datetime import datetime, time, timedelta
+
 import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.http import StreamingHttpResponse
+from django.test import AsyncClient, AsyncRequestFactory
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework.fields import DateTimeField
 
-from ..models import Event
+from auth.tokens import UserStateRefreshToken
+
+from ..broadcast import SeatBroadcaster, seat_broadcaster
+from ..mixins import AsyncConditionalGetMixin
+from ..models import CHANGE_LOG_LOCK, Event, EventChange, EventRegistration
+from ..pagination import EventCursorPagination
+from ..serializers import EventBulkListSerializer, EventPreviewSerializer
 from ..views import (
+    AsyncEventListCreateView,
+    AsyncEventRetrieveUpdateDestroyView,
+    AsyncUserEventsView,
+    AsyncUserRegistrationsListView,
+    EventAttendeesExportView,
+    EventBulkCreateView,
+    EventChangesView,
+    EventExportView,
+    EventListCacheStatsView,
     EventListCreateView,
+    EventRegistrationBulkView,
     EventRetrieveUpdateDestroyView,
+    EventSeatStreamView,
     UserEventRegistrationView,
     UserEventsView,
     UserRegistrationsListView,
@@ -35,14 +63,14 @@ class TestEventListCreateView:
         api_client = user_api_client
         response = api_client.get(path=self.url)
         assert response.status_code == 200
-        for event in response.data:
+        for event in response.data["results"]:
             assert event["is_published"]
 
     def test_event_list_query_parameter_t_past(self, user_api_client, db_events):
         user_api_client = user_api_client
         response = user_api_client.get(self.url, {"t": "past"})
         assert response.status_code == 200
-        for event in response.data:
+        for event in response.data["results"]:
             event_time = drf_string_to_datetime(event["start"])
             assert event_time < timezone.now()
 
@@ -50,7 +78,7 @@ class TestEventListCreateView:
         user_api_client = user_api_client
         response = user_api_client.get(self.url, {"t": "today"})
         assert response.status_code == 200
-        for event in response.data:
+        for event in response.data["results"]:
             event_time = drf_string_to_datetime(event["start"])
             assert event_time.date() == timezone.now().date()
 
@@ -58,10 +86,98 @@ class TestEventListCreateView:
         user_api_client = user_api_client
         response = user_api_client.get(self.url, {"t": "future"})
         assert response.status_code == 200
-        for event in response.data:
+        for event in response.data["results"]:
             event_time = drf_string_to_datetime(event["start"])
             assert event_time > timezone.now()
 
+    def test_event_list_default_page_size_is_bounded(
+        self, user_api_client, db_many_events
+    ):
+        response = user_api_client.get(self.url)
+        assert response.status_code == 200
+        page_size = EventCursorPagination.page_size
+        assert len(response.data["results"]) == page_size
+        assert response.data["next"] is not None
+
+    def test_event_list_page_size_is_capped(
+        self, monkeypatch, user_api_client, db_many_events
+    ):
+        monkeypatch.setattr(EventCursorPagination, "max_page_size", 10)
+        response = user_api_client.get(self.url, {"page_size": 50})
+        assert response.status_code == 200
+        assert len(response.data["results"]) == 10
+
+    def test_event_list_cursor_walks_all_events_once(
+        self, user_api_client, db_many_events
+    ):
+        ids = []
+        response = user_api_client.get(self.url, {"page_size": 7})
+        while True:
+            assert response.status_code == 200
+            ids += [event["id"] for event in response.data["results"]]
+            if response.data["next"] is None:
+                break
+            response = user_api_client.get(response.data["next"])
+
+        expected = Event.objects.order_by("-start", "-end", "-id")
+        assert ids == list(expected.values_list("id", flat=True))
+
+    def test_event_list_cursor_follows_ordering_parameter(
+        self, user_api_client, db_many_events
+    ):
+        response = user_api_client.get(self.url, {"ordering": "name", "page_size": 30})
+        next_url = response.data["next"]
+        names = [event["name"] for event in response.data["results"]]
+        names += [
+            event["name"] for event in user_api_client.get(next_url).data["results"]
+        ]
+        assert names == sorted(event.name for event in db_many_events)
+
+    def test_event_list_invalid_cursor(self, user_api_client, db_many_events):
+        response = user_api_client.get(self.url, {"cursor": "not-a-cursor"})
+        assert response.status_code == 404
+
+    def test_event_list_registrations_are_opt_in(
+        self, user_api_client, db_events_with_registrations
+    ):
+        response = user_api_client.get(self.url)
+        assert response.status_code == 200
+        for event in response.data["results"]:
+            assert "registrations" not in event
+            assert event["registrations_count"] == 1
+
+    def test_event_list_registrations_query_count_does_not_grow(
+        self,
+        django_assert_num_queries,
+        django_user_model,
+        user_api_client,
+        db_events_with_registrations,
+    ):
+        users = django_user_model.objects.bulk_create(
+            django_user_model(username=f"user_{i}", email=f"user_{i}@test.com")
+            for i in range(20)
+        )
+        for event in db_events_with_registrations:
+            event.registrations.add(*users)
+
+        # ETag aggregate, events page and registered user ids of the page
+        with django_assert_num_queries(3):
+            response = user_api_client.get(self.url, {"include": "registrations"})
+        assert response.status_code == 200
+        for event in response.data["results"]:
+            assert len(event["registrations"]) == 21
+
+    def test_event_list_conditional_get(self, user_api_client, db_events):
+        response = user_api_client.get(self.url)
+        etag = response.headers["ETag"]
+        response = user_api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+        Event.objects.filter(name="Future Event").delete()
+        response = user_api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
     def test_event_create_view_unauth_access_is_not_allowed(self, api_client):
         response = api_client.post(self.url, data={})
         assert response.status_code == 401
@@ -79,6 +195,158 @@ class TestEventListCreateView:
             assert Event.objects.count() == cnt
 
 
+class TestEventBulkCreateView:
+    view = EventBulkCreateView
+    url = reverse(view.name)
+
+    def get_events_data(self, count):
+        start = timezone.now() + timedelta(days=3)
+        return [
+            {
+                "name": f"Session {i}",
+                "start": start + timedelta(hours=i),
+                "end": start + timedelta(hours=i + 1),
+            }
+            for i in range(count)
+        ]
+
+    def test_event_bulk_create_view_unauth_access_is_not_allowed(self, api_client):
+        response = api_client.post(self.url, data=[], format="json")
+        assert response.status_code == 401
+
+    def test_event_bulk_create_view(self, test_db_user, user_api_client):
+        events_data = self.get_events_data(5)
+        response = user_api_client.post(self.url, data=events_data, format="json")
+        assert response.status_code == 201
+        assert [event["name"] for event in response.data] == [
+            event["name"] for event in events_data
+        ]
+        assert all(event["id"] for event in response.data)
+        events = Event.objects.filter(arranged_by=test_db_user)
+        assert events.count() == 5
+
+    @pytest.mark.parametrize("count", [5, 250])
+    def test_event_bulk_create_query_count_does_not_depend_on_batch_size(
+        self, django_assert_num_queries, user_api_client, count
+    ):
+        events_data = self.get_events_data(count)
+        inserts = -(-count // EventBulkListSerializer.batch_size)
+        # name check, inserts with their change records and the savepoint
+        with django_assert_num_queries(1 + 2 * inserts + 2):
+            response = user_api_client.post(self.url, data=events_data, format="json")
+        assert response.status_code == 201
+        assert Event.objects.count() == count
+
+    def test_event_bulk_create_reports_errors_per_item(
+        self, user_api_client, db_events
+    ):
+        events_data = self.get_events_data(4)
+        events_data[1]["name"] = "Future Event"
+        events_data[2]["name"] = events_data[0]["name"]
+        events_data[3]["end"] = events_data[3]["start"] - timedelta(hours=1)
+
+        response = user_api_client.post(self.url, data=events_data, format="json")
+        assert response.status_code == 400
+        assert len(response.data) == 4
+        assert response.data[0] == {}
+        assert "name" in response.data[1]
+        assert "name" in response.data[2]
+        assert "non_field_errors" in response.data[3]
+        assert Event.objects.count() == len(db_events)
+
+    def test_event_bulk_create_empty_batch_is_not_allowed(self, user_api_client):
+        response = user_api_client.post(self.url, data=[], format="json")
+        assert response.status_code == 400
+
+    def test_event_bulk_create_invalidates_event_list_cache(self, user_api_client):
+        list_url = reverse(EventListCreateView.name)
+        assert user_api_client.get(list_url).data["results"] == []
+        user_api_client.post(self.url, data=self.get_events_data(3), format="json")
+        assert len(user_api_client.get(list_url).data["results"]) == 3
+
+
+class TestEventListCache:
+    url = reverse(EventListCreateView.name)
+    stats_url = reverse(EventListCacheStatsView.name)
+
+    def test_repeated_request_is_served_from_cache(
+        self, django_assert_num_queries, user_api_client, db_events
+    ):
+        response = user_api_client.get(self.url, {"t": "future"})
+        with django_assert_num_queries(0):
+            cached_response = user_api_client.get(self.url, {"t": "future"})
+        assert cached_response.status_code == 200
+        assert cached_response.data == response.data
+
+    def test_query_parameters_are_cached_separately(self, user_api_client, db_events):
+        future = user_api_client.get(self.url, {"t": "future"}).data["results"]
+        past = user_api_client.get(self.url, {"t": "past"}).data["results"]
+        assert {event["name"] for event in future} != {event["name"] for event in past}
+
+    def test_event_changes_invalidate_the_cache(
+        self, user_api_client, db_events, events_data
+    ):
+        response = user_api_client.get(self.url, {"t": "all"})
+        count = len(response.data["results"])
+
+        data = dict(events_data["future_event"], name="Another Future Event")
+        user_api_client.post(self.url, data=data)
+        response = user_api_client.get(self.url, {"t": "all"})
+        assert len(response.data["results"]) == count + 1
+
+        Event.objects.get(name="Another Future Event").delete()
+        response = user_api_client.get(self.url, {"t": "all"})
+        assert len(response.data["results"]) == count
+
+    def test_registration_changes_invalidate_the_cache(
+        self, user_api_client, db_events
+    ):
+        event = Event.objects.get(name="Future Event")
+        url = reverse(UserEventRegistrationView.name, kwargs={"event_id": event.id})
+
+        def registrations_count():
+            response = user_api_client.get(self.url)
+            by_id = {item["id"]: item for item in response.data["results"]}
+            return by_id[event.id]["registrations_count"]
+
+        assert registrations_count() == 0
+        user_api_client.post(url, data={})
+        assert registrations_count() == 1
+        user_api_client.delete(url)
+        assert registrations_count() == 0
+
+    def test_pages_cached_before_the_commit_are_dropped(
+        self, django_capture_on_commit_callbacks, user_api_client, db_events
+    ):
+        event = Event.objects.get(name="Future Event")
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                event.name = "Renamed Event"
+                event.save()
+                # a request of another connection would still read the old row
+                Event.objects.filter(pk=event.pk).update(name="Future Event")
+                response = user_api_client.get(self.url, {"t": "all"})
+                names = {item["name"] for item in response.data["results"]}
+                assert "Future Event" in names
+                Event.objects.filter(pk=event.pk).update(name="Renamed Event")
+
+        response = user_api_client.get(self.url, {"t": "all"})
+        names = {item["name"] for item in response.data["results"]}
+        assert "Renamed Event" in names
+
+    def test_cache_stats_view_is_for_staff_only(self, user_api_client):
+        response = user_api_client.get(self.stats_url)
+        assert response.status_code == 403
+
+    def test_cache_stats_view_counts_hits_and_misses(self, admin_api_client, db_events):
+        for _ in range(3):
+            admin_api_client.get(self.url)
+        response = admin_api_client.get(self.stats_url)
+        assert response.status_code == 200
+        assert response.data["hits"] == 2
+        assert response.data["misses"] == 1
+
+
 class TestEventRetrieveUpdatedDestroyView:
     view = EventRetrieveUpdateDestroyView
 
@@ -99,6 +367,57 @@ class TestEventRetrieveUpdatedDestroyView:
         event_data = response.data
         assert event_data["id"] == event_id
 
+    def test_event_retrieve_view_with_registrations(
+        self, another_test_db_user, user_api_client, db_events_with_registrations
+    ):
+        event = db_events_with_registrations[0]
+        url = self.get_url(event_id=event.id)
+        response = user_api_client.get(url)
+        assert "registrations" not in response.data
+        assert response.data["registrations_count"] == 1
+
+        response = user_api_client.get(url, {"include": "registrations"})
+        assert response.data["registrations"] == [another_test_db_user.id]
+
+    def test_event_retrieve_view_conditional_get(self, user_api_client, db_events):
+        url = self.get_url(event_id=1)
+        response = user_api_client.get(url)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        last_modified = response.headers["Last-Modified"]
+
+        response = user_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        response = user_api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304
+
+        # the representation depends on the query parameters
+        response = user_api_client.get(
+            url, {"include": "registrations"}, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == 200
+
+    def test_event_retrieve_view_etag_changes_with_registrations(
+        self, another_test_db_user, user_api_client, db_events
+    ):
+        url = self.get_url(event_id=1)
+        etag = user_api_client.get(url).headers["ETag"]
+        Event.objects.get(pk=1).registrations.add(another_test_db_user)
+        response = user_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_event_retrieve_view_not_modified_skips_serialization(
+        self, django_assert_num_queries, user_api_client, db_events
+    ):
+        url = self.get_url(event_id=1)
+        etag = user_api_client.get(url).headers["ETag"]
+        with django_assert_num_queries(1):
+            response = user_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert not response.content
+
     def test_event_update_view_unauth_access_is_not_allowed(self, api_client):
         url = self.get_url(event_id=1)
         response = api_client.put(url)
@@ -190,7 +509,7 @@ class TestUserEventsView:
         api_client = user_api_client
         response = api_client.get(path=self.url)
         assert response.status_code == 200
-        assert len(response.data) == 0
+        assert len(response.data["results"]) == 0
 
     def test_user_events_view_with_user_created_events(
         self, test_db_user, user_api_client, db_events
@@ -200,11 +519,24 @@ class TestUserEventsView:
         api_client = user_api_client
         response = api_client.get(path=self.url)
         assert response.status_code == 200
-        assert len(response.data) > 0
-        assert len(response.data) == n
-        for event in response.data:
+        assert len(response.data["results"]) > 0
+        assert len(response.data["results"]) == n
+        for event in response.data["results"]:
             assert event["arranged_by"] == test_db_user.id
 
+    def test_user_events_view_conditional_get(
+        self, test_db_user, user_api_client, db_events
+    ):
+        etag = user_api_client.get(self.url).headers["ETag"]
+        response = user_api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+        event = Event.objects.get(name="Future Event")
+        event.description = "Updated description"
+        event.save()
+        response = user_api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+
 
 class TestUserRegistrationsListView:
     view = UserRegistrationsListView
@@ -220,7 +552,7 @@ class TestUserRegistrationsListView:
         api_client = user_api_client
         response = api_client.get(self.url)
         assert response.status_code == 200
-        assert len(response.data) == 0
+        assert len(response.data["results"]) == 0
 
     def test_user_registrations_list_not_empty(
         self,
@@ -230,10 +562,10 @@ class TestUserRegistrationsListView:
         user_api_client,
     ):
         api_client = user_api_client
-        response = api_client.get(self.url)
+        response = api_client.get(self.url, {"include": "registrations"})
         assert response.status_code == 200
-        assert len(response.data) != 0
-        for event in response.data:
+        assert len(response.data["results"]) != 0
+        for event in response.data["results"]:
             assert test_db_user.id in event["registrations"]
 
 
@@ -341,6 +673,75 @@ class TestUserEventRegistrationView:
         registration_error = response.data["registration error"]
         assert registration_error.code == "registration_for_fully_booked_event"
 
+    def test_registration_updates_registrations_count(
+        self, test_db_user, db_events, user_api_client
+    ):
+        event = Event.objects.get(name="Future Event")
+        url = self.get_url(event_id=event.id)
+
+        response = user_api_client.post(url, data={})
+        assert response.status_code == 201
+        event.refresh_from_db()
+        assert event.registrations_count == 1
+
+        response = user_api_client.delete(url)
+        assert response.status_code == 204
+        event.refresh_from_db()
+        assert event.registrations_count == 0
+
+        # cancelling a registration that does not exist releases nothing
+        response = user_api_client.delete(url)
+        assert response.status_code == 204
+        event.refresh_from_db()
+        assert event.registrations_count == 0
+
+    def test_fully_booked_event_rejection_leaves_no_registration(
+        self, test_db_user, db_events_with_registrations, user_api_client
+    ):
+        event = Event.objects.get(name="Future Event")
+        url = self.get_url(event_id=event.id)
+        response = user_api_client.post(url, data={})
+        assert response.status_code == 400
+        event.refresh_from_db()
+        assert event.registrations_count == event.number_of_seats
+        assert not event.registrations.filter(pk=test_db_user.pk).exists()
+
+    @pytest.mark.parametrize("other_registrations", [0, 50])
+    def test_registration_query_count_does_not_depend_on_registrations(
+        self,
+        django_assert_num_queries,
+        django_user_model,
+        test_db_user,
+        db_events,
+        user_api_client,
+        other_registrations,
+    ):
+        event = Event.objects.get(name="Today's Event")
+        users = django_user_model.objects.bulk_create(
+            django_user_model(username=f"user_{i}", email=f"user_{i}@test.com")
+            for i in range(other_registrations)
+        )
+        event.registrations.add(*users)
+
+        # event with the "already registered" check, then the seat reservation,
+        # the insert and its change record inside a savepoint
+        url = self.get_url(event_id=event.id)
+        with django_assert_num_queries(6):
+            response = user_api_client.post(url, data={})
+        assert response.status_code == 201
+
+    def test_rejected_registration_query_count(
+        self,
+        django_assert_num_queries,
+        test_db_user,
+        db_events_of_owner_with_registrations,
+        user_api_client,
+    ):
+        url = self.get_url(event_id=db_events_of_owner_with_registrations[0].id)
+        with django_assert_num_queries(1):
+            response = user_api_client.post(url, data={})
+        assert response.status_code == 400
+
     def test_cancel_registration_for_event_unauth_access_is_not_allowed(
         self, api_client
     ):
@@ -390,3 +791,752 @@ class TestUserEventRegistrationView:
         # After the cancellation
         event = Event.objects.get(pk=event_id)
         assert test_db_user not in event.registrations.all()
+
+
+class TestEventSeatReservation:
+    def test_reserve_seats_stops_at_number_of_seats(self, db_events):
+        event = Event.objects.get(name="Future Event")
+        assert event.number_of_seats == 1
+        assert Event.events.reserve_seats(event.pk)
+        assert not Event.events.reserve_seats(event.pk)
+        event.refresh_from_db()
+        assert event.registrations_count == 1
+
+    def test_reserve_seats_without_seat_limit(self, db_events):
+        event = Event.objects.get(name="Today's Event")
+        assert event.number_of_seats == 0
+        for _ in range(3):
+            assert Event.events.reserve_seats(event.pk)
+        event.refresh_from_db()
+        assert event.registrations_count == 3
+
+    def test_release_seats_does_not_go_below_zero(self, db_events):
+        event = Event.objects.get(name="Future Event")
+        Event.events.release_seats(event.pk)
+        event.refresh_from_db()
+        assert event.registrations_count == 0
+
+    def test_related_manager_keeps_registrations_count(
+        self, test_db_user, another_test_db_user, db_events
+    ):
+        event = Event.objects.get(name="Today's Event")
+        event.registrations.add(test_db_user, another_test_db_user)
+        event.refresh_from_db()
+        assert event.registrations_count == 2
+
+        event.registrations.remove(test_db_user)
+        event.refresh_from_db()
+        assert event.registrations_count == 1
+
+        another_test_db_user.registrations.clear()
+        event.refresh_from_db()
+        assert event.registrations_count == 0
+
+        event.registrations.add(test_db_user, another_test_db_user)
+        event.registrations.clear()
+        event.refresh_from_db()
+        assert event.registrations_count == 0
+
+    def test_admin_delete_releases_the_seat(
+        self, admin_client, test_db_user, another_test_db_user, db_events
+    ):
+        event = Event.objects.get(name="Today's Event")
+        event.registrations.add(test_db_user, another_test_db_user)
+        registration = EventRegistration.objects.get(event=event, user=test_db_user)
+        url = reverse("admin:event_eventregistration_delete", args=[registration.pk])
+        response = admin_client.post(url, {"post": "yes"})
+        assert response.status_code == 302
+        event.refresh_from_db()
+        assert event.registrations_count == 1
+
+    def test_admin_can_not_add_or_change_registrations(
+        self, admin_client, test_db_user, db_events
+    ):
+        event = Event.objects.get(name="Future Event")
+        event.registrations.add(test_db_user)
+        registration = EventRegistration.objects.get(event=event)
+        response = admin_client.get(reverse("admin:event_eventregistration_add"))
+        assert response.status_code == 403
+        url = reverse("admin:event_eventregistration_change", args=[registration.pk])
+        response = admin_client.post(url, {"event": event.pk, "user": test_db_user.pk})
+        assert response.status_code == 403
+
+
+class TestRecountRegistrationsCommand:
+    def test_recount_registrations_repairs_drift(self, db_events_with_registrations):
+        Event.objects.update(registrations_count=7)
+        call_command("recount_registrations")
+        for event in Event.objects.all():
+            expected = EventRegistration.objects.filter(event=event).count()
+            assert event.registrations_count == expected == 1
+
+    def test_recount_registrations_of_selected_events(
+        self, db_events_with_registrations
+    ):
+        first, second = db_events_with_registrations[:2]
+        Event.objects.update(registrations_count=7)
+        call_command("recount_registrations", str(first.pk))
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert first.registrations_count == 1
+        assert second.registrations_count == 7
+
+
+class TestEventQuerySet:
+    def test_today_events_covers_the_whole_local_day(self, test_db_user):
+        today = timezone.localdate()
+        day_start = timezone.make_aware(datetime.combine(today, time.min))
+        starts = {
+            "Yesterday Late": day_start - timedelta(microseconds=1),
+            "Today Early": day_start,
+            "Today Late": day_start + timedelta(days=1, microseconds=-1),
+            "Tomorrow Early": day_start + timedelta(days=1),
+        }
+        for name, start in starts.items():
+            Event.objects.create(
+                name=name, start=start, end=start, arranged_by=test_db_user
+            )
+
+        names = set(Event.events.today_events().values_list("name", flat=True))
+        assert names == {"Today Early", "Today Late"}
+
+    @pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite query plan")
+    @pytest.mark.parametrize(
+        "time_window", ["today_events", "past_events", "future_events"]
+    )
+    def test_time_window_query_uses_start_index(self, db, time_window):
+        queryset = getattr(Event.events, time_window)()
+        plan = queryset.explain()
+        assert "USING INDEX event_" in plan or "USING COVERING INDEX event_" in plan
+        assert "SCAN event_event" not in plan
+
+    @pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite query plan")
+    def test_user_events_query_uses_arranged_by_start_index(self, test_db_user):
+        plan = test_db_user.events.all().explain()
+        assert "event_arranged_by_start_idx" in plan
+
+
+class TestEventRegistrationBulkView:
+    view = EventRegistrationBulkView
+
+    def get_url(self, event_id: int):
+        return reverse(self.view.name, kwargs={"pk": event_id})
+
+    @pytest.fixture
+    def db_attendees(self, django_user_model):
+        return django_user_model.objects.bulk_create(
+            django_user_model(username=f"attendee_{i}", email=f"attendee_{i}@test.com")
+            for i in range(10)
+        )
+
+    def test_bulk_registration_is_for_staff_only(self, user_api_client, db_events):
+        url = self.get_url(event_id=1)
+        response = user_api_client.post(url, data={"users": [1]}, format="json")
+        assert response.status_code == 403
+
+    def test_bulk_registration(self, admin_api_client, db_events, db_attendees):
+        event = Event.objects.get(name="Today's Event")
+        user_ids = [user.id for user in db_attendees]
+        event.registrations.add(db_attendees[0])
+
+        url = self.get_url(event_id=event.id)
+        data = {"users": user_ids + [user_ids[1], 999]}
+        response = admin_api_client.post(url, data=data, format="json")
+        assert response.status_code == 200
+        assert response.data["added"] == user_ids[1:]
+        assert response.data["already_registered"] == user_ids[:1]
+        assert response.data["rejected"] == []
+        assert response.data["not_found"] == [999]
+
+        event.refresh_from_db()
+        assert event.registrations_count == len(user_ids)
+        assert event.registrations.count() == len(user_ids)
+
+    def test_bulk_registration_rejects_users_over_capacity(
+        self, admin_api_client, db_events, db_attendees
+    ):
+        event = Event.objects.get(name="Today's Event")
+        event.number_of_seats = 4
+        event.save()
+        event.registrations.add(db_attendees[0])
+
+        user_ids = [user.id for user in db_attendees]
+        url = self.get_url(event_id=event.id)
+        response = admin_api_client.post(url, data={"users": user_ids}, format="json")
+        assert response.status_code == 200
+        assert response.data["added"] == user_ids[1:4]
+        assert response.data["rejected"] == user_ids[4:]
+
+        event.refresh_from_db()
+        assert event.registrations_count == event.number_of_seats == 4
+        assert event.registrations.count() == 4
+
+    def test_bulk_registration_rejects_users_when_seats_are_gone(
+        self, monkeypatch, admin_api_client, db_events, db_attendees
+    ):
+        # another worker took the seats after the counter was read
+        monkeypatch.setattr(type(Event.events), "reserve_seats", lambda *args: False)
+        event = Event.objects.get(name="Today's Event")
+
+        user_ids = [user.id for user in db_attendees]
+        url = self.get_url(event_id=event.id)
+        response = admin_api_client.post(url, data={"users": user_ids}, format="json")
+        assert response.status_code == 200
+        assert response.data["added"] == []
+        assert response.data["rejected"] == user_ids
+
+        event.refresh_from_db()
+        assert event.registrations_count == 0
+        assert event.registrations.count() == 0
+
+    @pytest.mark.parametrize("count", [5, 300])
+    def test_bulk_registration_query_count_does_not_depend_on_users(
+        self, django_assert_max_num_queries, django_user_model, admin_api_client, count
+    ):
+        users = django_user_model.objects.bulk_create(
+            django_user_model(username=f"user_{i}", email=f"user_{i}@test.com")
+            for i in range(count)
+        )
+        event = Event.objects.create(
+            name="Large Event",
+            start=timezone.now() + timedelta(days=1),
+            end=timezone.now() + timedelta(days=1, hours=1),
+        )
+        url = self.get_url(event_id=event.id)
+        data = {"users": [user.id for user in users]}
+        with django_assert_max_num_queries(9):
+            response = admin_api_client.post(url, data=data, format="json")
+        assert len(response.data["added"]) == count
+
+    def test_bulk_unregistration(self, admin_api_client, db_events, db_attendees):
+        event = Event.objects.get(name="Today's Event")
+        event.registrations.add(*db_attendees[:5])
+        user_ids = [user.id for user in db_attendees]
+
+        url = self.get_url(event_id=event.id)
+        data = {"users": user_ids[3:]}
+        response = admin_api_client.delete(url, data=data, format="json")
+        assert response.status_code == 200
+        assert response.data["removed"] == user_ids[3:5]
+        assert response.data["not_registered"] == user_ids[5:]
+
+        event.refresh_from_db()
+        assert event.registrations_count == 3
+        assert event.registrations.count() == 3
+
+    def test_bulk_registration_for_missing_event(self, admin_api_client):
+        url = self.get_url(event_id=1)
+        response = admin_api_client.post(url, data={"users": [1]}, format="json")
+        assert response.status_code == 404
+
+
+class TestEventAttendeesExportView:
+    view = EventAttendeesExportView
+
+    def get_url(self, event_id: int):
+        return reverse(self.view.name, kwargs={"pk": event_id})
+
+    def test_attendees_export_unauth_access_is_not_allowed(self, api_client):
+        response = api_client.get(self.get_url(event_id=1))
+        assert response.status_code == 401
+
+    def test_attendees_export_is_for_event_owner_only(
+        self, user_api_client, db_events_of_other
+    ):
+        response = user_api_client.get(self.get_url(event_id=1))
+        assert response.status_code == 403
+
+    def test_attendees_export_csv(
+        self, another_test_db_user, user_api_client, db_events_with_registrations
+    ):
+        event = db_events_with_registrations[0]
+        response = user_api_client.get(self.get_url(event_id=event.id))
+        assert response.status_code == 200
+        assert isinstance(response, StreamingHttpResponse)
+        assert response["Content-Type"] == "text/csv"
+
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.reader(content.splitlines()))
+        assert rows == [
+            list(self.view.fields),
+            [
+                str(another_test_db_user.id),
+                another_test_db_user.username,
+                another_test_db_user.first_name,
+                another_test_db_user.last_name,
+                another_test_db_user.email,
+            ],
+        ]
+
+    def test_attendees_export_csv_escapes_formulas(
+        self, another_test_db_user, user_api_client, db_events_with_registrations
+    ):
+        another_test_db_user.first_name = '=HYPERLINK("http://example.com")'
+        another_test_db_user.last_name = "-1+2"
+        another_test_db_user.save()
+        event = db_events_with_registrations[0]
+        response = user_api_client.get(self.get_url(event_id=event.id))
+
+        content = b"".join(response.streaming_content).decode()
+        row = list(csv.reader(content.splitlines()))[1]
+        assert row[2] == '\'=HYPERLINK("http://example.com")'
+        assert row[3] == "'-1+2"
+        assert row[4] == another_test_db_user.email
+
+    def test_attendees_export_ndjson(
+        self, another_test_db_user, user_api_client, db_events_with_registrations
+    ):
+        event = db_events_with_registrations[0]
+        url = self.get_url(event_id=event.id)
+        response = user_api_client.get(url, {"output": "ndjson"})
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/x-ndjson"
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        assert [json.loads(line) for line in lines] == [
+            {
+                "user_id": another_test_db_user.id,
+                "username": another_test_db_user.username,
+                "first_name": another_test_db_user.first_name,
+                "last_name": another_test_db_user.last_name,
+                "email": another_test_db_user.email,
+            }
+        ]
+
+    def test_attendees_export_unknown_output(self, user_api_client, db_events):
+        response = user_api_client.get(self.get_url(event_id=1), {"output": "xml"})
+        assert response.status_code == 400
+
+
+class TestEventExportView:
+    view = EventExportView
+    url = reverse(view.name)
+
+    def read_events(self, response):
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/x-ndjson"
+        content = b"".join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_event_export_is_for_staff_only(self, user_api_client):
+        response = user_api_client.get(self.url)
+        assert response.status_code == 403
+
+    def test_event_export_keeps_preview_layout(
+        self, admin_api_client, db_events_with_registrations
+    ):
+        events = self.read_events(admin_api_client.get(self.url))
+        assert len(events) == len(db_events_with_registrations)
+        for event in events:
+            expected = EventPreviewSerializer(Event.objects.get(pk=event["id"])).data
+            assert event == expected
+
+    def test_event_export_updated_since(self, admin_api_client, db_events):
+        event = Event.objects.get(name="Future Event")
+        event.description = "Updated description"
+        event.save()
+
+        updated_since = drf_datetime_to_string(event.updated_on)
+        response = admin_api_client.get(self.url, {"updated_since": updated_since})
+        events = self.read_events(response)
+        assert [item["id"] for item in events] == [event.id]
+
+    def test_event_export_invalid_updated_since(self, admin_api_client):
+        response = admin_api_client.get(self.url, {"updated_since": "yesterday"})
+        assert response.status_code == 400
+
+
+class TestEventChangesView:
+    view = EventChangesView
+    url = reverse(view.name)
+
+    def get_changes(self, client, **params):
+        response = client.get(self.url, params)
+        assert response.status_code == 200
+        return response.data
+
+    @pytest.mark.skipif(connection.vendor != "postgresql", reason="advisory lock")
+    def test_change_log_writers_take_turns(self, db_events):
+        with transaction.atomic():
+            EventChange.objects.log_events([db_events[0].pk], EventChange.UPSERT)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT count(*) FROM pg_locks "
+                    "WHERE locktype = 'advisory' AND objid = %s AND granted",
+                    [CHANGE_LOG_LOCK],
+                )
+                assert cursor.fetchone()[0] == 1
+
+    def test_event_changes_are_for_staff_only(self, user_api_client):
+        response = user_api_client.get(self.url)
+        assert response.status_code == 403
+
+    def test_event_changes_record_event_writes(self, admin_api_client, db_events):
+        feed = self.get_changes(admin_api_client)
+        assert [change["id"] for change in feed["changes"]] == [
+            event.id for event in db_events
+        ]
+        for change in feed["changes"]:
+            assert change["type"] == "event"
+            assert change["action"] == "upsert"
+            expected = EventPreviewSerializer(Event.objects.get(pk=change["id"])).data
+            assert change["data"] == expected
+
+        event_id = db_events[0].id
+        db_events[0].delete()
+        feed = self.get_changes(admin_api_client, since=feed["next"])
+        assert feed["changes"] == [
+            {"seq": feed["next"], "type": "event", "action": "delete", "id": event_id}
+        ]
+        assert feed["has_more"] is False
+
+    def test_event_changes_record_registrations(
+        self, admin_api_client, test_db_user, db_events
+    ):
+        since = self.get_changes(admin_api_client)["next"]
+        event = Event.objects.get(name="Future Event")
+        event.registrations.add(test_db_user)
+
+        changes = self.get_changes(admin_api_client, since=since)["changes"]
+        assert [(change["type"], change["action"]) for change in changes] == [
+            ("registration", "upsert"),
+            ("event", "upsert"),
+        ]
+        assert changes[0]["event"] == event.id
+        assert changes[0]["user"] == test_db_user.id
+        assert changes[1]["data"]["registrations_count"] == 1
+
+        event.registrations.remove(test_db_user)
+        changes = self.get_changes(admin_api_client, since=since)["changes"]
+        assert changes[0]["action"] == "delete"
+        assert changes[1]["data"]["registrations_count"] == 0
+
+    def test_event_changes_record_user_deletion(
+        self, admin_api_client, test_db_user, db_events
+    ):
+        event = Event.objects.get(name="Future Event")
+        event.registrations.add(test_db_user)
+        since = self.get_changes(admin_api_client)["next"]
+        user_id = test_db_user.id
+        test_db_user.delete()
+
+        event.refresh_from_db()
+        assert event.registrations_count == 0
+        changes = self.get_changes(admin_api_client, since=since)["changes"]
+        registrations = [c for c in changes if c["type"] == "registration"]
+        assert [(c["action"], c["event"], c["user"]) for c in registrations] == [
+            ("delete", event.id, user_id)
+        ]
+
+    def test_event_changes_keep_latest_change_only(self, admin_api_client, db_events):
+        event = db_events[0]
+        for number_of_seats in range(5):
+            event.number_of_seats = number_of_seats
+            event.save()
+
+        changes = self.get_changes(admin_api_client)["changes"]
+        assert len(changes) == len(db_events)
+        assert changes[-1]["id"] == event.id
+        assert changes[-1]["seq"] == EventChange.objects.order_by("pk").last().pk
+
+    def test_event_changes_limit(self, admin_api_client, db_events):
+        feed = self.get_changes(admin_api_client, limit=3)
+        assert len(feed["changes"]) == 3
+        assert feed["has_more"] is True
+
+        feed = self.get_changes(admin_api_client, since=feed["next"], limit=3)
+        assert len(feed["changes"]) == len(db_events) - 3
+        assert feed["has_more"] is False
+
+    def test_event_changes_invalid_params(self, admin_api_client):
+        for params in ({"since": -1}, {"limit": 0}, {"limit": 1001}):
+            response = admin_api_client.get(self.url, params)
+            assert response.status_code == 400
+
+    def test_event_changes_before_horizon_are_gone(self, admin_api_client, db_events):
+        EventChange.objects.update(created_on=timezone.now() - timedelta(days=31))
+        call_command("compact_changes", "--retention-days", "30")
+
+        response = admin_api_client.get(self.url, {"since": 0})
+        assert response.status_code == 410
+        horizon = response.data["horizon"]
+
+        feed = self.get_changes(admin_api_client, since=horizon)
+        assert feed["changes"] == []
+        assert feed["next"] == horizon
+
+
+class TestCompactChangesCommand:
+    def test_compact_changes_drops_superseded_changes(self, test_db_user, db_events):
+        event = db_events[0]
+        event.registrations.add(test_db_user)
+        event.registrations.remove(test_db_user)
+        event.save()
+        call_command("compact_changes")
+
+        changes = EventChange.objects.values_list("kind", "action", "event_id")
+        assert sorted(changes) == sorted(
+            [("event", "upsert", event.id) for event in db_events]
+            + [("registration", "delete", event.id)]
+        )
+
+    def test_compact_changes_keeps_recent_changes(self, db_events):
+        call_command("compact_changes", "--retention-days", "1")
+        assert EventChange.objects.count() == len(db_events)
+        assert not EventChange.objects.filter(kind=EventChange.HORIZON).exists()
+
+    def test_compact_changes_removes_expired_changes(self, db_events):
+        expired = EventChange.objects.order_by("pk")[:2]
+        last_expired = expired[1].pk
+        EventChange.objects.filter(pk__lte=last_expired).update(
+            created_on=timezone.now() - timedelta(days=2)
+        )
+        call_command("compact_changes", "--retention-days", "1")
+
+        horizon = EventChange.objects.get(kind=EventChange.HORIZON)
+        assert horizon.pk == last_expired
+        assert EventChange.objects.exclude(kind=EventChange.HORIZON).count() == 2
+
+
+class TestEventSeatStreamView:
+    view = EventSeatStreamView
+    url = reverse(view.name)
+
+    @pytest.fixture(autouse=True)
+    def stream_settings(self, settings):
+        settings.SEAT_STREAM_POLL_INTERVAL = 0.01
+        settings.SEAT_STREAM_KEEPALIVE = 0.2
+        settings.SEAT_STREAM_MAX_AGE = 0.5
+
+    def get_headers(self, user):
+        refresh = UserStateRefreshToken.for_user(user)
+        return {"authorization": f"Bearer {refresh.access_token}"}
+
+    def read_messages(self, content):
+        messages = []
+        for block in content.strip().split("\n\n"):
+            fields = dict(line.split(": ", 1) for line in block.splitlines())
+            if "data" in fields:
+                fields["data"] = json.loads(fields["data"])
+                messages.append(fields)
+        return messages
+
+    @async_to_sync
+    async def get(self, params, headers=None):
+        return await AsyncClient().get(self.url, params, headers=headers)
+
+    @async_to_sync
+    async def read_stream(self, params, headers, on_snapshot=None):
+        response = await AsyncClient().get(self.url, params, headers=headers)
+        assert response.status_code == 200
+        assert response["Content-Type"] == "text/event-stream"
+
+        content = ""
+        async for chunk in response.streaming_content:
+            content += chunk.decode()
+            if on_snapshot is not None and "data: " in content:
+                await sync_to_async(on_snapshot)()
+                on_snapshot = None
+        return content
+
+    def test_seat_stream_unauth_access_is_not_allowed(self):
+        response = self.get({"events": 1})
+        assert response.status_code == 401
+
+    def test_seat_stream_requires_asgi(self, user_api_client):
+        response = user_api_client.get(self.url, {"events": 1})
+        assert response.status_code == 501
+
+    def test_seat_stream_invalid_events(self, test_db_user):
+        headers = self.get_headers(test_db_user)
+        for params in ({}, {"events": "abc"}, {"events": list(range(1, 102))}):
+            response = self.get(params, headers)
+            assert response.status_code == 400
+
+    def test_seat_stream_sends_snapshot_and_updates(
+        self, another_test_db_user, test_db_user, db_events
+    ):
+        event = Event.objects.get(name="Future Event")
+        unpublished = Event.objects.get(name="Unpublished Event")
+
+        def register():
+            event.registrations.add(another_test_db_user)
+
+        content = self.read_stream(
+            {"events": [event.id, unpublished.id]},
+            self.get_headers(test_db_user),
+            on_snapshot=register,
+        )
+        messages = self.read_messages(content)
+        assert messages[0] == {
+            "event": "seats",
+            "data": {
+                "id": event.id,
+                "number_of_seats": 1,
+                "registrations_count": 0,
+                "available_seats": 1,
+            },
+        }
+        assert messages[-1]["data"]["registrations_count"] == 1
+        assert messages[-1]["data"]["available_seats"] == 0
+        assert int(messages[-1]["id"]) == EventChange.objects.latest("pk").pk
+        assert ": keepalive" in content
+        assert not seat_broadcaster.subscribers
+        assert seat_broadcaster.task is None
+
+    def test_seat_stream_reports_removed_events(self, test_db_user, db_events):
+        event = Event.objects.get(name="Future Event")
+        event_id = event.id
+
+        content = self.read_stream(
+            {"events": event_id}, self.get_headers(test_db_user), event.delete
+        )
+        messages = self.read_messages(content)
+        assert messages[-1] == {
+            "id": messages[-1]["id"],
+            "event": "removed",
+            "data": {"id": event_id, "removed": True},
+        }
+
+    def test_seat_broadcaster_keeps_polling_after_errors(self, settings, caplog):
+        settings.SEAT_STREAM_POLL_INTERVAL = 0
+        broadcaster = SeatBroadcaster()
+        polls = []
+
+        async def poll():
+            polls.append(None)
+            if len(polls) == 1:
+                raise OperationalError("database is locked")
+
+        broadcaster.poll = poll
+
+        @async_to_sync
+        async def run():
+            task = asyncio.get_running_loop().create_task(broadcaster.run())
+            while len(polls) < 3:
+                await asyncio.sleep(0)
+            task.cancel()
+
+        run()
+        assert "Polling the seat changes failed" in caplog.text
+
+
+class TestAsyncReadViews:
+    views = [
+        (AsyncEventListCreateView, {}),
+        (AsyncEventRetrieveUpdateDestroyView, {"pk": 1}),
+        (AsyncUserEventsView, {}),
+        (AsyncUserRegistrationsListView, {}),
+    ]
+
+    @async_to_sync
+    async def call(self, view, method="get", data=None, headers=None, **kwargs):
+        url = reverse(view.name, kwargs=kwargs)
+        factory = AsyncRequestFactory()
+        if method == "get":
+            request = factory.get(url, data, headers=headers)
+        else:
+            request = factory.post(
+                url, data, content_type="application/json", headers=headers
+            )
+        return await view.as_view()(request, **kwargs)
+
+    def get_headers(self, user):
+        refresh = UserStateRefreshToken.for_user(user)
+        return {"authorization": f"Bearer {refresh.access_token}"}
+
+    def test_async_view_without_its_handlers_is_not_built(self):
+        class IncompleteView(AsyncConditionalGetMixin, EventListCreateView):
+            pass
+
+        with pytest.raises(TypeError, match="aget_validators, aserve"):
+            IncompleteView.as_view()
+
+    @pytest.mark.parametrize("view, kwargs", views)
+    @pytest.mark.parametrize("params", [{}, {"include": "registrations"}])
+    def test_async_view_matches_sync_view(
+        self,
+        user_api_client,
+        test_db_user,
+        db_events_of_owner_with_registrations,
+        view,
+        kwargs,
+        params,
+    ):
+        expected = user_api_client.get(reverse(view.name, kwargs=kwargs), params)
+        response = self.call(
+            view, data=params, headers=self.get_headers(test_db_user), **kwargs
+        )
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/json"
+        assert response["ETag"] == expected["ETag"]
+        assert json.loads(response.content) == expected.json()
+
+    @pytest.mark.parametrize("view, kwargs", views)
+    def test_async_view_conditional_get(
+        self, test_db_user, db_events_of_owner_with_registrations, view, kwargs
+    ):
+        headers = self.get_headers(test_db_user)
+        response = self.call(view, headers=headers, **kwargs)
+        headers["if-none-match"] = response["ETag"]
+        response = self.call(view, headers=headers, **kwargs)
+        assert response.status_code == 304
+        assert response.content == b""
+
+    @pytest.mark.parametrize("view, kwargs", views)
+    def test_async_view_unauth_access_is_not_allowed(self, db_events, view, kwargs):
+        response = self.call(view, **kwargs)
+        assert response.status_code == 401
+
+    def test_async_detail_view_not_found(self, test_db_user):
+        view = AsyncEventRetrieveUpdateDestroyView
+        response = self.call(view, headers=self.get_headers(test_db_user), pk=1)
+        assert response.status_code == 404
+
+    def test_async_list_view_query_count(
+        self, django_assert_num_queries, test_db_user, db_events_with_registrations
+    ):
+        # ETag aggregate, page and registrations of the page
+        with django_assert_num_queries(3):
+            response = self.call(
+                AsyncEventListCreateView,
+                data={"include": "registrations"},
+                headers=self.get_headers(test_db_user),
+            )
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize("view, kwargs", views)
+    def test_async_view_does_not_block_the_event_loop(
+        self, monkeypatch, test_db_user, db_events, view, kwargs
+    ):
+        backend = caches["default"]
+
+        def blocking(method):
+            def call(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    return method(*args, **kwargs)
+                raise AssertionError("a blocking cache call in the event loop")
+
+            return call
+
+        for name in ("get", "set", "add", "incr"):
+            monkeypatch.setattr(backend, name, blocking(getattr(backend, name)))
+        response = self.call(view, headers=self.get_headers(test_db_user), **kwargs)
+        assert response.status_code in (200, 404)
+
+    def test_async_view_passes_writes_to_sync_view(self, test_db_user):
+        data = {
+            "name": "Async Event",
+            "start": drf_datetime_to_string(timezone.now() + timedelta(days=1)),
+            "end": drf_datetime_to_string(timezone.now() + timedelta(days=2)),
+        }
+        response = self.call(
+            AsyncEventListCreateView,
+            method="post",
+            data=data,
+            headers=self.get_headers(test_db_user),
+        )
+        assert response.status_code == 201
+        assert Event.objects.filter(name="Async Event").exists()
@@ -0,0 +1,337 @@
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+from django.utils import timezone
+
+from auth.tokens import UserStateRefreshToken
+
+from .. import urls
+from ..models import EventChange
+
+ROUTES = {
+    "event_list_create_view": ("GET", "POST"),
+    "event_bulk_create_view": ("POST",),
+    "event_export_view": ("GET",),
+    "event_list_cache_stats_view": ("GET",),
+    "event_retrieve_update_destroy_view": ("GET", "PUT", "PATCH", "DELETE"),
+    "event_registration_bulk_view": ("POST", "DELETE"),
+    "event_attendees_export_view": ("GET",),
+    "event_changes_view": ("GET",),
+    "event_seat_stream_view": ("GET",),
+    "user_events_view": ("GET",),
+    "user_registrations_view": ("GET",),
+    "user_event_registration_view": ("POST", "DELETE"),
+}
+
+
+def get_event_data(name):
+    start = timezone.now() + timedelta(days=1)
+    return {
+        "name": name,
+        "start": start.isoformat(),
+        "end": (start + timedelta(hours=2)).isoformat(),
+        "number_of_seats": 100,
+    }
+
+
+def read(response):
+    if response.streaming:
+        return b"".join(response.streaming_content)
+    return response.content
+
+
+def test_every_route_has_a_query_bound():
+    names = {pattern.name for pattern in urls.urlpatterns}
+    assert names == set(ROUTES)
+
+
+class TestEventListQueries:
+    url = reverse("event_list_create_view")
+
+    @pytest.mark.parametrize("params", [{}, {"include": "registrations"}])
+    def test_list(
+        self,
+        count_queries,
+        create_users,
+        create_event,
+        user_api_client,
+        params,
+        row_counts,
+        assert_bounded,
+    ):
+        counts = []
+        for rows in row_counts:
+            users = create_users(rows)
+            for _ in range(rows):
+                create_event(registrants=users)
+            counts.append(count_queries(user_api_client.get, self.url, params))
+        # ETag aggregate, page, registrations of the page
+        assert_bounded(counts, 3)
+
+    def test_create(
+        self, count_queries, create_event, user_api_client, row_counts, assert_bounded
+    ):
+        counts = []
+        for rows in row_counts:
+            for _ in range(rows):
+                create_event()
+            data = get_event_data(f"New Event {rows}")
+            counts.append(count_queries(user_api_client.post, self.url, data))
+        assert_bounded(counts, 4)
+
+    def test_bulk_create(
+        self, count_queries, user_api_client, row_counts, assert_bounded
+    ):
+        url = reverse("event_bulk_create_view")
+        counts = []
+        for rows in row_counts:
+            data = [get_event_data(f"Bulk {rows} {i}") for i in range(rows)]
+            counts.append(
+                count_queries(user_api_client.post, url, data=data, format="json")
+            )
+        assert_bounded(counts, 5)
+
+    def test_export(
+        self, count_queries, create_event, admin_api_client, row_counts, assert_bounded
+    ):
+        url = reverse("event_export_view")
+        counts = []
+        for rows in row_counts:
+            for _ in range(rows):
+                create_event()
+            counts.append(count_queries(lambda: read(admin_api_client.get(url))))
+        assert_bounded(counts, 1)
+
+    def test_cache_stats(self, count_queries, admin_api_client):
+        url = reverse("event_list_cache_stats_view")
+        assert count_queries(admin_api_client.get, url) == 0
+
+    def test_changes(
+        self,
+        count_queries,
+        create_users,
+        create_event,
+        admin_api_client,
+        row_counts,
+        assert_bounded,
+    ):
+        url = reverse("event_changes_view")
+        counts = []
+        for rows in row_counts:
+            EventChange.objects.all().delete()
+            users = create_users(rows)
+            for _ in range(rows):
+                create_event(registrants=users)
+            counts.append(count_queries(admin_api_client.get, url))
+        # horizon, change records, upserted events
+        assert_bounded(counts, 3)
+
+
+class TestEventDetailQueries:
+    def get_url(self, event):
+        return reverse("event_retrieve_update_destroy_view", kwargs={"pk": event.pk})
+
+    def test_retrieve(
+        self,
+        count_queries,
+        create_users,
+        create_event,
+        user_api_client,
+        row_counts,
+        assert_bounded,
+    ):
+        counts = []
+        for rows in row_counts:
+            event = create_event(registrants=create_users(rows))
+            params = {"include": "registrations"}
+            counts.append(
+                count_queries(user_api_client.get, self.get_url(event), params)
+            )
+        # updated_on for the ETag, event, registrations
+        assert_bounded(counts, 3)
+
+    @pytest.mark.parametrize("method", ["put", "patch"])
+    def test_update(
+        self,
+        count_queries,
+        create_users,
+        create_event,
+        user_api_client,
+        method,
+        row_counts,
+        assert_bounded,
+    ):
+        counts = []
+        for rows in row_counts:
+            event = create_event(registrants=create_users(rows))
+            data = get_event_data(event.name)
+            request = getattr(user_api_client, method)
+            counts.append(count_queries(request, self.get_url(event), data))
+        assert_bounded(counts, 5)
+
+    def test_delete(
+        self,
+        count_queries,
+        create_users,
+        create_event,
+        user_api_client,
+        row_counts,
+        assert_bounded,
+    ):
+        counts = []
+        for rows in row_counts:
+            event = create_event(registrants=create_users(rows))
+            counts.append(count_queries(user_api_client.delete, self.get_url(event)))
+        assert_bounded(counts, 6)
+
+    def test_attendees_export(
+        self,
+        count_queries,
+        create_users,
+        create_event,
+        user_api_client,
+        row_counts,
+        assert_bounded,
+    ):
+        counts = []
+        for rows in row_counts:
+            event = create_event(registrants=create_users(rows))
+            url = reverse("event_attendees_export_view", kwargs={"pk": event.pk})
+            counts.append(count_queries(lambda: read(user_api_client.get(url))))
+        # event for the permission check, attendees
+        assert_bounded(counts, 2)
+
+
+class TestEventRegistrationQueries:
+    def test_bulk_register(
+        self,
+        count_queries,
+        create_users,
+        create_event,
+        admin_api_client,
+        row_counts,
+        assert_bounded,
+    ):
+        counts = []
+        for rows in row_counts:
+            event = create_event(registrants=create_users(rows))
+            url = reverse("event_registration_bulk_view", kwargs={"pk": event.pk})
+            data = {"users": [user.pk for user in create_users(rows)]}
+            counts.append(
+                count_queries(admin_api_client.post, url, data=data, format="json")
+            )
+        assert_bounded(counts, 8)
+
+    def test_bulk_unregister(
+        self,
+        count_queries,
+        create_users,
+        create_event,
+        admin_api_client,
+        row_counts,
+        assert_bounded,
+    ):
+        counts = []
+        for rows in row_counts:
+            users = create_users(rows)
+            event = create_event(registrants=users)
+            url = reverse("event_registration_bulk_view", kwargs={"pk": event.pk})
+            data = {"users": [user.pk for user in users]}
+            counts.append(
+                count_queries(admin_api_client.delete, url, data=data, format="json")
+            )
+        assert_bounded(counts, 8)
+
+    def test_register(
+        self,
+        count_queries,
+        create_users,
+        create_event,
+        test_db_user,
+        user_api_client,
+        row_counts,
+        assert_bounded,
+    ):
+        counts = []
+        for rows in row_counts:
+            event = create_event(registrants=create_users(rows))
+            url = reverse("user_event_registration_view", kwargs={"event_id": event.pk})
+            counts.append(count_queries(user_api_client.post, url))
+        assert_bounded(counts, 6)
+
+    def test_unregister(
+        self,
+        count_queries,
+        create_users,
+        create_event,
+        test_db_user,
+        user_api_client,
+        row_counts,
+        assert_bounded,
+    ):
+        counts = []
+        for rows in row_counts:
+            event = create_event(registrants=create_users(rows) + [test_db_user])
+            url = reverse("user_event_registration_view", kwargs={"event_id": event.pk})
+            counts.append(count_queries(user_api_client.delete, url))
+        assert_bounded(counts, 7)
+
+
+class TestUserEventsQueries:
+    @pytest.mark.parametrize("name", ["user_events_view", "user_registrations_view"])
+    def test_list(
+        self,
+        count_queries,
+        create_users,
+        create_event,
+        test_db_user,
+        user_api_client,
+        name,
+        row_counts,
+        assert_bounded,
+    ):
+        counts = []
+        for rows in row_counts:
+            users = create_users(rows) + [test_db_user]
+            for _ in range(rows):
+                create_event(registrants=users)
+            params = {"include": "registrations"}
+            counts.append(count_queries(user_api_client.get, reverse(name), params))
+        # ETag aggregate, page, registrations of the page
+        assert_bounded(counts, 3)
+
+
+class TestEventSeatStreamQueries:
+    @pytest.fixture(autouse=True)
+    def stream_settings(self, settings):
+        # the stream ends before the change log is polled
+        settings.SEAT_STREAM_POLL_INTERVAL = 10
+        settings.SEAT_STREAM_KEEPALIVE = 0.1
+        settings.SEAT_STREAM_MAX_AGE = 0.1
+
+    @async_to_sync
+    async def read_stream(self, params, headers):
+        response = await AsyncClient().get(
+            reverse("event_seat_stream_view"), params, headers=headers
+        )
+        return [chunk async for chunk in response.streaming_content]
+
+    def test_stream(
+        self, count_queries, create_event, test_db_user, row_counts, assert_bounded
+    ):
+        refresh = UserStateRefreshToken.for_user(test_db_user)
+        headers = {"authorization": f"Bearer {refresh.access_token}"}
+        counts = []
+        for rows in row_counts:
+            events = [create_event() for _ in range(rows)]
+            params = {"events": [event.pk for event in events]}
+            chunks = []
+            counts.append(
+                count_queries(lambda: chunks.extend(self.read_stream(params, headers)))
+            )
+            assert sum(chunk.startswith(b"event: seats") for chunk in chunks) == rows
+        # last change record for the broadcaster, seats of the events
+        assert_bounded(counts, 2)
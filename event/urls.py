@@ -1,24 +1,79 @@
+from django.conf import settings
 from django.urls import path
 
 from .views import (
+    AsyncEventListCreateView,
+    AsyncEventRetrieveUpdateDestroyView,
+    AsyncUserEventsView,
+    AsyncUserRegistrationsListView,
+    EventAttendeesExportView,
+    EventBulkCreateView,
+    EventChangesView,
+    EventExportView,
+    EventListCacheStatsView,
     EventListCreateView,
+    EventRegistrationBulkView,
     EventRetrieveUpdateDestroyView,
+    EventSeatStreamView,
     UserEventRegistrationView,
     UserEventsView,
     UserRegistrationsListView,
 )
 
+
+def as_read_view(view_class, async_view_class):
+    # under ASGI the GET requests of the read-only views run as coroutines
+    return (async_view_class if settings.ASYNC_VIEWS else view_class).as_view()
+
+
 urlpatterns = [
-    path("events/", EventListCreateView.as_view(), name=EventListCreateView.name),
+    path(
+        "events/",
+        as_read_view(EventListCreateView, AsyncEventListCreateView),
+        name=EventListCreateView.name,
+    ),
+    path(
+        "events/bulk/",
+        EventBulkCreateView.as_view(),
+        name=EventBulkCreateView.name,
+    ),
+    path("events/export/", EventExportView.as_view(), name=EventExportView.name),
+    path(
+        "events/cache/",
+        EventListCacheStatsView.as_view(),
+        name=EventListCacheStatsView.name,
+    ),
+    path(
+        "events/seats/",
+        EventSeatStreamView.as_view(),
+        name=EventSeatStreamView.name,
+    ),
     path(
         "events/<int:pk>/",
-        EventRetrieveUpdateDestroyView.as_view(),
+        as_read_view(
+            EventRetrieveUpdateDestroyView, AsyncEventRetrieveUpdateDestroyView
+        ),
         name=EventRetrieveUpdateDestroyView.name,
     ),
-    path("me/events/", UserEventsView.as_view(), name=UserEventsView.name),
+    path(
+        "events/<int:pk>/registrations/",
+        EventRegistrationBulkView.as_view(),
+        name=EventRegistrationBulkView.name,
+    ),
+    path(
+        "events/<int:pk>/attendees/",
+        EventAttendeesExportView.as_view(),
+        name=EventAttendeesExportView.name,
+    ),
+    path("changes/", EventChangesView.as_view(), name=EventChangesView.name),
+    path(
+        "me/events/",
+        as_read_view(UserEventsView, AsyncUserEventsView),
+        name=UserEventsView.name,
+    ),
     path(
         "me/registrations/",
-        UserRegistrationsListView.as_view(),
+        as_read_view(UserRegistrationsListView, AsyncUserRegistrationsListView),
         name=UserRegistrationsListView.name,
     ),
     path(
@@ -1,29 +1,90 @@
-import math
+import asyncio
+import json
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.views import View
 from rest_framework import filters, generics, permissions, status, views, viewsets
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    ValidationError,
+)
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from .models import Event
+from auth.authentication import StatelessJWTAuthentication
+from config.replicas import ReplicaReadMixin
+from monitoring.metrics import registration_attempts, registration_rejections
+
+from .broadcast import get_event_seats, seat_broadcaster
+from .cache import (
+    EVENT_LIST_PIN_KEY,
+    bump_event_list_version,
+    get_cached_event_list,
+    get_cached_event_list_validators,
+    get_event_list_cache_key,
+    get_event_list_cache_stats,
+    get_event_list_version,
+    set_cached_event_list,
+    set_cached_event_list_validators,
+)
+from .export import EVENT_FIELDS, STREAMS, format_event_rows
+from .mixins import (
+    AsyncListMixin,
+    AsyncRetrieveMixin,
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
+)
+from .models import Event, EventChange, EventRegistration
+from .pagination import EventCursorPagination
 from .permissions import IsOwner
-from .serializers import EventPreviewSerializer, EventSerializer
+from .serializers import (
+    EventBulkSerializer,
+    EventChangesQuerySerializer,
+    EventExportQuerySerializer,
+    EventPreviewSerializer,
+    EventRegistrationBulkSerializer,
+    EventSeatStreamQuerySerializer,
+    EventSerializer,
+)
 
 User = get_user_model()
 
 
-class EventListCreateView(generics.ListCreateAPIView):
+def get_error_code(exc):
+    # the first code of an error, e.g. {"registration error": "registration_is_over"}
+    if isinstance(exc, Http404):
+        return "not_found"
+    if not isinstance(exc, APIException):
+        return "error"
+    codes = exc.get_codes()
+    if isinstance(codes, dict):
+        codes = next(iter(codes.values()), None)
+    if isinstance(codes, list):
+        codes = codes[0] if codes else None
+    return codes if isinstance(codes, str) else exc.default_code
+
+
+class EventListCreateView(
+    ReplicaReadMixin, ConditionalListMixin, generics.ListCreateAPIView
+):
     name = "event_list_create_view"
+    replica_pin_keys = (EVENT_LIST_PIN_KEY,)
     serializer_class = EventSerializer
     preview_serializer_class = EventPreviewSerializer
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (StatelessJWTAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = EventCursorPagination
     filter_backends = [filters.OrderingFilter, filters.SearchFilter]
     search_fields = ["^start"]
-    ordering = ["-start"]
+    ordering_fields = ["start", "end", "name", "created_on", "updated_on", "id"]
+    ordering = ["-start", "-end", "-id"]
 
     def get_queryset(self):
         qs = Event.events.all()
@@ -38,7 +99,7 @@ class EventListCreateView(generics.ListCreateAPIView):
             qs = qs
         else:
             qs = Event.events.published_events()
-        return qs.select_related("arranged_by").prefetch_related("registrations")
+        return qs
 
     def get_serializer(self, *args, **kwargs):
         serializer_class = self.get_serializer_class()
@@ -48,13 +109,74 @@ class EventListCreateView(generics.ListCreateAPIView):
         kwargs.setdefault("context", self.get_serializer_context())
         return serializer_class(*args, **kwargs)
 
+    def get_validators(self):
+        cache_key = get_event_list_cache_key(self.request)
+        validators = get_cached_event_list_validators(cache_key)
+        if validators is None:
+            validators = super().get_validators()
+            set_cached_event_list_validators(cache_key, validators)
+        return validators
+
+    def list(self, request, *args, **kwargs):
+        # The listing is the same for every user, pages are cached per query
+        # string until the next Event or EventRegistration change
+        cache_key = get_event_list_cache_key(request)
+        data = get_cached_event_list(cache_key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        set_cached_event_list(cache_key, response.data)
+        return response
+
+
+class EventBulkCreateView(generics.CreateAPIView):
+    name = "event_bulk_create_view"
+    serializer_class = EventBulkSerializer
+    authentication_classes = (StatelessJWTAuthentication,)
+    permission_classes = (permissions.IsAuthenticated,)
+    max_batch_length = 500
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(many=True, allow_empty=False, max_length=self.max_batch_length)
+        return super().get_serializer(*args, **kwargs)
+
+    def perform_create(self, serializer):
+        try:
+            with transaction.atomic():
+                events = serializer.save()
+                # bulk_create sends no post_save signals
+                EventChange.objects.log_events(
+                    [event.pk for event in events],
+                    EventChange.UPSERT,
+                    batch_size=serializer.batch_size,
+                )
+        except IntegrityError:
+            # a conflicting event was created after the names were checked
+            message = "Event names must be unique, please retry the import."
+            raise ValidationError(detail={"import error": message})
+        bump_event_list_version()
+
 
-class EventRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class EventListCacheStatsView(views.APIView):
+    name = "event_list_cache_stats_view"
+    authentication_classes = (StatelessJWTAuthentication,)
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request, *args, **kwargs):
+        data = get_event_list_cache_stats()
+        data["version"] = get_event_list_version()
+        return Response(data=data)
+
+
+class EventRetrieveUpdateDestroyView(
+    ReplicaReadMixin, ConditionalRetrieveMixin, generics.RetrieveUpdateDestroyAPIView
+):
     name = "event_retrieve_update_destroy_view"
     serializer_class = EventSerializer
     preview_serializer_class = EventPreviewSerializer
     queryset = Event.objects.all()
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (StatelessJWTAuthentication,)
     permission_classes = (IsOwner,)
     preview_permission_classes = (permissions.IsAuthenticated,)
 
@@ -73,52 +195,62 @@ class EventRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         return serializer_class(*args, **kwargs)
 
 
-class UserEventsView(generics.ListAPIView):
+class UserEventsView(ReplicaReadMixin, ConditionalListMixin, generics.ListAPIView):
     name = "user_events_view"
     serializer_class = EventPreviewSerializer
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (StatelessJWTAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = EventCursorPagination
 
     def get_queryset(self):
         user_id = self.request.user.id
-        user = get_object_or_404(User.objects.all(), pk=user_id)
-        return (
-            user.events.all()
-            .select_related("arranged_by")
-            .prefetch_related("registrations")
-        )
+        return Event.objects.filter(arranged_by_id=user_id)
 
 
-class UserRegistrationsListView(generics.ListAPIView):
+class UserRegistrationsListView(
+    ReplicaReadMixin, ConditionalListMixin, generics.ListAPIView
+):
     name = "user_registrations_view"
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (StatelessJWTAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = EventCursorPagination
     serializer_class = EventPreviewSerializer
 
     def get_queryset(self):
         user_id = self.request.user.id
-        user = get_object_or_404(User.objects.all(), pk=user_id)
-        return (
-            user.registrations.all()
-            .select_related("arranged_by")
-            .prefetch_related("registrations")
-        )
+        return Event.objects.filter(eventregistration__user_id=user_id)
 
 
 class UserEventRegistrationView(views.APIView):
     name = "user_event_registration_view"
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (StatelessJWTAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = EventSerializer
 
-    def post(self, args, **kwargs):
-        user_id = self.request.user.id
-        user = get_object_or_404(User.objects.all(), pk=user_id)
+    def initial(self, request, *args, **kwargs):
+        if request.method == "POST":
+            registration_attempts.inc(view=self.name)
+        super().initial(request, *args, **kwargs)
+
+    def handle_exception(self, exc):
+        if self.request.method == "POST":
+            reason = get_error_code(exc)
+            registration_rejections.inc(view=self.name, reason=reason)
+        return super().handle_exception(exc)
+
+    def post(self, request, *args, **kwargs):
+        user_id = request.user.id
         event_id = self.kwargs["event_id"]
-        event = get_object_or_404(Event.objects.all(), pk=event_id)
+        is_registered = EventRegistration.objects.filter(
+            event=OuterRef("pk"), user_id=user_id
+        )
+        queryset = Event.objects.only(
+            "name", "start", "registration_deadline", "is_published"
+        ).annotate(is_registered=Exists(is_registered))
+        event = get_object_or_404(queryset, pk=event_id)
 
         # user is already registered for the event
-        if user in event.registrations.all():
+        if event.is_registered:
             message = "You are already registered for this event"
             raise ValidationError(
                 detail={"registration error": message},
@@ -145,24 +277,399 @@ class UserEventRegistrationView(views.APIView):
                 code="registration_for_unpublished_event",
             )
 
-        # event is fully booked
-        seats_available = event.number_of_seats or math.inf
-        if event.total_registrations >= seats_available:
-            message = "No more registrations accepted, event is fully booked"
+        # event is fully booked: the seat is taken by a conditional UPDATE, so
+        # concurrent registrations can not oversell the event
+        try:
+            with transaction.atomic():
+                if not Event.events.reserve_seats(event.pk):
+                    message = "No more registrations accepted, event is fully booked"
+                    raise ValidationError(
+                        detail={"registration error": message},
+                        code="registration_for_fully_booked_event",
+                    )
+                EventRegistration.objects.create(event_id=event.pk, user_id=user_id)
+        except IntegrityError:
+            message = "You are already registered for this event"
             raise ValidationError(
                 detail={"registration error": message},
-                code="registration_for_fully_booked_event",
+                code="registration_already_exists",
             )
 
-        event.registrations.add(user)
         message = f"Your are registered for the event: {event.name}."
         return Response(data={"message": message}, status=status.HTTP_201_CREATED)
 
-    def delete(self, args, **kwargs):
-        user_id = self.request.user.id
-        user = get_object_or_404(User.objects.all(), pk=user_id)
+    def delete(self, request, *args, **kwargs):
+        user_id = request.user.id
         event_id = self.kwargs["event_id"]
-        event = get_object_or_404(Event.objects.all(), pk=event_id)
-        event.registrations.remove(user)
+        event = get_object_or_404(Event.objects.only("name"), pk=event_id)
+        with transaction.atomic():
+            deleted, _ = EventRegistration.objects.filter(
+                event_id=event.pk, user_id=user_id
+            ).delete()
+            if deleted:
+                Event.events.release_seats(event.pk)
+                EventChange.objects.log_registrations(
+                    [(event.pk, user_id)], EventChange.DELETE
+                )
         message = f"Your registration is cancelled: {event.name}."
         return Response(data={"message": message}, status=status.HTTP_204_NO_CONTENT)
+
+
+class EventRegistrationBulkView(views.APIView):
+    name = "event_registration_bulk_view"
+    authentication_classes = (StatelessJWTAuthentication,)
+    permission_classes = (permissions.IsAdminUser,)
+    serializer_class = EventRegistrationBulkSerializer
+
+    def get_user_ids(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data["users"]
+
+    def post(self, request, *args, **kwargs):
+        user_ids = self.get_user_ids(request)
+        event_id = self.kwargs["pk"]
+
+        with transaction.atomic():
+            # the event row stays locked until the registrations are inserted,
+            # so the capacity is checked only once
+            queryset = Event.objects.select_for_update().only(
+                "number_of_seats", "registrations_count"
+            )
+            event = get_object_or_404(queryset, pk=event_id)
+            existing = set(
+                User.objects.filter(pk__in=user_ids).values_list("pk", flat=True)
+            )
+            registered = set(
+                EventRegistration.objects.filter(
+                    event_id=event.pk, user_id__in=user_ids
+                ).values_list("user_id", flat=True)
+            )
+            candidates = [
+                user_id
+                for user_id in user_ids
+                if user_id in existing and user_id not in registered
+            ]
+
+            if event.number_of_seats > 0:
+                free_seats = max(event.number_of_seats - event.registrations_count, 0)
+            else:
+                free_seats = len(candidates)
+            added, rejected = candidates[:free_seats], candidates[free_seats:]
+            # the conditional update fails if the counter moved after it was
+            # read, e.g. on SQLite where select_for_update() locks nothing
+            if added and not Event.events.reserve_seats(event.pk, len(added)):
+                added, rejected = [], candidates
+
+            if added:
+                # the locked event row keeps the registrations checked above
+                # current, a conflict here is an error and rolls back the seats
+                EventRegistration.objects.bulk_create(
+                    [
+                        EventRegistration(event_id=event.pk, user_id=user_id)
+                        for user_id in added
+                    ]
+                )
+                # bulk_create sends no post_save signals
+                EventChange.objects.log_registrations(
+                    [(event.pk, user_id) for user_id in added], EventChange.UPSERT
+                )
+                bump_event_list_version()
+
+        data = {
+            "added": added,
+            "already_registered": [
+                user_id for user_id in user_ids if user_id in registered
+            ],
+            "rejected": rejected,
+            "not_found": [user_id for user_id in user_ids if user_id not in existing],
+        }
+        self.record_registrations(data)
+        return Response(data=data, status=status.HTTP_200_OK)
+
+    def record_registrations(self, data):
+        registration_attempts.inc(sum(map(len, data.values())), view=self.name)
+        reasons = {
+            "already_registered": "registration_already_exists",
+            "rejected": "registration_for_fully_booked_event",
+            "not_found": "user_not_found",
+        }
+        for key, reason in reasons.items():
+            if data[key]:
+                registration_rejections.inc(
+                    len(data[key]), view=self.name, reason=reason
+                )
+
+    def delete(self, request, *args, **kwargs):
+        user_ids = self.get_user_ids(request)
+        event_id = self.kwargs["pk"]
+        event = get_object_or_404(Event.objects.only("pk"), pk=event_id)
+
+        with transaction.atomic():
+            registrations = EventRegistration.objects.filter(
+                event_id=event.pk, user_id__in=user_ids
+            )
+            removed = set(registrations.values_list("user_id", flat=True))
+            if removed:
+                registrations.delete()
+                Event.events.release_seats(event.pk, len(removed))
+                # queryset deletes are not logged by the post_delete receiver
+                EventChange.objects.log_registrations(
+                    [(event.pk, user_id) for user_id in removed], EventChange.DELETE
+                )
+
+        data = {
+            "removed": [user_id for user_id in user_ids if user_id in removed],
+            "not_registered": [
+                user_id for user_id in user_ids if user_id not in removed
+            ],
+        }
+        return Response(data=data, status=status.HTTP_200_OK)
+
+
+class EventAttendeesExportView(generics.GenericAPIView):
+    name = "event_attendees_export_view"
+    queryset = Event.objects.only("arranged_by_id")
+    authentication_classes = (StatelessJWTAuthentication,)
+    permission_classes = (IsOwner,)
+    fields = ("user_id", "username", "first_name", "last_name", "email")
+    chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        event = self.get_object()
+        output = request.query_params.get("output", "csv")
+        if output not in STREAMS:
+            message = f"Supported outputs: {', '.join(STREAMS)}."
+            raise ValidationError(detail={"output": message})
+
+        # rows are fetched in chunks while the response is being sent, so
+        # memory use does not depend on the number of attendees
+        rows = (
+            EventRegistration.objects.filter(event_id=event.pk)
+            .order_by("pk")
+            .values_list(
+                "user_id",
+                "user__username",
+                "user__first_name",
+                "user__last_name",
+                "user__email",
+            )
+            .iterator(chunk_size=self.chunk_size)
+        )
+        stream, content_type = STREAMS[output]
+        response = StreamingHttpResponse(
+            stream(self.fields, rows), content_type=content_type
+        )
+        filename = f"event-{event.pk}-attendees.{output}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class EventExportView(views.APIView):
+    name = "event_export_view"
+    authentication_classes = (StatelessJWTAuthentication,)
+    permission_classes = (permissions.IsAdminUser,)
+    serializer_class = EventExportQuerySerializer
+    chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        events = Event.objects.order_by("updated_on", "id")
+        updated_since = serializer.validated_data.get("updated_since")
+        if updated_since:
+            events = events.filter(updated_on__gte=updated_since)
+
+        rows = events.values_list(*EVENT_FIELDS).iterator(chunk_size=self.chunk_size)
+        stream, content_type = STREAMS["ndjson"]
+        response = StreamingHttpResponse(
+            stream(EVENT_FIELDS, format_event_rows(rows)), content_type=content_type
+        )
+        response["Content-Disposition"] = 'attachment; filename="events.ndjson"'
+        return response
+
+
+class EventChangesView(views.APIView):
+    """
+    Incremental change feed: the changes recorded after the sequence number
+    `since`, with only the latest change of every event and registration.
+    """
+
+    name = "event_changes_view"
+    authentication_classes = (StatelessJWTAuthentication,)
+    permission_classes = (permissions.IsAdminUser,)
+    serializer_class = EventChangesQuerySerializer
+
+    def get(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        since = serializer.validated_data["since"]
+        limit = serializer.validated_data["limit"]
+
+        # records up to the horizon were removed by retention, a client
+        # behind it has missed changes and must run a full export again
+        horizon = (
+            EventChange.objects.filter(kind=EventChange.HORIZON)
+            .order_by("-pk")
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if horizon is not None and since < horizon:
+            data = {
+                "detail": "The changes since this sequence number are no longer "
+                "available, please export all events again.",
+                "horizon": horizon,
+            }
+            return Response(data=data, status=status.HTTP_410_GONE)
+
+        records = list(
+            EventChange.objects.filter(pk__gt=since)
+            .exclude(kind=EventChange.HORIZON)
+            .order_by("pk")
+            .values_list("pk", "kind", "action", "event_id", "user_id")[: limit + 1]
+        )
+        has_more = len(records) > limit
+        records = records[:limit]
+
+        latest = {}
+        for seq, kind, action, event_id, user_id in records:
+            latest.pop((kind, event_id, user_id), None)
+            latest[(kind, event_id, user_id)] = (seq, action)
+
+        upserted = [
+            event_id
+            for (kind, event_id, _), (_, action) in latest.items()
+            if kind == EventChange.EVENT and action == EventChange.UPSERT
+        ]
+        rows = Event.objects.filter(pk__in=upserted).values_list(*EVENT_FIELDS)
+        events = {
+            row[0]: dict(zip(EVENT_FIELDS, row)) for row in format_event_rows(rows)
+        }
+
+        changes = []
+        for (kind, event_id, user_id), (seq, action) in latest.items():
+            change = {"seq": seq, "type": kind, "action": action}
+            if kind == EventChange.REGISTRATION:
+                change.update(event=event_id, user=user_id)
+            elif action == EventChange.UPSERT:
+                if event_id not in events:
+                    # deleted later, its delete record follows
+                    continue
+                change.update(id=event_id, data=events[event_id])
+            else:
+                change.update(id=event_id)
+            changes.append(change)
+
+        data = {
+            "changes": changes,
+            "next": records[-1][0] if records else since,
+            "has_more": has_more,
+        }
+        return Response(data=data, status=status.HTTP_200_OK)
+
+
+class EventSeatStreamView(View):
+    """
+    Server-Sent Events stream of the seat availability of published events,
+    served by the ASGI application only. Updates come from the process wide
+    seat broadcaster instead of one polling loop per client.
+    """
+
+    name = "event_seat_stream_view"
+    serializer_class = EventSeatStreamQuerySerializer
+
+    async def get(self, request, *args, **kwargs):
+        if not hasattr(request, "scope"):
+            data = {"detail": "Streams are served by the ASGI application only."}
+            return JsonResponse(data, status=status.HTTP_501_NOT_IMPLEMENTED)
+
+        try:
+            authenticated = await sync_to_async(
+                StatelessJWTAuthentication().authenticate
+            )(request)
+        except AuthenticationFailed as exc:
+            detail = (
+                exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+            )
+            return JsonResponse(detail, status=status.HTTP_401_UNAUTHORIZED)
+        if authenticated is None:
+            data = {"detail": "Authentication credentials were not provided."}
+            return JsonResponse(data, status=status.HTTP_401_UNAUTHORIZED)
+
+        serializer = self.serializer_class(data=request.GET)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        event_ids = list(dict.fromkeys(serializer.validated_data["events"]))
+
+        response = StreamingHttpResponse(
+            self.stream(event_ids), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def stream(self, event_ids):
+        queue = await seat_broadcaster.subscribe(event_ids)
+        try:
+            yield "retry: 3000\n\n"
+            for seats in await get_event_seats(event_ids):
+                yield self.format_message(seats)
+
+            loop = asyncio.get_running_loop()
+            # a closed connection is not noticed while the stream is idle,
+            # streams end after a while and clients reconnect
+            deadline = loop.time() + settings.SEAT_STREAM_MAX_AGE
+            while (remaining := deadline - loop.time()) > 0:
+                timeout = min(settings.SEAT_STREAM_KEEPALIVE, remaining)
+                try:
+                    seq, seats = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield self.format_message(seats, seq)
+        finally:
+            seat_broadcaster.unsubscribe(queue, event_ids)
+
+    def format_message(self, seats, seq=None):
+        kind = "removed" if seats.get("removed") else "seats"
+        message = f"event: {kind}\ndata: {json.dumps(seats)}\n\n"
+        if seq is not None:
+            message = f"id: {seq}\n{message}"
+        return message
+
+
+class AsyncEventListCreateView(AsyncListMixin, EventListCreateView):
+    # cache calls block (a file lock, the database cache), they run in a thread
+
+    async def aget_validators(self):
+        cache_key = await sync_to_async(get_event_list_cache_key)(self.request)
+        validators = await sync_to_async(get_cached_event_list_validators)(cache_key)
+        if validators is None:
+            validators = await super().aget_validators()
+            await sync_to_async(set_cached_event_list_validators)(cache_key, validators)
+        return validators
+
+    async def aserve(self, request, *args, **kwargs):
+        cache_key = await sync_to_async(get_event_list_cache_key)(request)
+        data = await sync_to_async(get_cached_event_list)(cache_key)
+        if data is not None:
+            return Response(data)
+
+        response = await super().aserve(request, *args, **kwargs)
+        await sync_to_async(set_cached_event_list)(cache_key, response.data)
+        return response
+
+
+class AsyncEventRetrieveUpdateDestroyView(
+    AsyncRetrieveMixin, EventRetrieveUpdateDestroyView
+):
+    pass
+
+
+class AsyncUserEventsView(AsyncListMixin, UserEventsView):
+    pass
+
+
+class AsyncUserRegistrationsListView(AsyncListMixin, UserRegistrationsListView):
+    pass
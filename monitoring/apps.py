@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class MonitoringConfig(AppConfig):
+    name = "monitoring"
+
+    def ready(self):
+        # slow queries are logged outside of requests as well
+        if settings.SLOW_QUERY_THRESHOLD:
+            from .queries import install_query_recorder
+
+            install_query_recorder()
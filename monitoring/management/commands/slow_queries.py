@@ -0,0 +1,98 @@
+import json
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+ORDERINGS = ("total", "count", "mean", "max")
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarize the slow query log: executions, total, mean and maximum time "
+        "of every query, the views that ran it and its query plan"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--log",
+            type=Path,
+            help="Slow query log, rotated files next to it are read as well "
+            "(default: LOG_SLOW_QUERIES)",
+        )
+        parser.add_argument(
+            "--order-by",
+            choices=ORDERINGS,
+            default="total",
+            help="Order the queries by their total (default), mean or maximum "
+            "time, or by their count",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=20, help="Show N queries (default: 20)"
+        )
+
+    def handle(self, *args, **options):
+        log = options["log"] or Path(settings.LOG_SLOW_QUERIES)
+        paths = sorted(log.parent.glob(f"{log.name}.*")) + [log]
+        paths = [path for path in paths if path.is_file()]
+        if not paths:
+            raise CommandError(f"No slow query log at {log}")
+
+        queries = {}
+        for path in paths:
+            with path.open() as lines:
+                for line in lines:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.add_record(queries, record)
+
+        summaries = sorted(
+            queries.values(), key=lambda query: query[options["order_by"]], reverse=True
+        )[: options["limit"]]
+        for query in summaries:
+            self.write_query(query)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{sum(query['count'] for query in queries.values())} slow "
+                f"execution(s) of {len(queries)} query(ies)."
+            )
+        )
+
+    def add_record(self, queries, record):
+        query = queries.get(record["fingerprint"])
+        if query is None:
+            query = queries[record["fingerprint"]] = {
+                "fingerprint": record["fingerprint"],
+                "sql": record["sql"],
+                "count": 0,
+                "total": 0.0,
+                "max": 0.0,
+                "views": Counter(),
+                "plan": None,
+            }
+        query["count"] += 1
+        query["total"] += record["duration_ms"]
+        query["max"] = max(query["max"], record["duration_ms"])
+        query["mean"] = query["total"] / query["count"]
+        query["views"][record["view"] or "-"] += 1
+        if record.get("plan"):
+            query["plan"] = record["plan"]
+
+    def write_query(self, query):
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"{query['fingerprint']}: {query['count']} execution(s), "
+                f"total {query['total']:.1f} ms, mean {query['mean']:.1f} ms, "
+                f"max {query['max']:.1f} ms"
+            )
+        )
+        views = ", ".join(
+            f"{view} ({count})" for view, count in query["views"].most_common()
+        )
+        self.stdout.write(f"  views: {views}")
+        self.stdout.write(f"  sql: {query['sql']}")
+        for row in query["plan"] or ():
+            self.stdout.write(f"  plan: {row}")
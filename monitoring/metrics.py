@@ -0,0 +1,362 @@
+"""
+In-process metrics in the Prometheus text format, without a client library.
+
+Every process counts in memory. With METRICS_DIR set, a thread of every
+process (e.g. of the gunicorn workers) writes its values to a file of its own
+in that directory every METRICS_FLUSH_INTERVAL seconds, and /metrics adds up
+the files of all processes. A file is named after the pid and a random token,
+a later process with the pid of an exited one does not overwrite its file.
+The files of exited processes are added to an archive file and removed, so
+counters never go back and the directory does not grow with every restarted
+worker.
+"""
+
+import atexit
+import fcntl
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# the values of exited processes, and the files they were read from
+ARCHIVE = "archive.json"
+LOCK = "metrics.lock"
+
+
+class Metric(ABC):
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # label values: value
+        self.values = {}
+        self.registry = None
+
+    def get_key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} has the labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def get_samples(self, values):
+        """
+        Yield the sample lines of the collected values.
+        """
+
+    def format_labels(self, key, **extra):
+        labels = dict(zip(self.labelnames, key), **extra)
+        if not labels:
+            return ""
+        pairs = ",".join(
+            f'{name}="{escape_label_value(value)}"' for name, value in labels.items()
+        )
+        return f"{{{pairs}}}"
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.get_key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.changed()
+
+    def merge(self, values, other):
+        for key, value in other.items():
+            values[key] = values.get(key, 0) + value
+
+    def get_samples(self, values):
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{self.format_labels(key)} {format_value(value)}"
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self.get_key(labels)
+        with self.registry.lock:
+            # counts per bucket (not cumulative), then the sum of the values
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    break
+            else:
+                index = len(self.buckets)
+            state[index] += 1
+            state[-1] += value
+        self.registry.changed()
+
+    def merge(self, values, other):
+        for key, state in other.items():
+            current = values.setdefault(key, [0] * len(state))
+            for index, value in enumerate(state):
+                current[index] += value
+
+    def get_samples(self, values):
+        bounds = [format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for key, state in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, state):
+                cumulative += count
+                labels = self.format_labels(key, le=bound)
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = self.format_labels(key)
+            yield f"{self.name}_sum{labels} {format_value(state[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        # processes that record nothing (e.g. management commands) write no file
+        self.dirty = False
+        self.flusher = None
+        self.pid = None
+        self.file_name = None
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"{metric.name} is registered already")
+        self.metrics[metric.name] = metric
+        metric.registry = self
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), **kwargs):
+        return self.register(Histogram(name, documentation, labelnames, **kwargs))
+
+    def reset(self):
+        with self.lock:
+            for metric in self.metrics.values():
+                metric.values.clear()
+
+    def get_directory(self):
+        directory = settings.METRICS_DIR
+        return Path(directory) if directory else None
+
+    def get_path(self, directory):
+        pid = os.getpid()
+        if self.pid != pid:
+            self.pid = pid
+            self.file_name = f"metrics-{pid}-{uuid.uuid4().hex}.json"
+        return directory / self.file_name
+
+    def changed(self):
+        self.dirty = True
+        # threads do not survive the fork of a worker process
+        if self.flusher is None or not self.flusher.is_alive():
+            if self.get_directory() is not None:
+                self.start_flusher()
+
+    def start_flusher(self):
+        with self.lock:
+            if self.flusher is not None and self.flusher.is_alive():
+                return
+            self.flusher = threading.Thread(
+                target=self.run_flusher, name="metrics-flusher", daemon=True
+            )
+            self.flusher.start()
+
+    def run_flusher(self):
+        # flushes the last values of a process that went idle as well
+        while True:
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except OSError:
+                # e.g. a full disk, the next flush writes the values again
+                self.dirty = True
+
+    def flush(self):
+        """
+        Write the values of this process to its file in METRICS_DIR.
+        """
+        directory = self.get_directory()
+        if directory is None or not self.dirty:
+            return
+        with self.lock:
+            self.dirty = False
+            data = {
+                name: [[list(key), value] for key, value in metric.values.items()]
+                for name, metric in self.metrics.items()
+            }
+        directory.mkdir(parents=True, exist_ok=True)
+        path = self.get_path(directory)
+        temporary = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        temporary.write_text(json.dumps(data))
+        # readers see either the previous or the new file, never a partial one
+        os.replace(temporary, path)
+
+    def collect(self):
+        """
+        Return {metric name: values} of this process, or of all processes
+        that share METRICS_DIR.
+        """
+        directory = self.get_directory()
+        if directory is None:
+            with self.lock:
+                return {
+                    name: {
+                        key: list(value) if isinstance(value, list) else value
+                        for key, value in metric.values.items()
+                    }
+                    for name, metric in self.metrics.items()
+                }
+
+        self.flush()
+        collected = {name: {} for name in self.metrics}
+        # the archive and the files it was read from change together
+        with open(directory / LOCK, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            archive = self.archive(directory)
+            self.merge(collected, archive["metrics"])
+            for path in directory.glob("metrics-*.json"):
+                if path.name not in archive["files"]:
+                    self.merge(collected, read_json(path) or {})
+        return collected
+
+    def merge(self, collected, data):
+        for name, items in data.items():
+            metric = self.metrics.get(name)
+            if metric is not None:
+                other = {tuple(key): value for key, value in items}
+                metric.merge(collected.setdefault(name, {}), other)
+
+    def archive(self, directory):
+        """
+        Add the files of exited processes to the archive file and remove
+        them, the directory is locked. Return the archive.
+        """
+        path = directory / ARCHIVE
+        archive = read_json(path) or {"files": [], "metrics": {}}
+        # files that were archived by a process that exited before it
+        # removed them are not added once more
+        archived = {name for name in archive["files"] if (directory / name).exists()}
+        exited = [
+            file
+            for file in directory.glob("metrics-*.json")
+            if file.name not in archived and not is_running(get_file_pid(file))
+        ]
+        if not exited:
+            return archive
+
+        collected = {}
+        self.merge(collected, archive["metrics"])
+        for file in exited:
+            self.merge(collected, read_json(file) or {})
+        archive = {
+            "files": sorted(archived.union(file.name for file in exited)),
+            "metrics": {
+                name: [[list(key), value] for key, value in values.items()]
+                for name, values in collected.items()
+            },
+        }
+        temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        temporary.write_text(json.dumps(archive))
+        os.replace(temporary, path)
+        for file in exited:
+            file.unlink(missing_ok=True)
+        return archive
+
+    def render(self):
+        """
+        Return the metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for name, values in self.collect().items():
+            metric = self.metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            lines.extend(metric.get_samples(values))
+        return "\n".join(lines) + "\n"
+
+
+def read_json(path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def get_file_pid(path):
+    # metrics-{pid}-{token}.json
+    return int(path.name.split("-")[1])
+
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # a process of another user
+        return True
+    return True
+
+
+def escape_label_value(value):
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def format_value(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Wall time of the requests by view, method and status code",
+    ("view", "method", "status"),
+)
+request_queries = registry.counter(
+    "http_request_db_queries_total",
+    "SQL queries run by the requests by view",
+    ("view",),
+)
+request_db_duration = registry.counter(
+    "http_request_db_duration_seconds_total",
+    "Time the requests spent in SQL queries by view",
+    ("view",),
+)
+cache_requests = registry.counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result (hit or miss)",
+    ("cache", "result"),
+)
+registration_attempts = registry.counter(
+    "event_registration_attempts_total",
+    "Registrations for events requested by users and admins",
+    ("view",),
+)
+registration_rejections = registry.counter(
+    "event_registration_rejections_total",
+    "Rejected registrations for events by view and reason code",
+    ("view", "reason"),
+)
@@ -0,0 +1,100 @@
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics
+from .queries import RequestStats, install_query_recorder, request_stats
+
+logger = logging.getLogger(__name__)
+
+
+class PerformanceMiddleware:
+    """
+    Records the view name, wall time, database time, query count and
+    response size of every request. With the PERFORMANCE_MIDDLEWARE setting
+    they are reported in a Server-Timing header and a log line, with
+    METRICS_ENABLED they are added to the request metrics, and with
+    SLOW_QUERY_THRESHOLD slow queries are logged with their view. Otherwise
+    Django drops the middleware at startup.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.report = settings.PERFORMANCE_MIDDLEWARE
+        self.record = settings.METRICS_ENABLED
+        if not (self.report or self.record or settings.SLOW_QUERY_THRESHOLD):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        install_query_recorder()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats(request)
+        token = request_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_stats.reset(token)
+        return self.process_response(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats(request)
+        token = request_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_stats.reset(token)
+        return self.process_response(request, response, stats)
+
+    def process_response(self, request, response, stats):
+        duration = time.perf_counter() - stats.start
+        view = stats.view
+        if self.record:
+            self.record_metrics(request, response, stats, duration, view)
+        if self.report:
+            self.report_timing(request, response, stats, duration, view)
+        return response
+
+    def record_metrics(self, request, response, stats, duration, view):
+        # unresolved paths are not labeled with the path, which is unbounded
+        view = view or "unresolved"
+        metrics.request_duration.observe(
+            duration, view=view, method=request.method, status=response.status_code
+        )
+        metrics.request_queries.inc(stats.queries, view=view)
+        metrics.request_db_duration.inc(stats.db_time, view=view)
+
+    def report_timing(self, request, response, stats, duration, view):
+        total = duration * 1000
+        db_time = stats.db_time * 1000
+        # the size of a streamed response is unknown when the headers are sent
+        size = None if response.streaming else len(response.content)
+
+        timings = [
+            f"total;dur={total:.1f}",
+            f'db;dur={db_time:.1f};desc="{stats.queries} queries"',
+        ]
+        if view:
+            timings.append(f'view;desc="{view}"')
+        response.headers["Server-Timing"] = ", ".join(timings)
+
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": view,
+            "status": response.status_code,
+            "total_ms": round(total, 2),
+            "db_ms": round(db_time, 2),
+            "queries": stats.queries,
+            "size": size,
+        }
+        logger.info(json.dumps(record), extra=record)
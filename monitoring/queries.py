@@ -0,0 +1,151 @@
+"""
+Query recording: an execute wrapper added to the database connections times
+the queries of the request handled in the current context, and logs queries
+slower than SLOW_QUERY_THRESHOLD milliseconds.
+"""
+
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+slow_query_logger = logging.getLogger("monitoring.slow_queries")
+
+# Statistics of the request handled in the current context, the context is
+# copied into the threads that run the sync code of an async request.
+request_stats = ContextVar("request_stats", default=None)
+
+# fingerprints explained by this process, a plan is logged once per query
+explained = set()
+MAX_EXPLAINED = 1000
+
+LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"%s|\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+class RequestStats:
+    def __init__(self, request):
+        self.request = request
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+
+    @property
+    def view(self):
+        return get_view_name(self.request)
+
+
+def get_view_name(request):
+    match = request.resolver_match
+    if match is None:
+        return None
+    view_class = getattr(match.func, "cls", None) or getattr(
+        match.func, "view_class", None
+    )
+    return getattr(view_class, "name", None) or match.url_name or match.view_name
+
+
+def normalize_sql(sql):
+    """
+    Return the SQL with the parameters and literals replaced by "?" and
+    lists of them by "(...)", so that executions of a query look the same.
+    """
+    for pattern, replacement in LITERALS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def get_fingerprint(normalized_sql):
+    return hashlib.md5(normalized_sql.encode()).hexdigest()[:12]
+
+
+def record_query(execute, sql, params, many, context):
+    stats = request_stats.get()
+    threshold = settings.SLOW_QUERY_THRESHOLD
+    if stats is None and not threshold:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        result = execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        if stats is not None:
+            stats.db_time += duration
+            stats.queries += 1
+    # failed queries are not logged
+    if threshold and duration * 1000 >= threshold:
+        if random.random() < settings.SLOW_QUERY_SAMPLE_RATE:
+            log_slow_query(sql, params, many, context["connection"], duration, stats)
+    return result
+
+
+def log_slow_query(sql, params, many, connection, duration, stats):
+    normalized = normalize_sql(sql)
+    fingerprint = get_fingerprint(normalized)
+    record = {
+        "time": timezone.now().isoformat(),
+        "fingerprint": fingerprint,
+        "sql": normalized,
+        "duration_ms": round(duration * 1000, 3),
+        "view": stats.view if stats is not None else None,
+        "database": connection.alias,
+    }
+
+    explain_threshold = settings.SLOW_QUERY_EXPLAIN_THRESHOLD
+    if (
+        explain_threshold
+        and duration * 1000 >= explain_threshold
+        and not many
+        and fingerprint not in explained
+        and len(explained) < MAX_EXPLAINED
+        and normalized.upper().startswith("SELECT")
+    ):
+        explained.add(fingerprint)
+        record["plan"] = explain(sql, params, connection)
+
+    slow_query_logger.warning(json.dumps(record))
+
+
+def explain(sql, params, connection):
+    """
+    Return the rows of the query plan, or None when the database can not
+    explain the query.
+    """
+    # a cursor of its own, which is neither wrapped nor shares the result of
+    # the query being recorded
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+        return [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+    except DatabaseError:
+        return None
+    finally:
+        cursor.close()
+
+
+def add_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_query_recorder():
+    """
+    Add the recorder to the connections opened from now on, and to those of
+    the current thread, as connections are per thread.
+    """
+    connection_created.connect(add_query_recorder)
+    for connection in connections.all(initialized_only=True):
+        add_query_recorder(connection)
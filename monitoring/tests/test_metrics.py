@@ -0,0 +1,197 @@
+import os
+import time
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from event.models import Event
+from event.views import EventListCreateView, UserEventRegistrationView
+
+from .. import metrics
+from ..metrics import Registry, get_file_pid, registry
+from ..views import MetricsView
+
+TOKEN = "scraper-token"
+
+
+@pytest.fixture
+def metrics_enabled(settings):
+    settings.METRICS_ENABLED = True
+    settings.METRICS_TOKEN = TOKEN
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def get_samples(text):
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, _, value = line.rpartition(" ")
+            samples[name] = float(value)
+    return samples
+
+
+class TestRegistry:
+    def test_counter_and_histogram_are_rendered(self):
+        test_registry = Registry()
+        counter = test_registry.counter("requests_total", "Requests", ("view",))
+        histogram = test_registry.histogram(
+            "duration_seconds", "Duration", buckets=(0.1, 1)
+        )
+        counter.inc(view="list")
+        counter.inc(2, view='say "hi"')
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value)
+
+        text = test_registry.render()
+        assert "# TYPE requests_total counter" in text
+        assert "# TYPE duration_seconds histogram" in text
+        assert get_samples(text) == {
+            'requests_total{view="list"}': 1,
+            'requests_total{view="say \\"hi\\""}': 2,
+            'duration_seconds_bucket{le="0.1"}': 1,
+            'duration_seconds_bucket{le="1"}': 2,
+            'duration_seconds_bucket{le="+Inf"}': 3,
+            "duration_seconds_sum": 5.55,
+            "duration_seconds_count": 3,
+        }
+
+    def test_labels_must_match(self):
+        counter = Registry().counter("requests_total", "Requests", ("view",))
+        with pytest.raises(ValueError):
+            counter.inc(path="/")
+
+    def test_processes_are_added_up(self, settings, tmp_path, monkeypatch):
+        settings.METRICS_DIR = str(tmp_path)
+        test_registry = Registry()
+        counter = test_registry.counter("requests_total", "Requests")
+        histogram = test_registry.histogram("duration_seconds", "Duration")
+
+        # an exited worker left its metrics behind
+        monkeypatch.setattr(os, "getpid", lambda: 1)
+        counter.inc(3)
+        histogram.observe(0.2)
+        test_registry.flush()
+        test_registry.reset()
+        monkeypatch.undo()
+
+        counter.inc()
+        histogram.observe(0.3)
+        samples = get_samples(test_registry.render())
+        assert samples["requests_total"] == 4
+        assert samples["duration_seconds_count"] == 2
+        assert samples["duration_seconds_sum"] == 0.5
+        names = sorted(path.name for path in tmp_path.glob("metrics-*.json"))
+        assert len(names) == 2
+        assert names[0].startswith("metrics-1-")
+        assert names[1].startswith(f"metrics-{os.getpid()}-")
+
+    def test_a_reused_pid_does_not_overwrite_the_file(
+        self, settings, tmp_path, monkeypatch
+    ):
+        settings.METRICS_DIR = str(tmp_path)
+        monkeypatch.setattr(os, "getpid", lambda: 1)
+        for _ in range(2):
+            # a worker that got the pid of an exited one
+            test_registry = Registry()
+            test_registry.counter("requests_total", "Requests").inc()
+            test_registry.flush()
+        assert get_samples(test_registry.render())["requests_total"] == 2
+
+    def test_files_of_exited_processes_are_archived(
+        self, settings, tmp_path, monkeypatch
+    ):
+        settings.METRICS_DIR = str(tmp_path)
+        # two exited workers with the pid 2, a running one with the pid 3
+        for pid in (2, 2, 3):
+            monkeypatch.setattr(os, "getpid", lambda: pid)
+            worker_registry = Registry()
+            worker_registry.counter("requests_total", "Requests").inc(pid)
+            worker_registry.flush()
+        monkeypatch.undo()
+        monkeypatch.setattr(metrics, "is_running", lambda pid: pid != 2)
+
+        test_registry = Registry()
+        test_registry.counter("requests_total", "Requests").inc()
+        for _ in range(2):
+            assert get_samples(test_registry.render())["requests_total"] == 8
+        pids = {get_file_pid(path) for path in tmp_path.glob("metrics-*.json")}
+        assert pids == {3, os.getpid()}
+
+        monkeypatch.setattr(metrics, "is_running", lambda pid: pid not in (2, 3))
+        assert get_samples(test_registry.render())["requests_total"] == 8
+        pids = {get_file_pid(path) for path in tmp_path.glob("metrics-*.json")}
+        assert pids == {os.getpid()}
+
+    def test_values_are_flushed_by_a_thread(self, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        settings.METRICS_FLUSH_INTERVAL = 0.01
+        counter = Registry().counter("requests_total", "Requests")
+        counter.inc()
+        # no later increment, the worker went idle
+        deadline = time.monotonic() + 5
+        while not list(tmp_path.glob("metrics-*.json")):
+            assert time.monotonic() < deadline, "the values were not flushed"
+            time.sleep(0.01)
+
+
+class TestMetricsView:
+    url = reverse(MetricsView.name)
+
+    def scrape(self, client, token=TOKEN):
+        return client.get(self.url, headers={"authorization": f"Bearer {token}"})
+
+    def test_metrics_are_disabled_by_default(self, client):
+        response = self.scrape(client)
+        assert response.status_code == 404
+
+    def test_metrics_are_for_the_scraper_only(
+        self, settings, metrics_enabled, client, user_api_client
+    ):
+        assert self.scrape(client, token="guess").status_code == 401
+        assert user_api_client.get(self.url).status_code == 401
+        settings.METRICS_TOKEN = ""
+        assert self.scrape(client, token="").status_code == 401
+
+    def test_request_metrics(self, metrics_enabled, user_api_client, client):
+        for _ in range(2):
+            response = user_api_client.get(reverse(EventListCreateView.name))
+            assert response.status_code == 200
+
+        response = self.scrape(client)
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        samples = get_samples(response.content.decode())
+        labels = f'view="{EventListCreateView.name}",method="GET",status="200"'
+        assert samples[f"http_request_duration_seconds_count{{{labels}}}"] == 2
+        view = f'{{view="{EventListCreateView.name}"}}'
+        assert samples[f"http_request_db_queries_total{view}"] > 0
+        assert samples['cache_requests_total{cache="event_list",result="miss"}'] == 1
+        assert samples['cache_requests_total{cache="event_list",result="hit"}'] == 1
+
+    def test_registration_metrics(
+        self, metrics_enabled, user_api_client, client, test_db_user
+    ):
+        start = timezone.now() + timedelta(days=1)
+        event = Event.objects.create(
+            name="Fully Booked",
+            start=start,
+            end=start + timedelta(hours=1),
+            number_of_seats=1,
+            registrations_count=0,
+        )
+        url = reverse(UserEventRegistrationView.name, kwargs={"event_id": event.pk})
+        assert user_api_client.post(url).status_code == 201
+        assert user_api_client.post(url).status_code == 400
+        url = reverse(UserEventRegistrationView.name, kwargs={"event_id": 0})
+        assert user_api_client.post(url).status_code == 404
+
+        samples = get_samples(self.scrape(client).content.decode())
+        view = f'view="{UserEventRegistrationView.name}"'
+        assert samples[f"event_registration_attempts_total{{{view}}}"] == 3
+        for reason in ("registration_already_exists", "not_found"):
+            labels = f'{view},reason="{reason}"'
+            assert samples[f"event_registration_rejections_total{{{labels}}}"] == 1
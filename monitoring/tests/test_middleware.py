@@ -0,0 +1,91 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from event.views import EventExportView, EventListCreateView
+
+from ..middleware import PerformanceMiddleware
+
+
+@pytest.fixture
+def performance_middleware(settings):
+    settings.PERFORMANCE_MIDDLEWARE = True
+
+
+def get_records(caplog):
+    return [
+        json.loads(record.getMessage())
+        for record in caplog.records
+        if record.name == PerformanceMiddleware.__module__
+    ]
+
+
+class TestPerformanceMiddleware:
+    url = reverse(EventListCreateView.name)
+
+    def test_middleware_is_disabled_by_default(self, user_api_client, caplog):
+        response = user_api_client.get(self.url)
+        assert response.status_code == 200
+        assert "Server-Timing" not in response.headers
+        assert get_records(caplog) == []
+
+    def test_request_is_measured(self, performance_middleware, user_api_client, caplog):
+        caplog.set_level("INFO")
+        with CaptureQueriesContext(connection) as context:
+            response = user_api_client.get(self.url)
+        assert response.status_code == 200
+
+        [record] = get_records(caplog)
+        assert record["method"] == "GET"
+        assert record["path"] == self.url
+        assert record["view"] == EventListCreateView.name
+        assert record["status"] == 200
+        assert record["queries"] == len(context)
+        assert record["size"] == len(response.content)
+        assert record["total_ms"] >= record["db_ms"] > 0
+
+        metrics = response.headers["Server-Timing"].split(", ")
+        assert metrics[0].startswith("total;dur=")
+        assert metrics[1].startswith("db;dur=")
+        assert metrics[1].endswith(f';desc="{len(context)} queries"')
+        assert metrics[2] == f'view;desc="{EventListCreateView.name}"'
+
+    def test_streaming_response_has_no_size(
+        self, performance_middleware, admin_api_client, caplog
+    ):
+        caplog.set_level("INFO")
+        response = admin_api_client.get(reverse(EventExportView.name))
+        assert response.status_code == 200
+        [record] = get_records(caplog)
+        assert record["view"] == EventExportView.name
+        assert record["size"] is None
+
+    def test_unresolved_request(self, performance_middleware, api_client, caplog):
+        caplog.set_level("INFO")
+        response = api_client.get("/not-found/")
+        assert response.status_code == 404
+        [record] = get_records(caplog)
+        assert record["view"] is None
+        assert "view;" not in response.headers["Server-Timing"]
+
+    def test_async_request_is_measured(
+        self, performance_middleware, user_api_client, caplog
+    ):
+        caplog.set_level("INFO")
+        headers = {"authorization": user_api_client._credentials["HTTP_AUTHORIZATION"]}
+
+        @async_to_sync
+        async def get():
+            return await AsyncClient().get(self.url, headers=headers)
+
+        with CaptureQueriesContext(connection) as context:
+            response = get()
+        assert response.status_code == 200
+        [record] = get_records(caplog)
+        assert record["view"] == EventListCreateView.name
+        assert record["queries"] == len(context) > 0
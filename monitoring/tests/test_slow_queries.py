@@ -0,0 +1,149 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from event.models import Event
+from event.views import EventListCreateView
+
+from .. import queries
+from ..queries import get_fingerprint, install_query_recorder, normalize_sql
+
+
+@pytest.fixture
+def slow_queries(settings, caplog, monkeypatch):
+    # every query is slow
+    settings.SLOW_QUERY_THRESHOLD = 1e-6
+    settings.SLOW_QUERY_EXPLAIN_THRESHOLD = 0
+    # the logger writes to its own file only, caplog listens on the root logger
+    monkeypatch.setattr(queries.slow_query_logger, "propagate", True)
+    install_query_recorder()
+    queries.explained.clear()
+    return caplog
+
+
+def get_records(caplog):
+    return [
+        json.loads(record.getMessage())
+        for record in caplog.records
+        if record.name == queries.slow_query_logger.name
+    ]
+
+
+class TestNormalizeSql:
+    @pytest.mark.parametrize(
+        "sql, normalized",
+        [
+            (
+                'SELECT "id" FROM "event_event" WHERE "id" = %s LIMIT 21',
+                'SELECT "id" FROM "event_event" WHERE "id" = ? LIMIT ?',
+            ),
+            (
+                "SELECT * FROM t1 WHERE name = 'it''s' AND id IN (%s, %s,  %s)",
+                "SELECT * FROM t1 WHERE name = ? AND id IN (...)",
+            ),
+            (
+                "UPDATE t SET n = n - 1\n  WHERE x >= 2.5",
+                "UPDATE t SET n = n - ? WHERE x >= ?",
+            ),
+        ],
+    )
+    def test_literals_are_stripped(self, sql, normalized):
+        assert normalize_sql(sql) == normalized
+
+    def test_executions_share_a_fingerprint(self):
+        first = normalize_sql("SELECT * FROM t WHERE id IN (%s, %s)")
+        second = normalize_sql("SELECT * FROM t WHERE id IN (%s, %s, %s)")
+        assert get_fingerprint(first) == get_fingerprint(second)
+
+
+class TestSlowQueryRecorder:
+    def test_slow_queries_are_disabled_by_default(self, db, caplog):
+        caplog.set_level("INFO")
+        install_query_recorder()
+        list(Event.objects.all())
+        assert get_records(caplog) == []
+
+    def test_slow_queries_are_logged(self, slow_queries, db):
+        list(Event.objects.filter(name="secret name"))
+        [record] = get_records(slow_queries)
+        assert record["sql"].startswith("SELECT")
+        assert "secret name" not in record["sql"]
+        assert record["fingerprint"] == get_fingerprint(record["sql"])
+        assert record["duration_ms"] > 0
+        assert record["view"] is None
+        assert record["database"] == "default"
+        assert "plan" not in record
+
+    def test_slow_queries_are_sampled(self, slow_queries, settings, db):
+        settings.SLOW_QUERY_SAMPLE_RATE = 0
+        list(Event.objects.all())
+        assert get_records(slow_queries) == []
+
+    def test_view_of_a_slow_query(self, slow_queries, settings, user_api_client):
+        settings.PERFORMANCE_MIDDLEWARE = True
+        response = user_api_client.get(reverse(EventListCreateView.name))
+        assert response.status_code == 200
+        records = get_records(slow_queries)
+        assert records
+        assert {record["view"] for record in records} == {EventListCreateView.name}
+
+    def test_worst_queries_are_explained_once(self, slow_queries, settings, db):
+        settings.SLOW_QUERY_EXPLAIN_THRESHOLD = 1e-6
+        for _ in range(2):
+            list(Event.events.published_events().filter(pk__gt=0))
+        first, second = get_records(slow_queries)
+        assert first["fingerprint"] == second["fingerprint"]
+        assert first["plan"]
+        assert "plan" not in second
+
+
+class TestSlowQueriesCommand:
+    def write_log(self, path, records):
+        path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+    def get_record(self, fingerprint, duration, view=None, plan=None):
+        record = {
+            "fingerprint": fingerprint,
+            "sql": f"SELECT {fingerprint}",
+            "duration_ms": duration,
+            "view": view,
+        }
+        if plan:
+            record["plan"] = plan
+        return record
+
+    def test_slow_queries_are_summarized(self, settings, tmp_path, capsys):
+        log = tmp_path / "slow.log"
+        settings.LOG_SLOW_QUERIES = str(log)
+        self.write_log(
+            tmp_path / "slow.log.2026-01-01",
+            [self.get_record("a", 100, view="list"), self.get_record("b", 30)],
+        )
+        self.write_log(
+            log,
+            [
+                self.get_record("a", 300, view="list", plan=["SCAN event_event"]),
+                self.get_record("a", 200, view="detail"),
+                self.get_record("b", 50),
+            ],
+        )
+        call_command("slow_queries")
+        output = capsys.readouterr().out
+        assert output.index("a: 3 execution(s)") < output.index("b: 2 execution(s)")
+        assert "total 600.0 ms, mean 200.0 ms, max 300.0 ms" in output
+        assert "views: list (2), detail (1)" in output
+        assert "plan: SCAN event_event" in output
+        assert "5 slow execution(s) of 2 query(ies)." in output
+
+        call_command(
+            "slow_queries", "--log", str(log), "--order-by", "count", "--limit", "1"
+        )
+        output = capsys.readouterr().out
+        assert "a: 3 execution(s)" in output
+        assert "b:" not in output
+
+    def test_missing_log(self, tmp_path):
+        with pytest.raises(Exception, match="No slow query log"):
+            call_command("slow_queries", "--log", str(tmp_path / "missing.log"))
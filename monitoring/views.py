@@ -0,0 +1,32 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views import View
+
+from .metrics import registry
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsView(View):
+    """
+    Metrics in the Prometheus text format, for the scraper authenticated with
+    the bearer token METRICS_TOKEN.
+    """
+
+    name = "metrics_view"
+
+    def get(self, request, *args, **kwargs):
+        if not settings.METRICS_ENABLED:
+            raise Http404
+        if not self.is_scraper(request):
+            return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+        return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
+
+    def is_scraper(self, request):
+        token = settings.METRICS_TOKEN
+        if not token:
+            return False
+        header = request.headers.get("Authorization", "")
+        return hmac.compare_digest(header.encode(), f"Bearer {token}".encode())
@@ -0,0 +1,143 @@
+from datetime import timedelta
+from itertools import count
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from event.models import Event
+
+from .. import urls
+
+ROUTES = {
+    "personal_account_create": ("POST",),
+    "personal_account_retrieve_update_view": ("GET", "PUT", "PATCH"),
+    "user_list_create_view": ("GET", "POST"),
+    "user_retrieve_update_delete_view": ("GET", "PUT", "DELETE"),
+}
+
+event_numbers = count()
+
+
+def get_user_data(name):
+    return {
+        "username": name,
+        "first_name": "First",
+        "last_name": "Last",
+        "email": f"{name}@test.com",
+        "password": "password",
+    }
+
+
+def create_events(rows, arranged_by, registrants=()):
+    start = timezone.now() + timedelta(days=1)
+    events = Event.objects.bulk_create(
+        Event(
+            name=f"Event {next(event_numbers)}",
+            start=start,
+            end=start + timedelta(hours=2),
+            arranged_by=arranged_by,
+        )
+        for _ in range(rows)
+    )
+    for user in registrants:
+        user.registrations.add(*events)
+    return events
+
+
+def test_every_route_has_a_query_bound():
+    names = {pattern.name for pattern in urls.urlpatterns}
+    assert names == set(ROUTES)
+
+
+class TestPersonalAccountQueries:
+    def test_create(
+        self, count_queries, create_users, api_client, row_counts, assert_bounded
+    ):
+        url = reverse("personal_account_create")
+        counts = []
+        for rows in row_counts:
+            create_users(rows)
+            data = get_user_data(f"new_user_{rows}")
+            counts.append(count_queries(api_client.post, url, data))
+        # username and email uniqueness, insert
+        assert_bounded(counts, 3)
+
+    @pytest.mark.parametrize("method", ["get", "put", "patch"])
+    def test_retrieve_update(
+        self,
+        count_queries,
+        create_users,
+        test_db_user,
+        user_api_client,
+        method,
+        row_counts,
+        assert_bounded,
+    ):
+        url = reverse("personal_account_retrieve_update_view")
+        counts = []
+        for rows in row_counts:
+            create_users(rows)
+            create_events(rows, test_db_user, registrants=[test_db_user])
+            data = get_user_data(test_db_user.username)
+            request = getattr(user_api_client, method)
+            counts.append(count_queries(request, url, data))
+        assert_bounded(counts, 6)
+
+
+class TestUserManagementQueries:
+    def get_url(self, user):
+        return reverse("user_retrieve_update_delete_view", kwargs={"pk": user.pk})
+
+    def test_list(
+        self, count_queries, create_users, admin_api_client, row_counts, assert_bounded
+    ):
+        url = reverse("user_list_create_view")
+        counts = []
+        for rows in row_counts:
+            create_users(rows)
+            counts.append(count_queries(admin_api_client.get, url))
+        # the admin, users
+        assert_bounded(counts, 2)
+
+    def test_create(
+        self, count_queries, create_users, admin_api_client, row_counts, assert_bounded
+    ):
+        url = reverse("user_list_create_view")
+        counts = []
+        for rows in row_counts:
+            create_users(rows)
+            data = get_user_data(f"new_user_{rows}")
+            counts.append(count_queries(admin_api_client.post, url, data))
+        assert_bounded(counts, 4)
+
+    @pytest.mark.parametrize("method", ["get", "put"])
+    def test_retrieve_update(
+        self,
+        count_queries,
+        create_users,
+        admin_api_client,
+        method,
+        row_counts,
+        assert_bounded,
+    ):
+        counts = []
+        for rows in row_counts:
+            user = create_users(rows)[0]
+            create_events(rows, user, registrants=[user])
+            data = {"first_name": f"First {rows}"}
+            request = getattr(admin_api_client, method)
+            counts.append(count_queries(request, self.get_url(user), data))
+        assert_bounded(counts, 4)
+
+    def test_delete(
+        self, count_queries, create_users, admin_api_client, row_counts, assert_bounded
+    ):
+        counts = []
+        for rows in row_counts:
+            user = create_users(rows)[0]
+            # the user arranges and attends events, which other users attend
+            create_events(rows, user, registrants=create_users(rows) + [user])
+            counts.append(count_queries(admin_api_client.delete, self.get_url(user)))
+        # change log and registrations_count of the events, cascades
+        assert_bounded(counts, 14)
@@ -3,6 +3,8 @@ from rest_framework import filters, generics, permissions, viewsets
 from rest_framework.generics import get_object_or_404
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from config.replicas import ReplicaReadMixin
+
 from .serializers import PersonalAccountSerializer, UserSerializer
 
 User = get_user_model()
@@ -28,7 +30,7 @@ class PersonalAccountRetrieveUpdateView(generics.RetrieveUpdateAPIView):
         return user
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     authentication_classes = (JWTAuthentication,)
@@ -36,3 +38,6 @@ class UserViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.OrderingFilter, filters.SearchFilter]
     search_fields = ["username", "is_staff"]
     ordering = ["id"]
+
+    def use_replica(self, request):
+        return self.action == "list"